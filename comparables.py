@@ -0,0 +1,150 @@
+# Comparable-properties index for the AI-Based Real Estate Valuation System
+# Listings are partitioned by (City, Property_Type) and sorted so each partition
+# is one contiguous slice of memory-mapped arrays. A KD-tree per partition is
+# built lazily on first use, so a query touches only the few thousand listings
+# of the requested city/type instead of scanning the whole dataset.
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from housing_data import cache_path
+
+COMPARABLE_FEATURES = ['Size_in_SqFt', 'BHK', 'Age_of_Property', 'Floor_No']
+PARTITION_COLUMNS = ['City', 'Property_Type']
+NUMERIC_COLUMNS = COMPARABLE_FEATURES + ['Price_in_Lakhs', 'Price_per_SqFt', 'Total_Floors']
+TEXT_COLUMNS = ['Locality']
+INDEX_FORMAT_VERSION = 1
+
+
+class ComparablesIndex:
+    """Nearest-neighbour lookup of actual listings within a City/Property_Type partition."""
+
+    def __init__(self, arrays, partitions, scale, categories):
+        self.arrays = arrays
+        self.partitions = partitions
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categories = categories
+        self._trees = {}
+
+    def __len__(self):
+        return len(self.arrays['points'])
+
+    @classmethod
+    def build(cls, df):
+        columns = [c for c in NUMERIC_COLUMNS if c in df.columns]
+        missing = [c for c in COMPARABLE_FEATURES + PARTITION_COLUMNS + ['Price_in_Lakhs'] if c not in df.columns]
+        if missing:
+            raise ValueError(f"Dataset is missing columns for comparables: {missing}")
+        data = df[PARTITION_COLUMNS + columns + [c for c in TEXT_COLUMNS if c in df.columns]].dropna(
+            subset=COMPARABLE_FEATURES + ['Price_in_Lakhs'])
+        data = data.sort_values(PARTITION_COLUMNS, kind='stable')
+
+        features = data[COMPARABLE_FEATURES].to_numpy(dtype=np.float64)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        arrays = {'points': (features / scale).astype(np.float32)}
+        for col in columns:
+            arrays[col] = data[col].to_numpy(dtype=np.float32)
+        categories = {}
+        for col in TEXT_COLUMNS:
+            if col in data.columns:
+                codes, uniques = pd.factorize(data[col].astype(str))
+                arrays[col] = codes.astype(np.int32)
+                categories[col] = uniques.tolist()
+
+        keys = (data['City'].astype(str) + '\x1f' + data['Property_Type'].astype(str)).to_numpy()
+        boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(keys)]])
+        partitions = {keys[s]: (int(s), int(e)) for s, e in zip(starts, ends)}
+        return cls(arrays, partitions, scale, categories)
+
+    # ---------- Persistence ----------
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, arr in self.arrays.items():
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(arr))
+        info = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'arrays': list(self.arrays),
+            'partitions': self.partitions,
+            'scale': self.scale.tolist(),
+            'categories': self.categories,
+        }
+        with open(directory / "index.json", "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        return directory
+
+    @classmethod
+    def load(cls, directory):
+        directory = Path(directory)
+        with open(directory / "index.json", encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get('format_version') != INDEX_FORMAT_VERSION:
+            raise ValueError("Stale comparables index format")
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode='r') for name in info['arrays']}
+        partitions = {k: tuple(v) for k, v in info['partitions'].items()}
+        return cls(arrays, partitions, info['scale'], info['categories'])
+
+    # ---------- Queries ----------
+    def _partition_tree(self, key):
+        tree = self._trees.get(key)
+        if tree is None:
+            start, end = self.partitions[key]
+            tree = KDTree(np.asarray(self.arrays['points'][start:end]), leaf_size=32)
+            self._trees[key] = tree
+        return tree
+
+    def query(self, city, property_type, values, k=5):
+        """Top-``k`` listings closest to ``values`` (dict keyed by COMPARABLE_FEATURES)."""
+        key = f"{city}\x1f{property_type}"
+        if key not in self.partitions:
+            return pd.DataFrame()
+        start, end = self.partitions[key]
+        point = np.array([[float(values[f]) for f in COMPARABLE_FEATURES]]) / self.scale
+        dist, idx = self._partition_tree(key).query(point, k=min(k, end - start))
+        rows = idx[0] + start
+        result = {'City': city, 'Property_Type': property_type}
+        for col in TEXT_COLUMNS:
+            if col in self.arrays:
+                result[col] = np.asarray(self.categories[col], dtype=object)[self.arrays[col][rows]]
+        for col in NUMERIC_COLUMNS:
+            if col in self.arrays:
+                result[col] = np.asarray(self.arrays[col][rows])
+        result['Similarity_Distance'] = dist[0]
+        return pd.DataFrame(result)
+
+
+def load_or_build_index(df, version):
+    """Open the persisted index for dataset ``version``, building it on first use."""
+    directory = cache_path("comparables", version)
+    if (directory / "index.json").exists():
+        try:
+            return ComparablesIndex.load(directory)
+        except (ValueError, OSError, KeyError):
+            pass
+    # Build into a private temp dir and rename, so concurrent workers never read a partial index
+    tmp_dir = directory.with_name(f"{directory.name}.tmp{os.getpid()}-{threading.get_ident()}")
+    ComparablesIndex.build(df).save(tmp_dir)
+    try:
+        if directory.exists():
+            shutil.rmtree(directory)
+        tmp_dir.rename(directory)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return ComparablesIndex.load(directory)
+
+
+def timed_query(index, *args, **kwargs):
+    start = time.perf_counter()
+    result = index.query(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
@@ -0,0 +1,213 @@
+# Input drift monitoring for the AI-Based Real Estate Valuation System
+# At registration time each model feature gets a reference histogram: decile
+# edges from the training features plus the share of training rows per bin,
+# stored in the model's manifest entry. While serving, a DriftMonitor keeps the
+# bin index of the last `window` feature vectors in a ring buffer together with
+# running counts, so recording a request is O(features) and never rescans the
+# window. The Population Stability Index per feature (PSI; < 0.1 stable,
+# 0.1-0.25 moderate, > 0.25 significant shift) is recomputed at most every
+# `refresh_seconds` and exported as a Prometheus gauge.
+
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import Gauge
+from model_registry import REGISTRY_FILE, load_registered_model, load_registry, resolve, save_registry
+
+DEFAULT_BINS = 10
+DEFAULT_WINDOW = 2000
+MIN_SAMPLES = 100
+REFRESH_SECONDS = 30
+PSI_EPSILON = 1e-4
+MISSING_BIN = -1
+PSI_LEVELS = ((0.25, 'Significant'), (0.1, 'Moderate'), (0.0, 'Stable'))
+
+
+def reference_histograms(X, columns=None, bins=DEFAULT_BINS):
+    """Quantile bin edges and reference bin shares for ``columns`` of ``X``.
+
+    Only inner edges are stored; the first and last bins are open-ended, so any
+    live value lands in some bin. Repeated quantiles (integer features) collapse.
+    """
+    if columns is None:
+        columns = [c for c in X.columns if pd.api.types.is_numeric_dtype(X[c])]
+    edges, proportions = [], []
+    for col in columns:
+        values = pd.to_numeric(X[col], errors='coerce').to_numpy(dtype=np.float64)
+        values = values[np.isfinite(values)]
+        inner = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])) if len(values) else np.array([])
+        counts = np.bincount(np.searchsorted(inner, values, side='right'), minlength=len(inner) + 1)
+        edges.append(inner.tolist())
+        proportions.append((counts / max(len(values), 1)).tolist())
+    return {'method': 'psi', 'bins': bins, 'n_reference': int(len(X)), 'columns': [str(c) for c in columns],
+            'edges': edges, 'proportions': proportions}
+
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    """Population Stability Index between two bin-share vectors."""
+    expected = np.clip(np.asarray(expected, dtype=np.float64), epsilon, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), epsilon, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def psi_level(value):
+    return next(label for bound, label in PSI_LEVELS if value >= bound)
+
+
+class DriftMonitor:
+    """Sliding-window bin counts of live feature vectors, compared with a stored reference."""
+
+    def __init__(self, reference, window=DEFAULT_WINDOW, refresh_seconds=REFRESH_SECONDS):
+        self.reference = reference
+        self.columns = list(reference['columns'])
+        self.edges = [np.asarray(e, dtype=np.float64) for e in reference['edges']]
+        self.expected = [np.asarray(p, dtype=np.float64) for p in reference['proportions']]
+        self.window = int(window)
+        self.refresh_seconds = refresh_seconds
+        n_features = len(self.columns)
+        n_bins = max(len(e) for e in self.edges) + 1 if self.edges else 1
+        self._bins = np.full((self.window, n_features), MISSING_BIN, dtype=np.int16)
+        self._counts = np.zeros((n_features, n_bins), dtype=np.int64)
+        self._feature_idx = np.arange(n_features)
+        self._head = 0
+        self._filled = 0
+        self.total = 0
+        self._scores = None
+        self._scored_at = None
+        self._lock = threading.Lock()
+
+    def _bin_rows(self, X):
+        # Model feature frames already have the reference column order; anything else is aligned first
+        if list(X.columns) != self.columns:
+            X = X.reindex(columns=self.columns).apply(pd.to_numeric, errors='coerce')
+        # Missing values (fields the user did not enter) get MISSING_BIN and are not counted
+        values = X.to_numpy(dtype=np.float64)
+        bins = np.empty(values.shape, dtype=np.int16)
+        for j, edges in enumerate(self.edges):
+            bins[:, j] = np.searchsorted(edges, values[:, j], side='right')
+        bins[np.isnan(values)] = MISSING_BIN
+        return bins
+
+    def _count(self, bins, delta):
+        present = bins != MISSING_BIN
+        np.add.at(self._counts, (np.broadcast_to(self._feature_idx, bins.shape)[present], bins[present]), delta)
+
+    def observe(self, X):
+        """Record the feature rows of one request (or a batch); the newest ``window`` rows are kept."""
+        bins = self._bin_rows(X)[-self.window:]
+        n = len(bins)
+        if not n:
+            return
+        with self._lock:
+            slots = (self._head + np.arange(n)) % self.window
+            # Writes start at the first empty slot (if any), so only the trailing
+            # `overflow` slots wrap onto rows already in the window
+            overflow = max(0, self._filled + n - self.window)
+            if overflow:
+                self._count(self._bins[slots[n - overflow:]], -1)
+            self._bins[slots] = bins
+            self._count(bins, 1)
+            self._head = (self._head + n) % self.window
+            self._filled = min(self.window, self._filled + n)
+            self.total += n
+
+    def scores(self, force=False):
+        """PSI per feature as a DataFrame; recomputed at most every ``refresh_seconds``."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._scores is not None and now - self._scored_at < self.refresh_seconds:
+                return self._scores
+            counts = self._counts.copy()
+        rows = []
+        for j, col in enumerate(self.columns):
+            # Each feature is compared over the rows where it was supplied
+            present = counts[j].sum()
+            actual = counts[j, :len(self.expected[j])] / present if present else np.zeros(len(self.expected[j]))
+            value = psi(self.expected[j], actual) if present >= MIN_SAMPLES else np.nan
+            rows.append({'Feature': col, 'PSI': value,
+                         'Status': psi_level(value) if present >= MIN_SAMPLES else 'Collecting'})
+        scores = pd.DataFrame(rows, columns=['Feature', 'PSI', 'Status'])
+        with self._lock:
+            self._scores, self._scored_at = scores, now
+        return scores
+
+    @property
+    def samples(self):
+        return self._filled
+
+
+# ---------- Process-wide monitors and the metrics gauge ----------
+_monitors = {}
+_monitors_lock = threading.Lock()
+
+
+def get_monitor(model_name, reference, window=DEFAULT_WINDOW):
+    """One monitor per model per process, shared by all sessions."""
+    with _monitors_lock:
+        monitor = _monitors.get(model_name)
+        if monitor is None or monitor.reference != reference:
+            monitor = _monitors[model_name] = DriftMonitor(reference, window)
+        return monitor
+
+
+def _drift_samples():
+    with _monitors_lock:
+        monitors = list(_monitors.items())
+    samples = {}
+    for name, monitor in monitors:
+        for row in monitor.scores().itertuples(index=False):
+            if not np.isnan(row.PSI):
+                samples[(name, row.Feature)] = row.PSI
+    return samples
+
+
+DRIFT_PSI = Gauge("valuation_feature_drift_psi", "Population Stability Index of live inputs vs. training data",
+                  ("model", "feature"), callback=_drift_samples)
+
+
+# ---------- Registry ----------
+def fit_registered(name_or_alias, X_ref, bins=DEFAULT_BINS, registry_path=REGISTRY_FILE):
+    """Compute reference histograms for a registered model and record them in its manifest entry."""
+    meta = load_registered_model(name_or_alias, registry_path)
+    if meta is None:
+        raise KeyError(f"No model registered as '{name_or_alias}'")
+    reference = reference_histograms(X_ref, meta.get('feature_names') or None, bins)
+    name, _ = resolve(name_or_alias, registry_path)
+    registry = load_registry(registry_path)
+    registry['models'][name]['drift_reference'] = reference
+    save_registry(registry, registry_path)
+    return reference
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store reference feature histograms for drift monitoring")
+    parser.add_argument("name", nargs="?", default=None, help="Registered model name or alias")
+    parser.add_argument("--X", required=True, help="Reference feature CSV (normally the training features)")
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    parser.add_argument("--compare", metavar="CSV", help="Print PSI of this feature CSV against the reference instead")
+    parser.add_argument("--registry", default=str(REGISTRY_FILE))
+    args = parser.parse_args(argv)
+
+    X_ref = pd.read_csv(args.X)
+    if args.compare:
+        reference = reference_histograms(X_ref, bins=args.bins)
+        live = pd.read_csv(args.compare)
+        monitor = DriftMonitor(reference, window=len(live))
+        monitor.observe(live)
+        print("=" * 80)
+        print("INPUT DRIFT - POPULATION STABILITY INDEX")
+        print("=" * 80)
+        print("\n", monitor.scores(force=True).to_string(index=False))
+        return
+    reference = fit_registered(args.name, X_ref, args.bins, Path(args.registry))
+    print(json.dumps(reference, indent=2))
+
+
+if __name__ == "__main__":
+    main()
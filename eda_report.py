@@ -0,0 +1,548 @@
+# Single-pass EDA report for the AI-Based Real Estate Valuation System
+# Profiles a listings CSV the way the notebook's EDA does (missing values,
+# describe(), value counts, IQR outliers, correlation matrix, category box plots,
+# scatter plots with trend lines) but reads the file once, in chunks, and keeps
+# only mergeable aggregates:
+#   - count/mean/M2/M3/M4/min/max per numeric column (merged with Pébay's formulas)
+#   - a co-moment matrix over the correlation columns, which also gives the
+#     least-squares trend lines exactly
+#   - exact value counts per numeric column while it has at most EXACT_VALUES
+#     distinct values (quantiles, histograms and outlier counts stay exact),
+#     falling back to a bottom-k random sample beyond that
+#   - category counts and target sums (counts and average price per category)
+#   - a bottom-k row sample for box plots and scatter points
+#   - distinct 8-byte row hashes for an exact duplicate count while there are at
+#     most EXACT_HASHES of them, then only the HASH_SKETCH smallest (a k-minimum-
+#     values sketch), so the count becomes an estimate but memory stays bounded
+# Each chunk becomes a DataProfile that is merged into the running one, and
+# profiles of several files merge the same way. The static HTML report is
+# rendered from the aggregates alone.
+
+import argparse
+import html
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from housing_data import CACHE_DIR, DATA_FILE, SCHEMA, apply_schema
+from market_charts import CHART_LAYOUT
+from pipeline import TARGET, features_stage
+
+REPORTS_DIR = CACHE_DIR / "reports"
+CHUNK_ROWS = 250_000
+SAMPLE_ROWS = 100_000
+EXACT_VALUES = 100_000
+EXACT_HASHES = 1_000_000
+HASH_SKETCH = 65_536
+IQR_K = 1.5
+HIST_BINS = 30
+PRICE_BINS = 50
+SCATTER_POINTS = 3000
+PRICE_RANGES = [0, 100, 200, 300, 400, 500]
+
+NUMERIC_COLUMNS = [c for c, spec in SCHEMA.items() if spec['dtype'] not in ('category', 'bool') and c != 'ID'] + [
+    'Price_per_BHK', 'Area_per_BHK', 'Amenity_Count', 'Total_Nearby_Facilities']
+CORRELATION_COLUMNS = ['Price_in_Lakhs', 'Size_in_SqFt', 'BHK', 'Price_per_SqFt', 'Age_of_Property', 'Floor_No',
+                       'Total_Floors', 'Nearby_Schools', 'Nearby_Hospitals', 'Price_per_BHK', 'Area_per_BHK',
+                       'Amenity_Count']
+CATEGORY_COLUMNS = ['Property_Type', 'Furnished_Status', 'Security', 'Parking_Space', 'Availability_Status',
+                    'Age_Category', 'Floor_Position', 'Public_Transport_Accessibility', 'Facing', 'Owner_Type',
+                    'State', 'City']
+KEY_FEATURES = ['Size_in_SqFt', 'BHK', 'Age_of_Property', 'Floor_No', 'Nearby_Schools', 'Nearby_Hospitals']
+BOX_COLUMNS = ['Property_Type', 'Furnished_Status', 'Security', 'Parking_Space', 'Floor_Position', 'Age_Category']
+SCATTER_COLUMNS = ['Size_in_SqFt', 'BHK', 'Age_of_Property', 'Area_per_BHK']
+
+
+# ---------- Mergeable aggregates ----------
+class Moments:
+    """Count, mean, central moment sums (M2-M4), min and max per column; NaNs are skipped."""
+
+    def __init__(self, columns):
+        k = len(columns)
+        self.columns = list(columns)
+        self.n = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.m3 = np.zeros(k)
+        self.m4 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    @classmethod
+    def of(cls, columns, values):
+        moments = cls(columns)
+        valid = ~np.isnan(values)
+        n = valid.sum(axis=0).astype(np.float64)
+        mean = np.divide(np.where(valid, values, 0).sum(axis=0), n, out=np.zeros(len(n)), where=n > 0)
+        d = np.where(valid, values - mean, 0)
+        d2 = d * d
+        moments.n, moments.mean = n, mean
+        moments.m2, moments.m3, moments.m4 = d2.sum(axis=0), (d2 * d).sum(axis=0), (d2 * d2).sum(axis=0)
+        moments.min = np.where(valid, values, np.inf).min(axis=0)
+        moments.max = np.where(valid, values, -np.inf).max(axis=0)
+        return moments
+
+    def merge(self, other):
+        na, nb = self.n, other.n
+        n = na + nb
+        safe = np.where(n > 0, n, 1)
+        delta = other.mean - self.mean
+        d_n = delta / safe
+        self.m4 = (self.m4 + other.m4 + delta * d_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+                   + 6 * d_n ** 2 * (na * na * other.m2 + nb * nb * self.m2) + 4 * d_n * (na * other.m3 - nb * self.m3))
+        self.m3 = (self.m3 + other.m3 + delta * d_n ** 2 * na * nb * (na - nb)
+                   + 3 * d_n * (na * other.m2 - nb * self.m2))
+        self.m2 = self.m2 + other.m2 + delta * d_n * na * nb
+        self.mean = self.mean + d_n * nb
+        self.n = n
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    def table(self):
+        """describe()-style statistics; skewness and kurtosis use the same bias corrections as pandas."""
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = self.m2 / (n - 1)
+            g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+            g2 = n * self.m4 / self.m2 ** 2 - 3
+            skew = g1 * np.sqrt(n * (n - 1)) / (n - 2)
+            kurt = ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+        return pd.DataFrame({'count': n, 'mean': self.mean, 'std': np.sqrt(var), 'min': self.min, 'max': self.max,
+                             'skew': skew, 'kurtosis': kurt}, index=self.columns)
+
+
+class CoMoments:
+    """Mean vector and co-moment matrix over rows where every column is present."""
+
+    def __init__(self, columns):
+        k = len(columns)
+        self.columns = list(columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.c = np.zeros((k, k))
+
+    @classmethod
+    def of(cls, columns, values):
+        comoments = cls(columns)
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values):
+            comoments.n = len(values)
+            comoments.mean = values.mean(axis=0)
+            centered = values - comoments.mean
+            comoments.c = centered.T @ centered
+        return comoments
+
+    def merge(self, other):
+        n = self.n + other.n
+        if other.n:
+            delta = other.mean - self.mean
+            self.c = self.c + other.c + np.outer(delta, delta) * self.n * other.n / n
+            self.mean = self.mean + delta * other.n / n
+            self.n = n
+        return self
+
+    def correlation(self):
+        scale = np.sqrt(np.diag(self.c))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.c / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def trend(self, x, y):
+        """Least-squares ``(slope, intercept)`` of y on x, identical to np.polyfit(x, y, 1)."""
+        i, j = self.columns.index(x), self.columns.index(y)
+        slope = self.c[i, j] / self.c[i, i] if self.c[i, i] else 0.0
+        return slope, self.mean[j] - slope * self.mean[i]
+
+
+def _labels(values):
+    # Yes/No flags are typed as booleans; show them the way the CSV spells them
+    if values.dtype == bool:
+        return values.map({True: 'Yes', False: 'No'})
+    return values.astype(str)
+
+
+def _merge_counts(a, b):
+    return b if a is None else a.add(b, fill_value=0)
+
+
+def _bottom_k(frames, k):
+    # Rows with the k smallest random priorities: a uniform sample that merges exactly
+    sample = pd.concat([f for f in frames if f is not None], ignore_index=True)
+    return sample.nsmallest(k, '_priority') if len(sample) > k else sample
+
+
+class DataProfile:
+    """All aggregates of one or more chunks; ``merge`` combines two profiles."""
+
+    def __init__(self, sample_rows=SAMPLE_ROWS, exact_values=EXACT_VALUES):
+        self.sample_rows = sample_rows
+        self.exact_values = exact_values
+        self.rows_read = 0
+        self.rows = 0
+        self.chunks = 0
+        self.columns = None
+        self.missing = None
+        self.violations = {}
+        self.moments = Moments(NUMERIC_COLUMNS)
+        self.comoments = CoMoments(CORRELATION_COLUMNS)
+        self.value_counts = {col: None for col in NUMERIC_COLUMNS}
+        self.categories = {col: None for col in CATEGORY_COLUMNS}
+        self.sample = None
+        # Sorted distinct row hashes: all of them while exact, else the HASH_SKETCH smallest
+        self.row_hashes = np.empty(0, dtype=np.uint64)
+        self.hashes_exact = True
+
+    @classmethod
+    def of_chunk(cls, raw, rng, sample_rows=SAMPLE_ROWS, exact_values=EXACT_VALUES):
+        profile = cls(sample_rows, exact_values)
+        profile.rows_read, profile.chunks = len(raw), 1
+        profile.columns = list(raw.columns)
+        profile.missing = raw.isna().sum()
+        profile._add_hashes(np.unique(pd.util.hash_pandas_object(raw.drop(columns='ID', errors='ignore'),
+                                                                 index=False).to_numpy()), True)
+        typed, issues = apply_schema(raw)
+        profile.violations = {issue['column']: issue['rows'] for issue in issues}
+        df = features_stage({}, typed)
+        profile.rows = len(df)
+
+        values = df[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+        profile.moments = Moments.of(NUMERIC_COLUMNS, values)
+        profile.comoments = CoMoments.of(CORRELATION_COLUMNS, df[CORRELATION_COLUMNS].to_numpy(dtype=np.float64))
+        for col in NUMERIC_COLUMNS:
+            counts = df[col].value_counts()
+            profile.value_counts[col] = counts if len(counts) <= exact_values else False
+        target = df[TARGET].astype(np.float64)
+        for col in CATEGORY_COLUMNS:
+            grouped = target.groupby(_labels(df[col]), observed=True)
+            profile.categories[col] = pd.DataFrame({'count': grouped.size(), 'price_sum': grouped.sum()})
+        sample = df[list(dict.fromkeys(NUMERIC_COLUMNS + BOX_COLUMNS))].copy()
+        for col in BOX_COLUMNS:
+            sample[col] = _labels(sample[col])
+        sample['_priority'] = rng.random(len(sample))
+        profile.sample = _bottom_k([sample], sample_rows)
+        return profile
+
+    def merge(self, other):
+        self.rows_read += other.rows_read
+        self.rows += other.rows
+        self.chunks += other.chunks
+        self.columns = self.columns or other.columns
+        self.missing = _merge_counts(self.missing, other.missing)
+        for col, rows in other.violations.items():
+            self.violations[col] = self.violations.get(col, 0) + rows
+        self.moments.merge(other.moments)
+        self.comoments.merge(other.comoments)
+        for col in NUMERIC_COLUMNS:
+            mine, theirs = self.value_counts[col], other.value_counts[col]
+            if mine is False or theirs is False:
+                merged = False
+            else:
+                merged = _merge_counts(mine, theirs)
+                if merged is not None and len(merged) > self.exact_values:
+                    merged = False
+            self.value_counts[col] = merged
+        for col in CATEGORY_COLUMNS:
+            self.categories[col] = _merge_counts(self.categories[col], other.categories[col])
+        self.sample = _bottom_k([self.sample, other.sample], self.sample_rows)
+        self._add_hashes(other.row_hashes, other.hashes_exact)
+        return self
+
+    def _add_hashes(self, hashes, exact):
+        # The k smallest of a union are the k smallest of the parts' k smallest, so
+        # sketches merge exactly like the exact sets they replace
+        merged = np.union1d(self.row_hashes, hashes)
+        self.hashes_exact = self.hashes_exact and exact and len(merged) <= EXACT_HASHES
+        self.row_hashes = merged if self.hashes_exact else merged[:HASH_SKETCH]
+
+    # ---------- Derived statistics ----------
+    def duplicate_rows(self):
+        """Rows repeating an earlier row (ID ignored); estimated once ``hashes_exact`` is False."""
+        if self.hashes_exact:
+            return int(self.rows_read - len(self.row_hashes))
+        # k-minimum-values: the k-th smallest of n uniform hashes sits near k / n of the range
+        distinct = (len(self.row_hashes) - 1) * 2.0 ** 64 / (float(self.row_hashes[-1]) + 1)
+        return max(0, int(round(self.rows_read - distinct)))
+
+    def exact(self, col):
+        counts = self.value_counts[col]
+        return counts is not None and counts is not False
+
+    def quantiles(self, col, qs):
+        """Linear-interpolated quantiles (as pandas computes them); exact while value counts are kept."""
+        if self.exact(col):
+            counts = self.value_counts[col].sort_index()
+            values, cum = counts.index.to_numpy(dtype=np.float64), np.cumsum(counts.to_numpy())
+            pos = np.asarray(qs, dtype=np.float64) * (cum[-1] - 1)
+            lo = values[np.searchsorted(cum, np.floor(pos), side='right')]
+            hi = values[np.searchsorted(cum, np.ceil(pos), side='right')]
+            return lo + (hi - lo) * (pos - np.floor(pos))
+        return np.nanquantile(self.sample[col].to_numpy(dtype=np.float64), qs)
+
+    def histogram(self, col, bins):
+        """Bin counts over the column's full range; scaled from the sample when counts were dropped."""
+        i = NUMERIC_COLUMNS.index(col)
+        edges = np.linspace(self.moments.min[i], self.moments.max[i], bins + 1)
+        if self.exact(col):
+            counts = self.value_counts[col]
+            hist, _ = np.histogram(counts.index.to_numpy(dtype=np.float64), edges, weights=counts.to_numpy())
+        else:
+            values = self.sample[col].dropna().to_numpy(dtype=np.float64)
+            hist, _ = np.histogram(values, edges)
+            hist = hist * self.moments.n[i] / max(len(values), 1)
+        return hist, edges
+
+    def describe(self):
+        table = self.moments.table()
+        quartiles = np.array([self.quantiles(col, [0.25, 0.5, 0.75]) for col in NUMERIC_COLUMNS])
+        table.insert(3, '25%', quartiles[:, 0])
+        table.insert(4, '50%', quartiles[:, 1])
+        table.insert(5, '75%', quartiles[:, 2])
+        return table
+
+    def outliers(self, k=IQR_K):
+        rows = []
+        for col in NUMERIC_COLUMNS:
+            q1, q3 = self.quantiles(col, [0.25, 0.75])
+            lower, upper = q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+            if self.exact(col):
+                counts = self.value_counts[col]
+                values = counts.index.to_numpy(dtype=np.float64)
+                count = int(counts.to_numpy()[(values < lower) | (values > upper)].sum())
+            else:
+                values = self.sample[col].dropna().to_numpy(dtype=np.float64)
+                count = int(round(((values < lower) | (values > upper)).mean() * self.moments.n[NUMERIC_COLUMNS.index(col)]))
+            rows.append({'Column': col, 'Outliers_Count': count,
+                         'Outliers_Percentage': f"{count / max(self.rows, 1) * 100:.2f}%",
+                         'Lower_Bound': lower, 'Upper_Bound': upper, 'Exact': self.exact(col)})
+        return pd.DataFrame(rows)
+
+    def category_table(self, col):
+        table = self.categories[col].copy()
+        table['avg_price'] = table['price_sum'] / table['count']
+        return table.drop(columns='price_sum').sort_values('count', ascending=False)
+
+
+def profile_csv(paths, chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS, exact_values=EXACT_VALUES, seed=42,
+                log=None):
+    """Profile one or more listings CSVs in a single chunked pass each."""
+    profile = DataProfile(sample_rows, exact_values)
+    rng = np.random.default_rng(seed)
+    read_dtypes = {col: 'category' for col, spec in SCHEMA.items()
+                   if spec['dtype'] == 'category' and 'allowed' not in spec}
+    for path in paths:
+        for raw in pd.read_csv(path, dtype=read_dtypes, chunksize=chunk_rows):
+            profile.merge(DataProfile.of_chunk(raw, rng, sample_rows, exact_values))
+            if log:
+                log(f"  • {profile.rows_read:,} rows profiled")
+    return profile
+
+
+# ---------- HTML report ----------
+_STYLE = """
+body { font-family: Inter, sans-serif; margin: 0 auto; max-width: 1200px; padding: 20px 40px; color: #1a1a1a; }
+h1 { color: #003366; border-bottom: 4px solid #FF6600; padding-bottom: 10px; }
+h2 { color: #003366; margin-top: 40px; }
+table.report { border-collapse: collapse; font-size: 13px; margin: 10px 0 20px 0; }
+table.report th, table.report td { border: 1px solid #dde3ea; padding: 4px 10px; text-align: right; }
+table.report th { background: #E6F0FA; color: #003366; }
+.metrics { display: flex; flex-wrap: wrap; gap: 16px; }
+.metric { background: #F5F8FC; border-left: 6px solid #003366; border-radius: 8px; padding: 12px 20px; }
+.metric b { display: block; font-size: 22px; color: #003366; }
+.grid { display: grid; grid-template-columns: 1fr 1fr; gap: 10px; }
+.note { color: #667; font-size: 13px; }
+"""
+
+
+def _table(df, index=True, digits=2):
+    return df.to_html(classes='report', index=index, border=0, na_rep='–',
+                      float_format=lambda v: f"{v:,.{digits}f}")
+
+
+class _Figures:
+    # plotly.js is embedded (or linked) once, with the first figure
+    def __init__(self, include_plotlyjs):
+        self.include = include_plotlyjs
+
+    def __call__(self, fig, height=420):
+        fig.update_layout(**CHART_LAYOUT, height=height, margin=dict(l=40, r=20, t=60, b=40))
+        out = fig.to_html(full_html=False, include_plotlyjs=self.include)
+        self.include = False
+        return out
+
+
+def _metric(label, value):
+    return f"<div class='metric'>{html.escape(label)}<b>{html.escape(value)}</b></div>"
+
+
+def render_html(profile, title="Real Estate Data Quality & EDA Report", sources=(), seconds=None, offline=False):
+    figure = _Figures(True if offline else 'cdn')
+    parts = []
+    add = parts.append
+    stats = profile.describe()
+
+    # Overview and data quality
+    add(f"<h1>{html.escape(title)}</h1>")
+    add(f"<p class='note'>{html.escape(', '.join(str(s) for s in sources))} — generated "
+        f"{time.strftime('%Y-%m-%d %H:%M')}" + (f" in {seconds:.1f}s" if seconds is not None else "")
+        + f" from {profile.chunks} chunk(s) in a single pass.</p>")
+    add("<div class='metrics'>" + "".join([
+        _metric("Rows read", f"{profile.rows_read:,}"),
+        _metric("Valid rows", f"{profile.rows:,}"),
+        _metric("Schema violations", f"{profile.rows_read - profile.rows:,}"),
+        _metric("Duplicate rows (ignoring ID)" if profile.hashes_exact else "Duplicate rows (ignoring ID, estimated)",
+                f"{profile.duplicate_rows():,}" if profile.hashes_exact else f"≈{profile.duplicate_rows():,}"),
+        _metric("Columns", f"{len(profile.columns or [])}"),
+    ]) + "</div>")
+    add("<h2>🔍 Data Quality</h2>")
+    quality = pd.DataFrame({'Missing': profile.missing}).reindex(profile.columns or [])
+    quality['Missing_%'] = quality['Missing'] / max(profile.rows_read, 1) * 100
+    quality['Schema_Violations'] = [profile.violations.get(c, 0) for c in quality.index]
+    quality['Rule'] = [', '.join(f"{k}={v}" for k, v in SCHEMA.get(c, {}).items()) for c in quality.index]
+    add(_table(quality))
+    add("<p class='note'>Statistics below cover valid rows only; rows violating the schema are counted above.</p>")
+
+    # Target variable
+    i = NUMERIC_COLUMNS.index(TARGET)
+    add(f"<h2>💰 Target Variable — {TARGET}</h2>")
+    add("<div class='metrics'>" + "".join(_metric(label, f"₹{stats.loc[TARGET, key]:,.2f} Lakhs") for label, key in (
+        ("Mean", 'mean'), ("Median", '50%'), ("Std Dev", 'std'), ("Min", 'min'), ("Max", 'max'))) + "</div>")
+    hist, edges = profile.histogram(TARGET, PRICE_BINS)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=hist, width=np.diff(edges), marker_color='#003366'))
+    for key, color in (('mean', '#FF6600'), ('50%', '#00CC66')):
+        fig.add_vline(x=stats.loc[TARGET, key], line_dash='dash', line_color=color,
+                      annotation_text=f"{'Mean' if key == 'mean' else 'Median'}: {stats.loc[TARGET, key]:.2f}")
+    fig.update_layout(title='Price Distribution', xaxis_title='Price (in Lakhs)', yaxis_title='Frequency')
+    add(figure(fig))
+    if profile.exact(TARGET):
+        counts = profile.value_counts[TARGET]
+        ranges = counts.groupby(pd.cut(counts.index.to_numpy(dtype=np.float64), PRICE_RANGES), observed=False).sum()
+        ranges = pd.DataFrame({'Properties': ranges.astype(int),
+                               'Share_%': ranges / max(profile.moments.n[i], 1) * 100})
+        ranges.index = [f"{int(iv.left)}-{int(iv.right)}" for iv in ranges.index]
+        add(_table(ranges))
+
+    # Numeric features
+    add("<h2>📊 Numerical Features</h2>")
+    add(_table(stats))
+    add("<div class='grid'>")
+    for col in KEY_FEATURES:
+        hist, edges = profile.histogram(col, HIST_BINS)
+        fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=hist, width=np.diff(edges), marker_color='#008080'))
+        fig.add_vline(x=stats.loc[col, 'mean'], line_dash='dash', line_color='#FF6600',
+                      annotation_text=f"Mean: {stats.loc[col, 'mean']:.1f}")
+        fig.update_layout(title=f'Distribution of {col}', xaxis_title=col, yaxis_title='Frequency')
+        add(figure(fig, 340))
+    add("</div>")
+
+    add("<h2>🚩 Outliers (IQR method)</h2>")
+    add(_table(profile.outliers(), index=False))
+    add(f"<p class='note'>Fences are Q1 − {IQR_K}·IQR and Q3 + {IQR_K}·IQR. Columns marked Exact=False had more than "
+        f"{profile.exact_values:,} distinct values; their quartiles and counts come from a "
+        f"{len(profile.sample):,}-row random sample.</p>")
+
+    # Categorical features and geography
+    add("<h2>🏷️ Categorical Features</h2>")
+    add("<div class='grid'>")
+    for col in [c for c in CATEGORY_COLUMNS if c not in ('State', 'City')]:
+        table = profile.category_table(col)
+        fig = go.Figure(go.Bar(x=table.index, y=table['count'], marker_color='#FF7F50', text=table['count'],
+                               textposition='outside'))
+        fig.update_layout(title=f'Distribution of {col}', xaxis_title=col, yaxis_title='Count')
+        add(figure(fig, 340))
+    add("</div>")
+    add("<h2>🗺️ Geography</h2>")
+    add("<div class='grid'>")
+    for col in ('State', 'City'):
+        table = profile.category_table(col)
+        for metric, label, color in (('count', 'Property Count', '#4682B4'), ('avg_price', 'Average Price', '#FA8072')):
+            top = table.sort_values(metric, ascending=False).head(10)[::-1]
+            fig = go.Figure(go.Bar(x=top[metric], y=top.index, orientation='h', marker_color=color))
+            fig.update_layout(title=f'Top 10 {col}s by {label}')
+            add(figure(fig, 380))
+    add("</div>")
+
+    # Relationships
+    add("<h2>🔗 Correlations</h2>")
+    corr = profile.comoments.correlation()
+    fig = go.Figure(go.Heatmap(z=corr.to_numpy(), x=corr.columns, y=corr.index, zmin=-1, zmax=1,
+                               colorscale='RdBu_r', text=np.round(corr.to_numpy(), 2), texttemplate='%{text}'))
+    fig.update_layout(title='Correlation Matrix - Key Features')
+    add(figure(fig, 650))
+    top = corr[TARGET].drop(TARGET).sort_values(ascending=False).rename('Correlation with price').to_frame()
+    add(_table(top, digits=4))
+
+    add("<h2>📈 Key Features vs Price</h2>")
+    add("<div class='grid'>")
+    points = profile.sample.head(SCATTER_POINTS)
+    for col in SCATTER_COLUMNS:
+        slope, intercept = profile.comoments.trend(col, TARGET)
+        j = NUMERIC_COLUMNS.index(col)
+        x_line = np.array([profile.moments.min[j], profile.moments.max[j]])
+        fig = go.Figure([
+            go.Scattergl(x=points[col], y=points[TARGET], mode='markers', name='Sample',
+                         marker=dict(size=4, opacity=0.3, color='#0000FF')),
+            go.Scatter(x=x_line, y=slope * x_line + intercept, mode='lines', name='Trend Line',
+                       line=dict(color='red', width=2)),
+        ])
+        fig.update_layout(title=f'{col} vs Price', xaxis_title=col, yaxis_title='Price (in Lakhs)')
+        add(figure(fig, 380))
+    add("</div>")
+    add(f"<p class='note'>Points are a random sample of {len(points):,} rows; trend lines are fitted on all "
+        f"{profile.comoments.n:,} complete rows.</p>")
+
+    add("<h2>📦 Price by Category</h2>")
+    add("<div class='grid'>")
+    for col in BOX_COLUMNS:
+        groups = profile.sample.groupby(col, observed=True)[TARGET]
+        q = groups.quantile([0.25, 0.5, 0.75]).unstack()
+        lo, hi = groups.min(), groups.max()
+        iqr = q[0.75] - q[0.25]
+        fig = go.Figure(go.Box(x=list(q.index), q1=q[0.25], median=q[0.5], q3=q[0.75],
+                               lowerfence=np.maximum(lo, q[0.25] - IQR_K * iqr),
+                               upperfence=np.minimum(hi, q[0.75] + IQR_K * iqr), marker_color='#003366'))
+        fig.update_layout(title=f'Price by {col}', xaxis_title=col, yaxis_title='Price (in Lakhs)')
+        add(figure(fig, 380))
+    add("</div>")
+    add("<h2>💵 Average Price by Category</h2>")
+    add("<div class='grid'>")
+    for col in BOX_COLUMNS:
+        table = profile.category_table(col).sort_values('avg_price', ascending=False)
+        add(f"<div><b>{html.escape(col)}</b>{_table(table)}</div>")
+    add("</div>")
+
+    return ("<!DOCTYPE html><html><head><meta charset='utf-8'>"
+            f"<title>{html.escape(title)}</title><style>{_STYLE}</style></head><body>"
+            + "\n".join(parts) + "</body></html>")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile listings CSVs in one chunked pass and write an HTML report")
+    parser.add_argument("paths", nargs="*", default=[str(DATA_FILE)], help="Listings CSV(s) (default: the dataset)")
+    parser.add_argument("--out", default=str(REPORTS_DIR / "eda_report.html"))
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--sample-rows", type=int, default=SAMPLE_ROWS, help="Rows kept for box and scatter plots")
+    parser.add_argument("--exact-values", type=int, default=EXACT_VALUES,
+                        help="Distinct values per column kept for exact quantiles")
+    parser.add_argument("--offline", action="store_true", help="Embed plotly.js instead of loading it from a CDN")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("SINGLE-PASS EDA REPORT")
+    print("=" * 80)
+    start = time.perf_counter()
+    profile = profile_csv(args.paths, args.chunk_rows, args.sample_rows, args.exact_values, log=print)
+    seconds = time.perf_counter() - start
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(render_html(profile, sources=[Path(p).name for p in args.paths], seconds=seconds,
+                               offline=args.offline), encoding='utf-8')
+    print(f"\n✓ {profile.rows_read:,} rows ({profile.rows:,} valid) profiled in {seconds:.2f}s")
+    print(f"💾 Report written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Multi-model ensembles for the AI-Based Real Estate Valuation System
+# An ensemble is a named set of registered models with blend weights, stored in
+# the "ensembles" section of models/registry.json. Every request is scored by all
+# members at once on a small thread pool: sklearn tree predictors, XGBoost and
+# numpy release the GIL in their inner loops, so on a multi-core host the wall time
+# approaches the slowest member rather than the sum. On a single core (or with one
+# member) members run inline, since threads would only add overhead.
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from features import to_feature_frame
+from model_registry import REGISTRY_FILE, load_registered_model, load_registry, resolve, save_registry
+
+ENSEMBLE_ENV = "VALUATION_ENSEMBLE"
+DEFAULT_ENSEMBLE = "default"
+
+
+# ---------- Manifest ----------
+def ensemble_spec(name=None, registry_path=REGISTRY_FILE):
+    """``{'members': {model: weight}}`` for ensemble ``name`` (default: "default"), or None."""
+    return load_registry(registry_path).get('ensembles', {}).get(name or DEFAULT_ENSEMBLE)
+
+
+def set_ensemble(name, members, registry_path=REGISTRY_FILE):
+    """Record ensemble ``name`` as ``{model name or alias: weight}``; weights are normalised when blending."""
+    registry = load_registry(registry_path)
+    unknown = [m for m in members if resolve(m, registry_path)[1] is None]
+    if unknown:
+        raise KeyError(f"Unknown models: {unknown}")
+    if not members or any(w < 0 for w in members.values()) or not sum(members.values()):
+        raise ValueError("An ensemble needs at least one member and positive total weight")
+    registry.setdefault('ensembles', {})[name] = {'members': {m: float(w) for m, w in members.items()}}
+    save_registry(registry, registry_path)
+    return registry['ensembles'][name]
+
+
+def remove_ensemble(name, registry_path=REGISTRY_FILE):
+    registry = load_registry(registry_path)
+    if registry.get('ensembles', {}).pop(name, None) is None:
+        raise KeyError(f"Unknown ensemble '{name}'")
+    save_registry(registry, registry_path)
+
+
+# ---------- Serving ----------
+class Ensemble:
+    """Scores raw input rows with every member concurrently and blends the estimates."""
+
+    def __init__(self, members, max_workers=None):
+        # members: list of (name, metadata dict, weight)
+        self.members = list(members)
+        total = sum(weight for _, _, weight in self.members)
+        self.weights = {name: weight / total for name, _, weight in self.members}
+        workers = min(len(self.members), max_workers or os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ensemble") if workers > 1 else None
+
+    @property
+    def concurrent(self):
+        return self._pool is not None
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.members]
+
+    @staticmethod
+    def _score(meta, rows):
+        start = time.perf_counter()
+        X = to_feature_frame(rows, meta.get('feature_names') or list(rows.columns))
+        prediction = np.asarray(meta['model'].predict(X), dtype=np.float64)
+        return prediction, (time.perf_counter() - start) * 1000
+
+    def predict(self, rows):
+        """Return ``(blend, estimates, member_ms, wall_ms)``.
+
+        ``estimates`` maps member name to its predictions for ``rows`` and
+        ``member_ms`` to the time that member took (feature frame plus predict).
+        """
+        start = time.perf_counter()
+        if self._pool is None:
+            outputs = [self._score(meta, rows) for _, meta, _ in self.members]
+        else:
+            futures = [self._pool.submit(self._score, meta, rows) for _, meta, _ in self.members]
+            outputs = [future.result() for future in futures]
+        estimates = {name: out[0] for name, out in zip(self.names, outputs)}
+        member_ms = {name: out[1] for name, out in zip(self.names, outputs)}
+        blend = sum(self.weights[name] * estimates[name] for name in self.names)
+        return blend, estimates, member_ms, (time.perf_counter() - start) * 1000
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+def load_ensemble(spec, registry_path=REGISTRY_FILE, loaded=None, max_workers=None):
+    """Load every member of ``spec``; ``loaded`` maps registry names to metadata already in memory."""
+    loaded = loaded or {}
+    members = []
+    for member, weight in spec['members'].items():
+        name, _ = resolve(member, registry_path)
+        meta = loaded.get(name) or load_registered_model(member, registry_path)
+        if meta is None:
+            raise KeyError(f"Ensemble member '{member}' is not registered")
+        members.append((name, meta, weight))
+    return Ensemble(members, max_workers)
+
+
+# ---------- CLI ----------
+def _parse_members(items):
+    members = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        members[name] = float(weight) if weight else 1.0
+    return members
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage and benchmark model ensembles")
+    parser.add_argument("--registry", default=str(REGISTRY_FILE))
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_set = sub.add_parser("set", help="Define an ensemble, e.g. set default rf_v1_mmap=2 xgb_v1=1")
+    p_set.add_argument("name")
+    p_set.add_argument("members", nargs="+", metavar="MODEL[=WEIGHT]")
+    p_show = sub.add_parser("show", help="Show an ensemble")
+    p_show.add_argument("name", nargs="?", default=None)
+    p_rm = sub.add_parser("remove", help="Remove an ensemble")
+    p_rm.add_argument("name")
+    p_bench = sub.add_parser("bench", help="Compare concurrent and sequential scoring latency")
+    p_bench.add_argument("name", nargs="?", default=None)
+    p_bench.add_argument("--X", required=True, help="Feature CSV to score")
+    p_bench.add_argument("--rows", type=int, default=1, help="Rows per request")
+    p_bench.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    registry_path = Path(args.registry)
+
+    if args.command == "set":
+        print(json.dumps({args.name: set_ensemble(args.name, _parse_members(args.members), registry_path)}, indent=2))
+    elif args.command == "show":
+        spec = ensemble_spec(args.name, registry_path)
+        if spec is None:
+            parser.error(f"No ensemble named '{args.name or DEFAULT_ENSEMBLE}'")
+        print(json.dumps(spec, indent=2))
+    elif args.command == "remove":
+        remove_ensemble(args.name, registry_path)
+    elif args.command == "bench":
+        spec = ensemble_spec(args.name, registry_path)
+        if spec is None:
+            parser.error(f"No ensemble named '{args.name or DEFAULT_ENSEMBLE}'")
+        rows = pd.read_csv(args.X).head(args.rows)
+        ensemble = load_ensemble(spec, registry_path, max_workers=len(spec['members']))
+        ensemble.predict(rows)
+        walls, members = [], {name: [] for name in ensemble.names}
+        for _ in range(args.repeat):
+            _, _, member_ms, wall_ms = ensemble.predict(rows)
+            walls.append(wall_ms)
+            for name, ms in member_ms.items():
+                members[name].append(ms)
+        print("=" * 80)
+        print(f"ENSEMBLE LATENCY - {len(ensemble.members)} models, {len(rows)} row(s), {os.cpu_count()} CPU(s)")
+        print("=" * 80)
+        for name in ensemble.names:
+            print(f"  • {name:<24} weight {ensemble.weights[name]:.2f}  {np.median(members[name]):8.2f} ms")
+        print(f"\n⏱️ Concurrent wall time: {np.median(walls):.2f} ms")
+        print(f"   Slowest member: {max(np.median(v) for v in members.values()):.2f} ms • "
+              f"sum of members: {sum(np.median(v) for v in members.values()):.2f} ms")
+        ensemble.close()
+
+
+if __name__ == "__main__":
+    main()
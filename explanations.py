@@ -0,0 +1,217 @@
+# Per-prediction explanations for the AI-Based Real Estate Valuation System
+# Exact TreeSHAP attributions: how much each feature moved this property's price
+# away from the model's average prediction.
+#   - XGBoost models use the library's native TreeSHAP (pred_contribs)
+#   - every other tree ensemble is packed (forest_pack) and explained with a
+#     path-based TreeSHAP: each root-to-leaf path is reduced once to per-feature
+#     bounds and cover fractions, and the Shapley weights are evaluated with a
+#     small Gauss-Legendre quadrature, vectorized over all paths of all trees
+# Results are cached by a hash of the feature vector, so re-explaining the same
+# input (reruns, history, duplicate rows in a batch) is a dictionary lookup.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from forest_pack import PackedForest, can_pack, pack_model
+
+EXPLANATION_CACHE_SIZE = 4096
+PATH_CHUNK = 16384
+
+
+def _threshold_float32(threshold):
+    # Largest float32 <= threshold, so `x <= t` keeps its meaning for float32 inputs
+    t32 = threshold.astype(np.float32)
+    return np.where(t32 > threshold, np.nextafter(t32, np.float32(-np.inf)), t32)
+
+
+def extract_paths(packed):
+    """Reduce every root-to-leaf path of ``packed`` to per-feature constraints.
+
+    One row per leaf: a sample reaches the leaf iff ``lower < x_j <= upper`` for
+    every feature j (or x_j is NaN and ``missing_ok``). ``zero_fraction`` is the
+    product of child/parent cover ratios of the feature's splits on the path and
+    ``value`` is the leaf value scaled by its tree weight. Features a path never
+    splits on keep fractions of 1, which leaves their Shapley value at zero.
+    """
+    n_features = packed.n_features
+    children_left = np.asarray(packed.children_left)
+    children_right = np.asarray(packed.children_right)
+    missing = np.asarray(packed.missing)
+    feature = np.asarray(packed.feature)
+    threshold = _threshold_float32(np.asarray(packed.threshold))
+    cover = np.asarray(packed.cover, dtype=np.float64)
+    roots = np.asarray(packed.roots, dtype=np.int64)
+
+    nodes = roots
+    tree = np.arange(len(roots))
+    lower = np.full((len(nodes), n_features), -np.inf, dtype=np.float32)
+    upper = np.full((len(nodes), n_features), np.inf, dtype=np.float32)
+    missing_ok = np.ones((len(nodes), n_features), dtype=bool)
+    zero = np.ones((len(nodes), n_features))
+    leaves = []
+
+    # Breadth-first over all trees at once; one iteration per depth level
+    while len(nodes):
+        is_leaf = children_left[nodes] == nodes
+        leaves.append((nodes[is_leaf], tree[is_leaf], lower[is_leaf], upper[is_leaf],
+                       missing_ok[is_leaf], zero[is_leaf]))
+        split = ~is_leaf
+        nodes, tree = nodes[split], tree[split]
+        lower, upper, missing_ok, zero = lower[split], upper[split], missing_ok[split], zero[split]
+        rows = np.arange(len(nodes))
+        f = feature[nodes]
+        t = threshold[nodes]
+        parent_cover = np.where(cover[nodes] > 0, cover[nodes], 1.0)
+
+        left, right = children_left[nodes], children_right[nodes]
+        l_upper, r_lower = upper.copy(), lower.copy()
+        l_upper[rows, f] = np.minimum(upper[rows, f], t)
+        r_lower[rows, f] = np.maximum(lower[rows, f], t)
+        l_missing, r_missing = missing_ok.copy(), missing_ok.copy()
+        l_missing[rows, f] &= missing[nodes] == left
+        r_missing[rows, f] &= missing[nodes] == right
+        l_zero, r_zero = zero.copy(), zero.copy()
+        l_zero[rows, f] *= cover[left] / parent_cover
+        r_zero[rows, f] *= cover[right] / parent_cover
+
+        nodes = np.concatenate([left, right])
+        tree = np.concatenate([tree, tree])
+        lower = np.concatenate([lower, r_lower])
+        upper = np.concatenate([l_upper, upper])
+        missing_ok = np.concatenate([l_missing, r_missing])
+        zero = np.concatenate([l_zero, r_zero])
+
+    leaf, leaf_tree, lower, upper, missing_ok, zero = (np.concatenate(parts) for parts in zip(*leaves))
+    tree_weights = np.asarray(packed.tree_weights, dtype=np.float64)
+    return {
+        'lower': lower,
+        'upper': upper,
+        'missing_ok': missing_ok,
+        # Floored so a factor never hits exactly zero and the leave-one-out division stays finite
+        'zero_fraction': np.maximum(zero, 1e-30).astype(np.float32),
+        'value': np.asarray(packed.value, dtype=np.float64)[leaf] * tree_weights[leaf_tree],
+        'reach': cover[leaf] / np.where(cover[roots] > 0, cover[roots], 1.0)[leaf_tree],
+    }
+
+
+def _quadrature(n_features):
+    # Summing Shapley weights over coalition sizes equals integrating a degree
+    # n_features-1 polynomial over [0, 1]; Gauss-Legendre with this many nodes is exact
+    x, w = np.polynomial.legendre.leggauss((n_features + 1) // 2)
+    return ((x + 1) / 2).astype(np.float32), (w / 2).astype(np.float32)
+
+
+def path_shap(paths, x, u, w):
+    """SHAP values of a single float32 row ``x`` from precomputed ``paths``."""
+    phi = np.zeros(paths['lower'].shape[1])
+    nan = np.isnan(x)
+    for start in range(0, len(paths['value']), PATH_CHUNK):
+        end = start + PATH_CHUNK
+        one = (x > paths['lower'][start:end]) & (x <= paths['upper'][start:end])
+        if nan.any():
+            one |= nan & paths['missing_ok'][start:end]
+        one = one.astype(np.float32)
+        zero = paths['zero_fraction'][start:end]
+        # Feature j's factor at node u is zero_j * (1 - u) + one_j * u; the weight of
+        # j on a path is the integral of the product of every other feature's factor
+        others = np.zeros_like(zero)
+        for u_g, w_g in zip(u, w):
+            factor = zero * (1 - u_g)
+            factor += one * u_g
+            others += w_g * (factor.prod(axis=1, keepdims=True) / factor)
+        others *= one - zero
+        phi += others.T.astype(np.float64) @ paths['value'][start:end]
+    return phi
+
+
+def can_explain(model):
+    return can_pack(model)
+
+
+class TreeExplainer:
+    """TreeSHAP explainer for a loaded tree model with a feature-vector-hash cache."""
+
+    def __init__(self, model, feature_names=None, cache_size=EXPLANATION_CACHE_SIZE):
+        self.feature_names = list(feature_names) if feature_names is not None else (
+            getattr(model, 'feature_names', None) or list(getattr(model, 'feature_names_in_', [])) or None)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # One explainer is shared by every session through st.cache_resource
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._booster = None
+        if type(model).__name__ in ('XGBRegressor', 'Booster'):
+            self._booster = model.get_booster() if hasattr(model, 'get_booster') else model
+            self.n_features = self._booster.num_features()
+            # The bias column of pred_contribs is the same for every row
+            self._compute(np.full((1, self.n_features), np.nan, dtype=np.float32))
+            return
+        packed = pack_model(model, self.feature_names) if not isinstance(model, PackedForest) else model
+        self.n_features = packed.n_features
+        self._paths = extract_paths(packed)
+        self._u, self._w = _quadrature(self.n_features)
+        self.expected_value = float(self._paths['value'] @ self._paths['reach'] + packed.base_score)
+
+    def _as_matrix(self, X):
+        if hasattr(X, 'columns') and self.feature_names is not None:
+            X = X.reindex(columns=self.feature_names)
+        X = np.asarray(X, dtype=np.float32)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def _compute(self, X):
+        if self._booster is not None:
+            import xgboost as xgb
+            contribs = self._booster.predict(xgb.DMatrix(X, feature_names=self._booster.feature_names),
+                                             pred_contribs=True)
+            self.expected_value = float(contribs[0, -1])
+            return contribs[:, :-1].astype(np.float64)
+        return np.vstack([path_shap(self._paths, row, self._u, self._w) for row in X])
+
+    def shap_values(self, X):
+        """SHAP values, shape (n_rows, n_features); rows seen before come from the cache."""
+        X = self._as_matrix(X)
+        keys = [hashlib.sha1(row.tobytes()).hexdigest() for row in X]
+        result = np.empty((len(X), X.shape[1]))
+        todo = {}
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    result[i] = cached
+                    self.hits += 1
+                else:
+                    todo.setdefault(key, []).append(i)
+        if todo:
+            first = [rows[0] for rows in todo.values()]
+            values = self._compute(X[first])
+            with self._cache_lock:
+                self.misses += len(first)
+                for (key, rows), phi in zip(todo.items(), values):
+                    result[rows] = phi
+                    self._cache[key] = phi
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def explain(self, X):
+        """Contributions as a DataFrame with one column per feature (batch path)."""
+        return pd.DataFrame(self.shap_values(X), columns=self.feature_names)
+
+
+def explain_prediction(explainer, X_row):
+    """Single-row explanation sorted by impact, plus the time it took in ms."""
+    start = time.perf_counter()
+    phi = explainer.shap_values(X_row)[0]
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    values = explainer._as_matrix(X_row)[0]
+    names = explainer.feature_names or [f"f{i}" for i in range(len(phi))]
+    table = pd.DataFrame({'Feature': names, 'Value': values, 'Contribution_Lakhs': phi})
+    table = table.reindex(table['Contribution_Lakhs'].abs().sort_values(ascending=False).index)
+    return table.reset_index(drop=True), elapsed_ms
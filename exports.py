@@ -0,0 +1,98 @@
+# Streamed table exports for the AI-Based Real Estate Valuation System
+# Writes a DataFrame (prediction history, batch valuation results) as gzip CSV,
+# Parquet or Excel in row chunks into a spooled temporary file. Small exports stay
+# in memory and large ones spill to disk, so memory never grows to the size of the
+# file. lazy_export() wraps an export in a callable for st.download_button, so
+# nothing is serialized until someone actually clicks download.
+
+import gzip
+import importlib.util
+import tempfile
+from datetime import datetime
+
+EXPORT_CHUNK_ROWS = 50000
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+EXCEL_MAX_ROWS = 1048575
+
+# label -> (file extension, MIME type, optional module it needs)
+EXPORT_FORMATS = {
+    'CSV (gzip)': ('csv.gz', 'application/gzip', None),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', 'pyarrow'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsxwriter'),
+}
+
+
+def available_formats():
+    """Export formats whose optional dependency is installed."""
+    return [label for label, (_, _, module) in EXPORT_FORMATS.items()
+            if module is None or importlib.util.find_spec(module) is not None]
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+def _write_csv_gz(df, fileobj, chunk_rows):
+    with gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=6) as gz:
+        for start, chunk in _chunks(df, chunk_rows):
+            gz.write(chunk.to_csv(index=False, header=start == 0).encode('utf-8'))
+
+
+def _write_parquet(df, fileobj, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(fileobj, schema, compression='zstd') as writer:
+        for _, chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_excel(df, fileobj, chunk_rows):
+    import xlsxwriter
+
+    if len(df) > EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(df):,} rows exceed Excel's sheet limit; export as CSV or Parquet")
+
+    # constant_memory flushes each finished row instead of keeping the sheet in RAM;
+    # it needs strictly row-by-row writes, so rows go straight to the worksheet
+    workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'in_memory': False})
+    sheet = workbook.add_worksheet('Export')
+    sheet.write_row(0, 0, [str(c) for c in df.columns])
+    for start, chunk in _chunks(df, chunk_rows):
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for offset, row in enumerate(values.itertuples(index=False, name=None), start=start + 1):
+            sheet.write_row(offset, 0, row)
+    workbook.close()
+
+
+WRITERS = {'csv.gz': _write_csv_gz, 'parquet': _write_parquet, 'xlsx': _write_excel}
+
+
+def write_export(df, fmt, fileobj, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write ``df`` in format label ``fmt`` to a binary file object, ``chunk_rows`` at a time."""
+    extension = EXPORT_FORMATS[fmt][0]
+    WRITERS[extension](df, fileobj, chunk_rows)
+    return fileobj
+
+
+def export_file(df, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    """The export as a rewound spooled temp file (in memory until SPOOL_MAX_BYTES, then on disk)."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode='w+b')
+    write_export(df, fmt, spool, chunk_rows)
+    spool.seek(0)
+    return spool
+
+
+def lazy_export(get_df, fmt):
+    """Callable for st.download_button(data=...); ``get_df`` is only called on download."""
+    return lambda: export_file(get_df(), fmt)
+
+
+def export_file_name(prefix, fmt):
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[fmt][0]}"
+
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
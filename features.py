@@ -0,0 +1,42 @@
+# Feature assembly for the AI-Based Real Estate Valuation System
+# Turns raw app/batch input rows into the exact column layout a model was trained
+# on, so the single-prediction form, scenario sweeps and batch valuation all build
+# their feature matrices the same way.
+
+import pandas as pd
+
+# Amenity label shown in the app -> input column name
+AMENITY_COLUMNS = {
+    'Parking': 'Parking',
+    'Gym': 'Gym',
+    'Swimming Pool': 'SwimmingPool',
+    'Garden': 'Garden',
+    'Security': 'Security',
+    'Power Backup': 'PowerBackup',
+}
+PROPERTY_TYPE_PREFIX = 'PropType_'
+# Form field -> dataset column it stands for
+FEATURE_ALIASES = {'Area': 'Size_in_SqFt'}
+
+
+def canonical_columns(rows):
+    """Rename alias columns to dataset names unless the dataset column is already present."""
+    renames = {a: c for a, c in FEATURE_ALIASES.items() if a in rows.columns and c not in rows.columns}
+    return rows.rename(columns=renames) if renames else rows
+
+
+def to_feature_frame(rows, feature_names):
+    """Reorder ``rows`` to ``feature_names``; one-hot Property_Type and fill missing features with 0."""
+    X = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    aliases = {a: c for a, c in FEATURE_ALIASES.items()
+               if a in X.columns and c in feature_names and c not in X.columns}
+    if aliases or 'Property_Type' in X.columns:
+        X = X.copy()
+    for alias, column in aliases.items():
+        X[column] = X[alias]
+    if 'Property_Type' in X.columns:
+        property_type = X['Property_Type'].astype(str)
+        for feat in feature_names:
+            if feat.startswith(PROPERTY_TYPE_PREFIX):
+                X[feat] = (property_type == feat[len(PROPERTY_TYPE_PREFIX):]).astype(int)
+    return X.reindex(columns=feature_names, fill_value=0)
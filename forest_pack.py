@@ -0,0 +1,274 @@
+# Packed tree ensembles for the AI-Based Real Estate Valuation System
+# Flattens a fitted RandomForest / ExtraTrees / DecisionTree / GradientBoosting
+# regressor or an XGBoost regressor into a handful of contiguous node arrays.
+# Saved uncompressed as .npy files, the arrays can be opened with
+# np.load(mmap_mode='r'), so every worker process maps the same pages from the OS
+# page cache instead of unpickling a private copy of every tree.
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+PACK_FORMAT_VERSION = 1
+ARRAY_NAMES = ('children_left', 'children_right', 'missing', 'feature', 'threshold',
+               'value', 'cover', 'roots', 'tree_weights')
+PREDICT_CHUNK_ROWS = 8192
+
+
+class PackedForest:
+    """Tree ensemble stored as flat node arrays with a vectorized predictor.
+
+    Every tree's nodes live in one global index space. Leaves point to
+    themselves (with an infinite threshold), so traversal runs a fixed number
+    of steps for all trees and rows at once. The prediction is
+    ``base_score + sum(tree_weights[t] * leaf_value[t])``.
+    """
+
+    def __init__(self, arrays, n_features, max_depth, base_score=0.0,
+                 feature_names=None, source_type=None):
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.base_score = float(base_score)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.source_type = source_type
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.value)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def __repr__(self):
+        return (f"PackedForest(source={self.source_type}, trees={self.n_trees}, "
+                f"nodes={self.n_nodes}, max_depth={self.max_depth})")
+
+    # ---------- Inference ----------
+    def _as_matrix(self, X):
+        if hasattr(X, 'columns') and self.feature_names is not None:
+            X = X.reindex(columns=self.feature_names)
+        # Tree models compare float32 inputs against their thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, packed model expects {self.n_features}")
+        return X
+
+    def _apply_chunk(self, X):
+        n_rows = X.shape[0]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        rows = np.arange(n_rows)[:, None]
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            nodes = np.where(x <= self.threshold[nodes], self.children_left[nodes],
+                             np.where(np.isnan(x), self.missing[nodes], self.children_right[nodes]))
+        return nodes
+
+    def apply(self, X):
+        """Leaf node index of every row in every tree, shape (n_rows, n_trees)."""
+        X = self._as_matrix(X)
+        if len(X) <= PREDICT_CHUNK_ROWS:
+            return self._apply_chunk(X)
+        return np.vstack([self._apply_chunk(X[i:i + PREDICT_CHUNK_ROWS])
+                          for i in range(0, len(X), PREDICT_CHUNK_ROWS)])
+
+    def predict_trees(self, X):
+        """Raw (unweighted) output of every tree, shape (n_rows, n_trees)."""
+        return np.asarray(self.value)[self.apply(X)]
+
+    def predict(self, X):
+        return self.predict_trees(X) @ np.asarray(self.tree_weights, dtype=np.float64) + self.base_score
+
+    # ---------- Persistence ----------
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        info = {
+            'format_version': PACK_FORMAT_VERSION,
+            'n_features': self.n_features,
+            'max_depth': self.max_depth,
+            'base_score': self.base_score,
+            'feature_names': self.feature_names,
+            'source_type': self.source_type,
+            'n_trees': self.n_trees,
+            'n_nodes': self.n_nodes,
+        }
+        with open(directory / "pack.json", "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Open a saved pack; with ``mmap_mode='r'`` the arrays are shared read-only maps."""
+        directory = Path(directory)
+        with open(directory / "pack.json", encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get('format_version') != PACK_FORMAT_VERSION:
+            raise ValueError(f"Unsupported pack format: {info.get('format_version')}")
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+        return cls(arrays, info['n_features'], info['max_depth'], info['base_score'],
+                   info.get('feature_names'), info.get('source_type'))
+
+
+# ---------- Packing ----------
+def _concat_trees(trees, n_features, base_score, tree_weights, feature_names, source_type):
+    # trees: list of dicts of per-tree arrays with local child indices (-1 for leaves)
+    offsets = np.cumsum([0] + [len(t['value']) for t in trees])
+    arrays = {name: [] for name in ('children_left', 'children_right', 'missing',
+                                    'feature', 'threshold', 'value', 'cover')}
+    for tree, offset in zip(trees, offsets):
+        own = np.arange(len(tree['value']), dtype=np.int64) + offset
+        is_leaf = tree['children_left'] < 0
+        for name in ('children_left', 'children_right', 'missing'):
+            arrays[name].append(np.where(is_leaf, own, tree[name] + offset))
+        arrays['feature'].append(np.where(is_leaf, 0, tree['feature']))
+        arrays['threshold'].append(np.where(is_leaf, np.inf, tree['threshold']))
+        arrays['value'].append(tree['value'])
+        arrays['cover'].append(tree['cover'])
+    packed = {
+        'children_left': np.concatenate(arrays['children_left']).astype(np.int32),
+        'children_right': np.concatenate(arrays['children_right']).astype(np.int32),
+        'missing': np.concatenate(arrays['missing']).astype(np.int32),
+        'feature': np.concatenate(arrays['feature']).astype(np.int32),
+        'threshold': np.concatenate(arrays['threshold']).astype(np.float64),
+        'value': np.concatenate(arrays['value']).astype(np.float64),
+        'cover': np.concatenate(arrays['cover']).astype(np.float64),
+        'roots': offsets[:-1].astype(np.int32),
+        'tree_weights': np.asarray(tree_weights, dtype=np.float64),
+    }
+    max_depth = max(t['depth'] for t in trees)
+    return PackedForest(packed, n_features, max_depth, base_score, feature_names, source_type)
+
+
+def _sklearn_tree(estimator):
+    tree = estimator.tree_
+    left = tree.children_left.astype(np.int64)
+    right = tree.children_right.astype(np.int64)
+    missing_left = getattr(tree, 'missing_go_to_left', None)
+    if missing_left is None:
+        missing = right
+    else:
+        missing = np.where(np.asarray(missing_left).astype(bool), left, right)
+    return {
+        'children_left': left,
+        'children_right': right,
+        'missing': missing,
+        'feature': tree.feature.astype(np.int64),
+        'threshold': tree.threshold.astype(np.float64),
+        'value': tree.value[:, 0, 0].astype(np.float64),
+        'cover': tree.weighted_n_node_samples.astype(np.float64),
+        'depth': int(tree.max_depth),
+    }
+
+
+def _xgb_tree(dump, feature_index):
+    nodes = {}
+    stack = [(json.loads(dump), 0)]
+    while stack:
+        node, depth = stack.pop()
+        nodes[node['nodeid']] = (node, depth)
+        for child in node.get('children', []):
+            stack.append((child, depth + 1))
+    n_nodes = max(nodes) + 1
+    tree = {name: np.full(n_nodes, -1, dtype=np.int64)
+            for name in ('children_left', 'children_right', 'missing', 'feature')}
+    tree['threshold'] = np.full(n_nodes, np.inf)
+    tree['value'] = np.zeros(n_nodes)
+    tree['cover'] = np.zeros(n_nodes)
+    tree['depth'] = 0
+    for node_id, (node, depth) in nodes.items():
+        tree['cover'][node_id] = node.get('cover', 0.0)
+        tree['depth'] = max(tree['depth'], depth)
+        if 'leaf' in node:
+            tree['value'][node_id] = node['leaf']
+            continue
+        if 'split_condition' not in node or isinstance(node['split_condition'], list):
+            raise ValueError("Categorical XGBoost splits are not supported by forest_pack")
+        split = node['split']
+        tree['feature'][node_id] = feature_index[split] if split in feature_index else int(split.lstrip('f'))
+        # XGBoost routes x < split left; on float32 inputs that equals x <= previous float32
+        condition = np.float32(node['split_condition'])
+        tree['threshold'][node_id] = np.nextafter(condition, np.float32(-np.inf))
+        tree['children_left'][node_id] = node['yes']
+        tree['children_right'][node_id] = node['no']
+        tree['missing'][node_id] = node.get('missing', node['no'])
+    return tree
+
+
+def _xgb_base_score(booster):
+    config = json.loads(booster.save_config())
+    learner = config['learner']
+    objective = learner['objective']['name']
+    if objective not in ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror'):
+        raise ValueError(f"XGBoost objective '{objective}' has a non-identity link; cannot pack")
+    base_score = learner['learner_model_param']['base_score']
+    return float(str(base_score).strip('[]'))
+
+
+def can_pack(model):
+    if isinstance(model, PackedForest):
+        return True
+    name = type(model).__name__
+    return name in ('RandomForestRegressor', 'ExtraTreesRegressor', 'DecisionTreeRegressor',
+                    'ExtraTreeRegressor', 'GradientBoostingRegressor', 'XGBRegressor', 'Booster')
+
+
+def pack_model(model, feature_names=None):
+    """Convert a fitted tree-based regressor into a :class:`PackedForest`."""
+    if isinstance(model, PackedForest):
+        return model
+    name = type(model).__name__
+    n_features = getattr(model, 'n_features_in_', None)
+    if feature_names is None and hasattr(model, 'feature_names_in_'):
+        feature_names = list(model.feature_names_in_)
+
+    if name in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be packed")
+        trees = [_sklearn_tree(est) for est in model.estimators_]
+        weights = np.full(len(trees), 1.0 / len(trees))
+        return _concat_trees(trees, n_features, 0.0, weights, feature_names, name)
+
+    if name in ('DecisionTreeRegressor', 'ExtraTreeRegressor'):
+        return _concat_trees([_sklearn_tree(model)], n_features, 0.0, [1.0], feature_names, name)
+
+    if name == 'GradientBoostingRegressor':
+        trees = [_sklearn_tree(est) for est in model.estimators_[:, 0]]
+        if model.init_ == 'zero':
+            base_score = 0.0
+        elif hasattr(model.init_, 'constant_'):
+            base_score = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise ValueError("GradientBoostingRegressor with a custom init estimator cannot be packed")
+        weights = np.full(len(trees), model.learning_rate)
+        return _concat_trees(trees, n_features, base_score, weights, feature_names, name)
+
+    if name in ('XGBRegressor', 'Booster'):
+        booster = model.get_booster() if name == 'XGBRegressor' else model
+        if booster.feature_names:
+            feature_names = feature_names or list(booster.feature_names)
+        if n_features is None:
+            n_features = booster.num_features()
+        feature_index = {f: i for i, f in enumerate(feature_names or [])}
+        dumps = booster.get_dump(dump_format='json', with_stats=True)
+        trees = [_xgb_tree(d, feature_index) for d in dumps]
+        return _concat_trees(trees, n_features, _xgb_base_score(booster), np.ones(len(trees)),
+                             feature_names, name)
+
+    raise TypeError(f"Cannot pack model of type {name}")
+
+
+def parity_error(model, packed, X):
+    """Max absolute difference between the original and packed predictions on X."""
+    return float(np.max(np.abs(np.asarray(model.predict(X), dtype=np.float64) - packed.predict(X))))
@@ -0,0 +1,181 @@
+# Dataset helpers for the AI-Based Real Estate Valuation System
+# Locates india_housing_prices.csv, derives a cheap dataset version used to key
+# precomputed indexes/caches, and owns the on-disk cache directory. The declared
+# SCHEMA loads every column into its smallest correct dtype (int8/int16/int32,
+# float32, categorical strings, booleans) and validates ranges and allowed values
+# in the same pass.
+
+import argparse
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).parent
+DATA_FILE = ROOT / "india_housing_prices.csv"
+CACHE_DIR = ROOT / "cache"
+
+# column -> dtype plus optional 'min'/'max' bounds, 'allowed' categories, or the
+# 'true' label of a Yes/No flag
+SCHEMA = {
+    'ID': {'dtype': 'int32', 'min': 1},
+    'State': {'dtype': 'category'},
+    'City': {'dtype': 'category'},
+    'Locality': {'dtype': 'category'},
+    'Property_Type': {'dtype': 'category', 'allowed': ['Apartment', 'Independent House', 'Villa']},
+    'BHK': {'dtype': 'int8', 'min': 1, 'max': 20},
+    'Size_in_SqFt': {'dtype': 'int32', 'min': 50, 'max': 100000},
+    'Price_in_Lakhs': {'dtype': 'float32', 'min': 0},
+    'Price_per_SqFt': {'dtype': 'float32', 'min': 0},
+    'Year_Built': {'dtype': 'int16', 'min': 1800, 'max': 2100},
+    'Furnished_Status': {'dtype': 'category', 'allowed': ['Furnished', 'Semi-furnished', 'Unfurnished']},
+    'Floor_No': {'dtype': 'int16', 'min': -5, 'max': 300},
+    'Total_Floors': {'dtype': 'int16', 'min': 0, 'max': 300},
+    'Age_of_Property': {'dtype': 'int16', 'min': 0, 'max': 300},
+    'Nearby_Schools': {'dtype': 'int8', 'min': 0, 'max': 100},
+    'Nearby_Hospitals': {'dtype': 'int8', 'min': 0, 'max': 100},
+    'Public_Transport_Accessibility': {'dtype': 'category', 'allowed': ['Low', 'Medium', 'High']},
+    'Parking_Space': {'dtype': 'bool', 'true': 'Yes', 'false': 'No'},
+    'Security': {'dtype': 'bool', 'true': 'Yes', 'false': 'No'},
+    'Amenities': {'dtype': 'category'},
+    'Facing': {'dtype': 'category', 'allowed': ['North', 'South', 'East', 'West']},
+    'Owner_Type': {'dtype': 'category', 'allowed': ['Owner', 'Builder', 'Broker']},
+    'Availability_Status': {'dtype': 'category', 'allowed': ['Ready_to_Move', 'Under_Construction']},
+}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def dataset_version(path=DATA_FILE):
+    """Short version id for a data file; changes whenever the file is replaced or edited."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    stat = path.stat()
+    key = f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def cache_path(kind, version, *parts):
+    """Directory for a precomputed artifact of ``kind`` built from dataset ``version``."""
+    return CACHE_DIR.joinpath(kind, str(version), *parts)
+
+
+def column_violations(values, spec):
+    """Boolean mask of values violating ``spec`` plus a readable form of the rule."""
+    dtype = spec['dtype']
+    bad = np.array(values.isna())
+    rule = f"non-null {dtype}"
+    if dtype == 'bool':
+        bad |= ~values.isin([spec['true'], spec['false']]).to_numpy()
+        rule = f"{spec['true']}/{spec['false']}"
+    elif dtype == 'category':
+        if 'allowed' in spec:
+            bad |= ~values.isin(spec['allowed']).to_numpy()
+            rule = f"one of {spec['allowed']}"
+    else:
+        numeric = pd.to_numeric(values, errors='coerce')
+        bad |= numeric.isna().to_numpy()
+        if 'min' in spec:
+            bad |= (numeric < spec['min']).to_numpy()
+        if 'max' in spec:
+            bad |= (numeric > spec['max']).to_numpy()
+        if dtype.startswith('int'):
+            info = np.iinfo(dtype)
+            bad |= ((numeric < info.min) | (numeric > info.max) | (numeric % 1 != 0)).to_numpy()
+        rule = f"{dtype} in [{spec.get('min', '-inf')}, {spec.get('max', 'inf')}]"
+    return bad, rule
+
+
+def _convert(values, spec):
+    dtype = spec['dtype']
+    if dtype == 'bool':
+        return values.astype(str) == spec['true']
+    if dtype == 'category':
+        if 'allowed' in spec:
+            return pd.Categorical(values.astype(str), categories=spec['allowed'])
+        return values.astype('category')
+    return values.astype(dtype)
+
+
+def apply_schema(df, schema=SCHEMA, strict=False):
+    """Validate ``df`` against ``schema`` and cast it to the declared compact dtypes.
+
+    Returns ``(typed_df, issues)`` where ``issues`` lists each violating column
+    with its row count. Rows with any violation are dropped before casting (so
+    they cannot overflow a narrow dtype); with ``strict=True`` they raise
+    :class:`SchemaError` instead. Columns not in the schema are kept unchanged.
+    """
+    missing = [c for c in schema if c not in df.columns]
+    if missing:
+        raise SchemaError(f"Dataset is missing columns: {missing}")
+    invalid = np.zeros(len(df), dtype=bool)
+    issues = []
+    for col, spec in schema.items():
+        bad, rule = column_violations(df[col], spec)
+        if bad.any():
+            issues.append({'column': col, 'rows': int(bad.sum()), 'rule': rule})
+            invalid |= bad
+    if issues and strict:
+        raise SchemaError("; ".join(f"{i['column']}: {i['rows']} rows violate {i['rule']}" for i in issues))
+    if invalid.any():
+        df = df.loc[~invalid]
+    typed = pd.DataFrame({col: (_convert(df[col], schema[col]) if col in schema else df[col]) for col in df.columns})
+    return typed.reset_index(drop=True), issues
+
+
+def load_dataset(path=DATA_FILE, schema=SCHEMA, strict=False):
+    """Read the CSV straight into the compact schema; returns ``(df, report)``."""
+    # Open string columns parse directly as categoricals; everything else is
+    # checked first, then narrowed
+    read_dtypes = {col: 'category' for col, spec in schema.items()
+                   if spec['dtype'] == 'category' and 'allowed' not in spec}
+    raw = pd.read_csv(path, dtype=read_dtypes)
+    df, issues = apply_schema(raw, schema, strict)
+    report = {
+        'rows': len(df),
+        'invalid_rows': len(raw) - len(df),
+        'issues': issues,
+        'memory_bytes': int(df.memory_usage(deep=True).sum()),
+    }
+    return df, report
+
+
+def memory_footprint(df, baseline=None):
+    """Per-column dtype and in-memory bytes, optionally against a ``baseline`` frame."""
+    table = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'bytes': df.memory_usage(deep=True, index=False),
+    })
+    if baseline is not None:
+        table['baseline_dtype'] = baseline.dtypes.reindex(table.index).astype(str)
+        table['baseline_bytes'] = baseline.memory_usage(deep=True, index=False).reindex(table.index)
+        table['reduction'] = table['baseline_bytes'] / table['bytes']
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate the housing dataset and report its memory footprint")
+    parser.add_argument("path", nargs="?", default=str(DATA_FILE))
+    parser.add_argument("--strict", action="store_true", help="Fail on any schema violation")
+    args = parser.parse_args(argv)
+
+    df, report = load_dataset(args.path, strict=args.strict)
+    baseline = pd.read_csv(args.path)
+    footprint = memory_footprint(df, baseline)
+    print("=" * 80)
+    print(f"📋 Rows loaded: {report['rows']:,} ({report['invalid_rows']:,} rejected)")
+    for issue in report['issues']:
+        print(f"⚠️  {issue['column']}: {issue['rows']:,} rows violate {issue['rule']}")
+    print(footprint.to_string(float_format=lambda x: f"{x:.1f}"))
+    total, total_baseline = footprint['bytes'].sum(), footprint['baseline_bytes'].sum()
+    print(f"💾 Memory: {total / 1e6:.1f} MB typed vs {total_baseline / 1e6:.1f} MB with pandas defaults "
+          f"({total_baseline / total:.1f}x smaller)")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# Incremental retraining for the AI-Based Real Estate Valuation System
+# Instead of refitting from scratch on the full dataset, a registered model is
+# extended with newly ingested listings only:
+#   - XGBoost continues boosting the existing booster for `rounds` more rounds
+#   - RandomForest / GradientBoosting use warm_start to add `rounds` trees
+# so a weekly refresh costs time proportional to the new rows. The new listings
+# go through the pipeline's clean/features/encode stages (cached by content
+# hash), and the candidate is registered only if it passes a validation gate:
+# its holdout RMSE may not exceed the base model's by more than `tolerance`.
+
+import argparse
+import copy
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from model_registry import REGISTRY_FILE, load_registered_model, load_registry, register_model, resolve
+from pipeline import TARGET, build_config, run_pipeline
+from prediction_intervals import conformal_quantiles
+
+DEFAULT_ROUNDS = 20
+DEFAULT_TOLERANCE = 0.01
+WARM_START_TYPES = ('RandomForestRegressor', 'ExtraTreesRegressor', 'GradientBoostingRegressor')
+CARRIED_KEYS = ('outlier_fences', 'drift_reference')
+
+
+def prepare_listings(path, feature_names, assignments=(), log=print):
+    """Features and target of a raw listings CSV, via the pipeline's cached stages."""
+    config = build_config(assignments=assignments)
+    config['load']['path'] = str(path)
+    _, _, get = run_pipeline(config, until='encode', log=log)
+    df = get('encode')
+    missing = [c for c in feature_names if c not in df.columns]
+    if missing:
+        raise KeyError(f"New listings lack model features: {missing}")
+    return df[feature_names], df[TARGET]
+
+
+def continue_training(model, X_new, y_new, rounds=DEFAULT_ROUNDS):
+    """A copy of ``model`` extended with ``rounds`` boosting rounds / trees fitted on the new rows."""
+    candidate = copy.deepcopy(model)
+    estimator, X = candidate, X_new
+    if hasattr(candidate, 'steps'):
+        # Pipelines keep their fitted preprocessing; only the final estimator grows
+        X = candidate[:-1].transform(X_new)
+        estimator = candidate[-1]
+    kind = type(estimator).__name__
+    if kind == 'XGBRegressor':
+        booster = estimator.get_booster()
+        estimator.set_params(n_estimators=rounds)
+        estimator.fit(X, y_new, xgb_model=booster)
+        # fit() leaves n_estimators at the rounds just added; record the whole ensemble
+        estimator.set_params(n_estimators=estimator.get_booster().num_boosted_rounds())
+    elif kind in WARM_START_TYPES:
+        estimator.set_params(warm_start=True, n_estimators=estimator.n_estimators + rounds)
+        estimator.fit(X, y_new)
+        estimator.set_params(warm_start=False)
+    else:
+        raise TypeError(f"{kind} cannot be trained incrementally (packed models must come from a joblib artifact)")
+    return candidate
+
+
+def ensemble_size(model):
+    """Boosting rounds / trees in a fitted model."""
+    estimator = model[-1] if hasattr(model, 'steps') else model
+    if type(estimator).__name__ == 'XGBRegressor':
+        return int(estimator.get_booster().num_boosted_rounds())
+    return int(estimator.n_estimators)
+
+
+def holdout_metrics(model, X, y):
+    pred = np.asarray(model.predict(X), dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    residual = y - pred
+    return {
+        'rmse': float(np.sqrt(np.mean(residual ** 2))),
+        'mae': float(np.mean(np.abs(residual))),
+        'r2': float(1 - np.sum(residual ** 2) / np.sum((y - y.mean()) ** 2)),
+    }
+
+
+def incremental_update(base, X_new, y_new, X_holdout, y_holdout, rounds=DEFAULT_ROUNDS,
+                       tolerance=DEFAULT_TOLERANCE, name=None, aliases=(), registry_path=REGISTRY_FILE):
+    """Warm-start ``base`` on the new rows and register the result if it passes the holdout gate.
+
+    Returns a report dict; ``report['registered']`` is the new model name or None.
+    """
+    base_name, entry = resolve(base, registry_path)
+    meta = load_registered_model(base, registry_path)
+    if meta is None:
+        raise KeyError(f"No model registered as '{base}'")
+    feature_names = meta.get('feature_names') or list(X_new.columns)
+    X_holdout = X_holdout.reindex(columns=feature_names).fillna(0)
+
+    start = time.perf_counter()
+    candidate = continue_training(meta['model'], X_new[feature_names], y_new, rounds)
+    seconds = time.perf_counter() - start
+    before = holdout_metrics(meta['model'], X_holdout, y_holdout)
+    after = holdout_metrics(candidate, X_holdout, y_holdout)
+    report = {
+        'base': base_name,
+        'new_rows': int(len(X_new)),
+        'rounds': int(rounds),
+        'total_rounds': ensemble_size(candidate),
+        'training_seconds': seconds,
+        'holdout_rows': int(len(X_holdout)),
+        'base_metrics': before,
+        'candidate_metrics': after,
+        'tolerance': tolerance,
+        'passed': after['rmse'] <= before['rmse'] * (1 + tolerance),
+        'registered': None,
+    }
+    if not report['passed']:
+        return report
+
+    name = name or f"{base_name}_inc{datetime.now():%Y%m%d%H%M}"
+    candidate_meta = {**meta, 'model': candidate, 'feature_names': feature_names,
+                      'trained_at': datetime.now().isoformat(timespec="seconds")}
+    metrics = {f'holdout_{k}': v for k, v in after.items()}
+    # Fences and drift histograms describe the original training data; the update only adds to it
+    extra = {key: entry[key] for key in CARRIED_KEYS if key in entry}
+    extra['intervals'] = conformal_quantiles(np.asarray(y_holdout), candidate.predict(X_holdout))
+    extra['incremental'] = {k: report[k] for k in ('base', 'new_rows', 'rounds', 'total_rounds', 'base_metrics')}
+    # One manifest write: the aliases never point at an entry that is still being filled in
+    register_model(candidate_meta, name, metrics=metrics, aliases=aliases, registry_path=registry_path, extra=extra)
+    report['registered'] = name
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extend a registered model with newly ingested listings")
+    parser.add_argument("base", nargs="?", default=None, help="Registered model name or alias (joblib artifact)")
+    parser.add_argument("--data", required=True, help="New listings CSV in the india_housing_prices.csv format")
+    parser.add_argument("--X-holdout", default="X_test.csv", help="Holdout feature CSV for the validation gate")
+    parser.add_argument("--y-holdout", default="y_test.csv", help="Holdout target CSV")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Boosting rounds / trees to add")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative holdout RMSE increase (0.01 = 1%%)")
+    parser.add_argument("--name", help="Name for the updated model (default: <base>_inc<timestamp>)")
+    parser.add_argument("--alias", action="append", default=[], help="Alias(es) to point at the updated model")
+    parser.add_argument("--set", action="append", default=[], metavar="STAGE.KEY=VALUE",
+                        help="Pipeline config override for preparing the listings, e.g. clean.price_iqr_k=null")
+    parser.add_argument("--registry", default=str(REGISTRY_FILE))
+    args = parser.parse_args(argv)
+    registry_path = Path(args.registry)
+
+    base_name, entry = resolve(args.base, registry_path)
+    if entry is None:
+        parser.error(f"No model registered as '{args.base}'")
+    if entry.get('layout') == "mmap" and entry.get('model_type') in WARM_START_TYPES:
+        # Exported forests are packed node arrays and cannot grow more trees
+        sources = [name for name, other in load_registry(registry_path)['models'].items()
+                   if other.get('layout', "joblib") == "joblib" and other.get('model_type') == entry.get('model_type')
+                   and other.get('feature_hash') == entry.get('feature_hash')]
+        hint = f"; use the joblib model it was exported from (e.g. {', '.join(sources)})" if sources else ""
+        parser.error(f"'{base_name}' is a memory-mapped (packed) model and cannot be trained further{hint}")
+    meta = load_registered_model(base_name, registry_path)
+    print("=" * 80)
+    print("INCREMENTAL RETRAINING")
+    print("=" * 80)
+    X_new, y_new = prepare_listings(args.data, meta.get('feature_names') or [], args.set)
+    X_holdout = pd.read_csv(args.X_holdout)
+    y_holdout = pd.read_csv(args.y_holdout).iloc[:, 0].to_numpy()
+    report = incremental_update(args.base, X_new, y_new, X_holdout, y_holdout, args.rounds, args.tolerance,
+                                args.name, args.alias, registry_path)
+
+    before, after = report['base_metrics'], report['candidate_metrics']
+    print(f"\n⚙️ {report['base']}: +{report['rounds']} rounds on {report['new_rows']:,} new rows "
+          f"in {report['training_seconds']:.2f}s ({report['total_rounds']} in total)")
+    print(f"\n📊 Holdout ({report['holdout_rows']:,} rows)")
+    print(f"   RMSE: ₹{before['rmse']:.2f} → ₹{after['rmse']:.2f} Lakhs")
+    print(f"   MAE:  ₹{before['mae']:.2f} → ₹{after['mae']:.2f} Lakhs")
+    print(f"   R² Score: {before['r2']:.4f} → {after['r2']:.4f}")
+    if report['registered']:
+        print(f"\n✅ Gate passed — registered as '{report['registered']}'")
+    else:
+        print(f"\n❌ Gate failed — holdout RMSE rose more than {report['tolerance'] * 100:g}%; nothing registered")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+# Background jobs for the AI-Based Real Estate Valuation System
+# Long tasks (large batch valuations, statistics rebuilds) run on a worker thread
+# pool instead of inside a Streamlit rerun, so closing the tab or losing the
+# websocket does not kill them. Jobs live in a small SQLite table under
+# cache/jobs/ that every session and process can read. A task is split into chunks
+# and each finished chunk is written to the job directory before progress is
+# recorded, so a job interrupted by a restart resumes at the first missing chunk.
+# `python jobs.py worker` drains the queue from a separate process.
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pandas as pd
+
+from housing_data import CACHE_DIR, DATA_FILE
+
+JOBS_DIR = CACHE_DIR / "jobs"
+JOBS_DB = JOBS_DIR / "jobs.sqlite"
+JOB_WORKERS_ENV = "VALUATION_JOB_WORKERS"
+DEFAULT_WORKERS = 2
+BATCH_CHUNK_ROWS = 50000
+ACTIVE_STATUSES = ('queued', 'running')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    error TEXT,
+    worker_pid INTEGER,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+# ---------- Job table ----------
+@contextmanager
+def _connect(db_path=JOBS_DB):
+    # Short-lived autocommit connections: safe to use from any thread or process
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        yield conn
+    finally:
+        conn.close()
+
+
+def _update(job_id, db_path=JOBS_DB, expect=None, **fields):
+    """Set ``fields`` on a job; with ``expect`` only while the job still has that status."""
+    fields['updated'] = time.time()
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    query, values = f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id]
+    if expect is not None:
+        query += " AND status = ?"
+        values.append(expect)
+    with _connect(db_path) as conn:
+        return conn.execute(query, values).rowcount
+
+
+def get_job(job_id, db_path=JOBS_DB):
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _as_job(row) if row else None
+
+
+def list_jobs(limit=20, db_path=JOBS_DB):
+    """Most recent jobs first, as dicts."""
+    with _connect(db_path) as conn:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+    return [_as_job(row) for row in rows]
+
+
+def _as_job(row):
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    job['progress'] = job['done'] / job['total'] if job['total'] else 0.0
+    return job
+
+
+def job_dir(job_id):
+    return JOBS_DIR / job_id
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# ---------- Tasks ----------
+TASKS = {}
+
+
+def task(kind):
+    """Register a task class under ``kind``.
+
+    A task implements ``plan(params, directory)`` (idempotent setup; returns the
+    number of chunks), ``run_chunk(params, index, directory)`` (returns a picklable
+    part) and ``combine(params, parts)`` (merges the parts into the job result).
+    """
+    def register(cls):
+        TASKS[kind] = cls()
+        return cls
+    return register
+
+
+def _save_part(path, part):
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}-{threading.get_ident()}")
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _part_path(directory, index):
+    return directory / f"part_{index:05d}.pkl"
+
+
+def run_job(job_id, db_path=JOBS_DB):
+    """Run (or resume) one job in the calling thread; chunks already on disk are skipped."""
+    job = get_job(job_id, db_path)
+    if job is None:
+        return None
+    with _connect(db_path) as conn:
+        # Claim atomically so two workers never run the same job
+        claimed = conn.execute(
+            "UPDATE jobs SET status = 'running', worker_pid = ?, updated = ? WHERE id = ? AND status = 'queued'",
+            (os.getpid(), time.time(), job_id)).rowcount
+    if not claimed:
+        return get_job(job_id, db_path)
+
+    directory = job_dir(job_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        runner = TASKS[job['kind']]
+        total = runner.plan(job['params'], directory)
+        done = sum(_part_path(directory, i).exists() for i in range(total))
+        _update(job_id, db_path, total=total, done=done)
+        for index in range(total):
+            path = _part_path(directory, index)
+            if path.exists():
+                continue
+            if get_job(job_id, db_path)['status'] == 'cancelled':
+                return get_job(job_id, db_path)
+            _save_part(path, runner.run_chunk(job['params'], index, directory))
+            done += 1
+            _update(job_id, db_path, done=done)
+        # A cancel that lands after the last chunk must not be overwritten
+        _update(job_id, db_path, expect='running', status='done')
+    except Exception as e:
+        _update(job_id, db_path, expect='running', status='failed', error=f"{type(e).__name__}: {e}")
+    return get_job(job_id, db_path)
+
+
+def job_result(job_id):
+    """Combined result of a finished job."""
+    job = get_job(job_id)
+    if job is None or job['status'] != 'done':
+        raise ValueError(f"Job {job_id} is not finished")
+    directory = job_dir(job_id)
+    parts = []
+    for index in range(job['total']):
+        with open(_part_path(directory, index), 'rb') as f:
+            parts.append(pickle.load(f))
+    return TASKS[job['kind']].combine(job['params'], parts)
+
+
+def _model_version(params):
+    # A name or alias re-registered since the last run must not reuse its results
+    if not params.get('model'):
+        return None
+    from model_registry import resolve
+
+    resolved, entry = resolve(params['model'])
+    entry = entry or {}
+    return [resolved, entry.get('registered_at'), entry.get('trained_at')]
+
+
+# ---------- Queue ----------
+class JobQueue:
+    """Thread pool that runs queued jobs; jobs left running by a dead process are resumed."""
+
+    def __init__(self, workers=None, db_path=JOBS_DB):
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.environ.get(JOB_WORKERS_ENV, DEFAULT_WORKERS)),
+            thread_name_prefix="valuation-job")
+        self.resume_interrupted()
+
+    def submit(self, kind, params, label=None, dedupe=True):
+        """Queue a job and return its id.
+
+        With ``dedupe`` an identical job (same kind, params and model version)
+        that is queued, running or done is reused instead of starting another one.
+        """
+        if kind not in TASKS:
+            raise KeyError(f"Unknown job kind '{kind}'")
+        blob = json.dumps({'kind': kind, 'params': params, 'model': _model_version(params)},
+                          sort_keys=True, default=str)
+        job_id = hashlib.sha1(blob.encode('utf-8')).hexdigest()[:16] if dedupe else uuid.uuid4().hex[:16]
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            existing = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if existing is not None and existing['status'] not in ('failed', 'cancelled'):
+                return job_id
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, kind, label, params, status, done, total, error, worker_pid, created, updated) "
+                "VALUES (?, ?, ?, ?, 'queued', 0, NULL, NULL, NULL, ?, ?)",
+                (job_id, kind, label or kind, json.dumps(params, default=str), now, now))
+        self.executor.submit(run_job, job_id, self.db_path)
+        return job_id
+
+    def cancel(self, job_id):
+        _update(job_id, self.db_path, status='cancelled')
+
+    def resume_interrupted(self):
+        """Requeue jobs whose worker process is gone (e.g. the server restarted mid-job)."""
+        with _connect(self.db_path) as conn:
+            rows = conn.execute("SELECT id, status, worker_pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        resumed = []
+        for row in rows:
+            if row['status'] == 'running' and _pid_alive(row['worker_pid']):
+                continue
+            _update(row['id'], self.db_path, status='queued', worker_pid=None)
+            self.executor.submit(run_job, row['id'], self.db_path)
+            resumed.append(row['id'])
+        return resumed
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """The process-wide job queue (created, and interrupted jobs resumed, on first use)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+# ---------- Built-in tasks ----------
+_models = {}
+_models_lock = threading.Lock()
+
+
+def share_model(meta):
+    """Let jobs reuse a registered model the caller has already loaded."""
+    if meta.get('registry_name'):
+        key = (meta['registry_name'], (meta.get('registry_entry') or {}).get('registered_at'))
+        with _models_lock:
+            _models.setdefault(key, meta)
+
+
+def _load_model(name):
+    from model_registry import load_registered_model, resolve
+
+    # Worker threads share one loaded copy per registered model version
+    resolved, entry = resolve(name)
+    key = (resolved, (entry or {}).get('registered_at'))
+    with _models_lock:
+        if key not in _models:
+            meta = load_registered_model(name)
+            if meta is None:
+                raise KeyError(f"No model registered as '{name}'")
+            _models[key] = meta
+        return _models[key]
+
+
+def value_batch(meta, rows):
+    """Validate ``rows`` and score the accepted ones; returns ``(results, quarantined, report)``."""
+    from drift import get_monitor
+    from features import to_feature_frame
+    from outliers import flag_outliers
+    from prediction_intervals import predict_with_interval
+    from validation import validate_batch
+
+    feature_names = meta.get('feature_names') or []
+    accepted, quarantined, report = validate_batch(rows, feature_names)
+    results = accepted.copy()
+    if len(accepted):
+        X = to_feature_frame(accepted, feature_names)
+        point, lower, upper, _ = predict_with_interval(meta['model'], X, meta.get('intervals'))
+        results['Predicted_Price_Lakhs'] = point
+        if lower is not None:
+            results['Lower_Lakhs'] = lower
+            results['Upper_Lakhs'] = upper
+        if meta.get('outlier_fences'):
+            results = results.join(flag_outliers(results, meta['outlier_fences']))
+        if meta.get('drift_reference'):
+            get_monitor(meta.get('registry_name') or 'legacy', meta['drift_reference']).observe(X)
+    return results, quarantined, report
+
+
+@task('batch_valuation')
+class BatchValuationTask:
+    """Validate and value a CSV of listings, ``chunk_rows`` rows per checkpoint."""
+
+    def plan(self, params, directory):
+        marker = directory / "input_chunks.json"
+        if marker.exists():
+            return json.loads(marker.read_text())['chunks']
+        chunks = 0
+        for chunk in pd.read_csv(params['path'], chunksize=params.get('chunk_rows', BATCH_CHUNK_ROWS)):
+            chunk.to_pickle(directory / f"input_{chunks:05d}.pkl")
+            chunks += 1
+        marker.write_text(json.dumps({'chunks': chunks}))
+        return chunks
+
+    def run_chunk(self, params, index, directory):
+        from metrics import PREDICTIONS
+
+        meta = _load_model(params['model'])
+        results, quarantined, report = value_batch(meta, pd.read_pickle(directory / f"input_{index:05d}.pkl"))
+        PREDICTIONS.inc(len(results), city='batch', model=meta.get('registry_name') or 'legacy')
+        return {'results': results, 'quarantined': quarantined, 'report': report}
+
+    def combine(self, params, parts):
+        report = pd.concat([p['report'] for p in parts], ignore_index=True)
+        report = report.groupby(['Rule', 'Description'], sort=False, as_index=False)['Violations'].sum()
+        return {
+            'results': pd.concat([p['results'] for p in parts], ignore_index=True),
+            'quarantined': pd.concat([p['quarantined'] for p in parts], ignore_index=True),
+            'report': report,
+        }
+
+
+@task('refresh_rollups')
+class RefreshRollupsTask:
+    """Fold rows appended to the dataset into the trend rollups."""
+
+    def plan(self, params, directory):
+        return 1
+
+    def run_chunk(self, params, index, directory):
+        from rollups import refresh_rollups
+
+        rollup, rows_added = refresh_rollups(params.get('path', str(DATA_FILE)))
+        return {'rows_added': rows_added, 'cells': len(rollup.cells)}
+
+    def combine(self, params, parts):
+        return parts[0]
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and run background valuation jobs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="Show recent jobs")
+    p_list.add_argument("--limit", type=int, default=20)
+    sub.add_parser("worker", help="Resume interrupted jobs and wait until the queue is empty")
+    p_value = sub.add_parser("value", help="Queue a batch valuation of a CSV and wait for it")
+    p_value.add_argument("path")
+    p_value.add_argument("--model", default=None, help="Registered model name or alias")
+    p_value.add_argument("--out", help="Write valued rows here (CSV)")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("=" * 80)
+        print("BACKGROUND JOBS")
+        print("=" * 80)
+        jobs = list_jobs(args.limit)
+        if not jobs:
+            print("No jobs yet.")
+        for job in jobs:
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(job['created']))
+            print(f"{job['id']}  {job['status']:<9} {job['done']}/{job['total'] or '?':<5} {created}  {job['label']}"
+                  + (f"\n    ❌ {job['error']}" if job['error'] else ""))
+        return
+
+    queue = get_queue()
+    if args.command == "value":
+        from model_registry import DEFAULT_ALIAS
+
+        job_id = queue.submit('batch_valuation', {'path': os.path.abspath(args.path), 'model': args.model or DEFAULT_ALIAS},
+                              label=f"Batch valuation: {os.path.basename(args.path)}")
+        print(f"📦 Job {job_id} queued")
+    queue.executor.shutdown(wait=True)
+    if args.command == "value":
+        job = get_job(job_id)
+        print(f"✅ {job['status']} ({job['done']}/{job['total']} chunks)" + (f" — {job['error']}" if job['error'] else ""))
+        if job['status'] == 'done' and args.out:
+            job_result(job_id)['results'].to_csv(args.out, index=False)
+            print(f"💾 Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
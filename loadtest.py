@@ -0,0 +1,154 @@
+# Load-testing harness for the AI-Based Real Estate Valuation System
+# Drives streamlit_app.py headlessly with Streamlit's AppTest API. N concurrent
+# sessions run in threads of one process, as they do inside `streamlit run`, and
+# share its st.cache_resource caches. Each session repeats a realistic flow:
+#   load -> preset click -> location change -> price estimate
+# The History and Market Insights tabs need no step of their own: st.tabs
+# switching happens in the browser, and every tab body executes on every rerun.
+# Each concurrency level runs in a fresh subprocess, so CPU time and peak RSS
+# belong to that level alone.
+#
+#   python loadtest.py --sessions 1 5 10 25 50 --iterations 3
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent
+APP_FILE = ROOT / "streamlit_app.py"
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _find_button(at, label):
+    for button in at.button:
+        if label in button.label:
+            return button
+    raise LookupError(f"No button labelled '{label}'")
+
+
+def run_session(session_id, iterations, timeout, think_time, record):
+    """One simulated appraiser; ``record(step, seconds, ok)`` is called per rerun."""
+    from streamlit.testing.v1 import AppTest
+
+    def step(name, action):
+        start = time.perf_counter()
+        try:
+            ok = not action().exception
+        except Exception:
+            ok = False
+        record(name, time.perf_counter() - start, ok)
+        if think_time:
+            time.sleep(think_time)
+
+    at = AppTest.from_file(str(APP_FILE), default_timeout=timeout)
+    step('load', at.run)
+    for i in range(iterations):
+        preset = ('luxury_btn', 'budget_btn', 'villa_btn')[(session_id + i) % 3]
+        step('preset', lambda: at.button(key=preset).click().run())
+
+        def change_location():
+            selector = at.selectbox(key='locality_input')
+            options = selector.options
+            return selector.set_value(options[(session_id + i) % len(options)]).run()
+        step('location', change_location)
+        step('predict', lambda: _find_button(at, 'Get Price Estimate').click().run())
+
+
+def run_level(sessions, iterations, timeout, think_time):
+    """Run ``sessions`` concurrent sessions in this process and summarize them."""
+    latencies = {}
+    failures = 0
+    lock = threading.Lock()
+
+    def record(step, seconds, ok):
+        nonlocal failures
+        with lock:
+            latencies.setdefault(step, []).append(seconds)
+            failures += not ok
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, i, iterations, timeout, think_time, record) for i in range(sessions)]
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    all_latencies = np.concatenate([np.asarray(v) for v in latencies.values()]) * 1000
+    summary = {
+        'sessions': sessions,
+        'reruns': int(len(all_latencies)),
+        'failures': int(failures),
+        'wall_s': wall,
+        'throughput_rps': len(all_latencies) / wall,
+        'cpu_s': cpu,
+        'cpu_util': cpu / wall,
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': usage_after.ru_maxrss / 1024,
+        'latency_ms': {f"p{p}": float(np.percentile(all_latencies, p)) for p in PERCENTILES},
+        'step_p50_ms': {step: float(np.median(v) * 1000) for step, v in latencies.items()},
+    }
+    return summary
+
+
+def run_levels(levels, iterations, timeout, think_time):
+    """Each level in its own interpreter, so peak RSS and warm caches do not carry over."""
+    results = []
+    for sessions in levels:
+        cmd = [sys.executable, str(Path(__file__).resolve()), '--level', str(sessions),
+               '--iterations', str(iterations), '--timeout', str(timeout), '--think-time', str(think_time)]
+        completed = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Level {sessions} failed:\n{completed.stderr[-2000:]}")
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        print_summary(results[-1])
+    return results
+
+
+def print_summary(summary):
+    latency = summary['latency_ms']
+    print("=" * 80)
+    print(f"👥 Sessions: {summary['sessions']}  •  reruns: {summary['reruns']}  •  failures: {summary['failures']}")
+    print("⏱️  Latency ms: " + "  ".join(f"{k}={v:.0f}" for k, v in latency.items()))
+    print(f"🚀 Throughput: {summary['throughput_rps']:.2f} reruns/s over {summary['wall_s']:.1f}s")
+    print(f"🖥️  CPU: {summary['cpu_s']:.1f}s ({summary['cpu_util'] * 100:.0f}% of one core)  •  "
+          f"💾 Peak RSS: {summary['peak_rss_mb']:.0f} MB")
+    print("📋 Median per step ms: " + "  ".join(f"{k}={v:.0f}" for k, v in summary['step_p50_ms'].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent app sessions and report latency/throughput")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10],
+                        help="Concurrency levels to test, e.g. 1 10 50")
+    parser.add_argument("--iterations", type=int, default=2, help="Flows per session after the first load")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-rerun timeout in seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between steps in seconds")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.level:
+        # Worker mode: one level, result as a JSON line on stdout
+        print(json.dumps(run_level(args.level, args.iterations, args.timeout, args.think_time)))
+        return
+
+    results = run_levels(args.sessions, args.iterations, args.timeout, args.think_time)
+    print("=" * 80)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Location hierarchy index for the AI-Based Real Estate Valuation System
+# Precomputes State -> City -> Locality (sorted option lists) together with listing
+# counts and median price / price-per-sqft at every level, once per dataset version.
+# Cascading dropdowns and the locality benchmark are then plain dictionary lookups
+# instead of unique()/groupby over the full dataset on every rerun.
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from housing_data import cache_path
+
+LEVELS = ['State', 'City', 'Locality']
+INDEX_FORMAT_VERSION = 1
+
+
+def location_key(*parts):
+    return '\x1f'.join(str(p) for p in parts)
+
+
+class LocationIndex:
+    """Nested State/City/Locality options with per-level price benchmarks."""
+
+    def __init__(self, tree, stats):
+        self.tree = tree
+        self.stats = stats
+
+    @classmethod
+    def build(cls, df):
+        missing = [c for c in LEVELS + ['Price_in_Lakhs'] if c not in df.columns]
+        if missing:
+            raise ValueError(f"Dataset is missing columns for the location index: {missing}")
+        data = df[LEVELS].astype(str)
+        data['Price_in_Lakhs'] = df['Price_in_Lakhs']
+        if 'Price_per_SqFt' in df.columns:
+            data['Price_per_SqFt'] = df['Price_per_SqFt']
+
+        stats = {}
+        for depth in range(1, len(LEVELS) + 1):
+            grouped = data.groupby(LEVELS[:depth], sort=True)
+            table = pd.DataFrame({
+                'count': grouped.size(),
+                'median_price_lakhs': grouped['Price_in_Lakhs'].median(),
+            })
+            if 'Price_per_SqFt' in data.columns:
+                table['median_price_per_sqft'] = grouped['Price_per_SqFt'].median()
+            for key, row in zip(table.index, table.to_dict('records')):
+                key = key if isinstance(key, tuple) else (key,)
+                stats[location_key(*key)] = {k: (int(v) if k == 'count' else float(v)) for k, v in row.items()}
+
+        tree = {}
+        for state, city, locality in (k.split('\x1f') for k in stats if k.count('\x1f') == 2):
+            tree.setdefault(state, {}).setdefault(city, []).append(locality)
+        return cls(tree, stats)
+
+    # ---------- Persistence ----------
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}-{threading.get_ident()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'format_version': INDEX_FORMAT_VERSION, 'tree': self.tree, 'stats': self.stats}, f)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get('format_version') != INDEX_FORMAT_VERSION:
+            raise ValueError("Stale location index format")
+        return cls(info['tree'], info['stats'])
+
+    # ---------- Lookups ----------
+    def states(self):
+        return list(self.tree)
+
+    def cities(self, state):
+        return list(self.tree.get(state, {}))
+
+    def localities(self, state, city):
+        return self.tree.get(state, {}).get(city, [])
+
+    def all_cities(self):
+        return sorted(city for cities in self.tree.values() for city in cities)
+
+    def benchmark(self, *parts):
+        """Count and medians for ``(state[, city[, locality]])``, or None if unknown."""
+        return self.stats.get(location_key(*parts))
+
+
+def load_or_build_locations(df, version):
+    """Open the persisted location index for dataset ``version``, building it on first use."""
+    path = cache_path("locations", version, "locations.json")
+    if path.exists():
+        try:
+            return LocationIndex.load(path)
+        except (ValueError, OSError, KeyError):
+            pass
+    index = LocationIndex.build(df)
+    index.save(path)
+    return index
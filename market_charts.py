@@ -0,0 +1,185 @@
+# Market Insights charts for the AI-Based Real Estate Valuation System
+# Charts are aggregated server-side (binned with numpy, grouped with pandas) so the
+# figure spec stays a few KB however many listings the dataset has. The serialized
+# spec is cached per dataset version and chart parameters, in memory and under
+# cache/figures/<version>/, so repeat views skip the aggregation, the Plotly
+# figure construction and validation. New data means a new version, which
+# is the only thing that invalidates a cached chart.
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from housing_data import cache_path
+
+CHART_LAYOUT = dict(
+    plot_bgcolor='white',
+    paper_bgcolor='white',
+    font=dict(family='Inter, sans-serif', size=14),
+    title_font=dict(size=20, color='#003366', family='Inter, sans-serif', weight='bold'),
+)
+
+TREND_METRICS = {
+    'Median_Price_Lakhs': 'Median Price (Lakhs)',
+    'Mean_Price_Lakhs': 'Average Price (Lakhs)',
+    'Median_Price_per_SqFt': 'Median Price per SqFt (₹)',
+    'Mean_Price_per_SqFt': 'Average Price per SqFt (₹)',
+}
+PERIOD_LABELS = {'year_built': 'Year Built', 'year': 'Year', 'month': 'Month'}
+DENSITY_BINS = 60
+DENSITY_CHUNK_ROWS = 4_000_000
+DENSITY_COLORSCALE = [[0, '#FFFFFF'], [0.15, '#9EC5E8'], [0.5, '#003366'], [1, '#FF6600']]
+
+_figures = {}
+_figures_lock = threading.Lock()
+
+
+def figure_key(chart, params):
+    blob = json.dumps({'chart': chart, 'params': params}, sort_keys=True, default=str)
+    return f"{chart}-{hashlib.sha1(blob.encode('utf-8')).hexdigest()[:12]}"
+
+
+def cached_figure(chart, version, build, **params):
+    """Figure for ``chart`` on dataset ``version``; ``build()`` runs only when no spec is cached.
+
+    The in-memory entry is a validated go.Figure, which st.plotly_chart serializes
+    without validating it again.
+    """
+    key = figure_key(chart, params)
+    with _figures_lock:
+        fig = _figures.get(version, {}).get(key)
+    if fig is not None:
+        return fig
+
+    path = cache_path("figures", version, f"{key}.json")
+    fig = None
+    if path.exists():
+        try:
+            with open(path, encoding="utf-8") as f:
+                fig = go.Figure(json.load(f))
+        except (OSError, ValueError):
+            fig = None
+    if fig is None:
+        fig = build()
+        text = fig.to_json()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}-{threading.get_ident()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    with _figures_lock:
+        # Only the current dataset version is kept in memory
+        if version not in _figures:
+            _figures.clear()
+        _figures.setdefault(version, {})[key] = fig
+    return fig
+
+
+def price_distribution_figure(df, nbins=50):
+    prices = df['Price_in_Lakhs'].to_numpy(dtype=np.float64)
+    prices = prices[np.isfinite(prices)]
+    counts, edges = np.histogram(prices, bins=nbins)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color='#FF6600',
+        hovertemplate='Price: %{customdata[0]:.1f}–%{customdata[1]:.1f} Lakhs<br>Count: %{y}<extra></extra>',
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+    ))
+    fig.update_layout(
+        title='📊 Price Distribution',
+        xaxis_title='Price_in_Lakhs',
+        yaxis_title='count',
+        bargap=0,
+        **CHART_LAYOUT
+    )
+    return fig
+
+
+def city_price_figure(df, top=10):
+    city_avg = df.groupby('City', observed=True)['Price_in_Lakhs'].mean().sort_values(ascending=False).head(top)
+    fig = px.bar(
+        x=city_avg.index.astype(str),
+        y=city_avg.values,
+        title=f'🏙️ Average Price by Top {top} Cities',
+        labels={'x': 'City', 'y': 'Average Price (Lakhs)'},
+        color=city_avg.values,
+        color_continuous_scale=[[0, '#003366'], [1, '#FF6600']]
+    )
+    fig.update_layout(showlegend=False, **CHART_LAYOUT)
+    return fig
+
+
+def bin_edges(values, nbins=DENSITY_BINS):
+    """Equal-width edges over the finite range; unit-wide bins for small integer ranges."""
+    lo, hi = float(np.nanmin(values)), float(np.nanmax(values))
+    if values.dtype.kind in 'iub' and hi - lo + 1 <= nbins:
+        return np.arange(lo - 0.5, hi + 1.5)
+    if hi == lo:
+        hi = lo + 1.0
+    return np.linspace(lo, hi, nbins + 1)
+
+
+def _bin_index(values, edges):
+    # Equal-width bins -> index by arithmetic instead of a search; the top edge joins the last bin
+    n = len(edges) - 1
+    idx = np.floor((values - edges[0]) * (n / (edges[-1] - edges[0]))).astype(np.int64)
+    idx[idx == n] = n - 1
+    return idx
+
+
+def bin_2d(x, y, x_edges, y_edges, chunk_rows=DENSITY_CHUNK_ROWS):
+    """Counts per (x bin, y bin); bincount over flattened cells, chunked so memory stays bounded."""
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    counts = np.zeros(nx * ny, dtype=np.int64)
+    for start in range(0, len(x), chunk_rows):
+        xs = np.asarray(x[start:start + chunk_rows], dtype=np.float64)
+        ys = np.asarray(y[start:start + chunk_rows], dtype=np.float64)
+        ix, iy = _bin_index(xs, x_edges), _bin_index(ys, y_edges)
+        keep = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny) & np.isfinite(xs) & np.isfinite(ys)
+        counts += np.bincount(ix[keep] * ny + iy[keep], minlength=nx * ny)
+    return counts.reshape(nx, ny)
+
+
+def density_figure(df, x, y, title, x_label, y_label, nbins=DENSITY_BINS, y_scale=1.0):
+    """Heatmap of listing counts over an x/y grid; the spec size depends on ``nbins`` only."""
+    x_values = df[x].to_numpy()
+    y_values = df[y].to_numpy() * y_scale if y_scale != 1.0 else df[y].to_numpy()
+    x_edges, y_edges = bin_edges(x_values, nbins), bin_edges(y_values, nbins)
+    counts = bin_2d(x_values, y_values, x_edges, y_edges)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts.T,
+        colorscale=DENSITY_COLORSCALE,
+        colorbar=dict(title='Listings'),
+        hovertemplate=f'{x_label}: %{{x:,.0f}}<br>{y_label}: %{{y:,.1f}}<br>Listings: %{{z:,}}<extra></extra>',
+    ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, **CHART_LAYOUT)
+    return fig
+
+
+def trend_figure(rollup, scope, key, period_type, metric):
+    """Trend line from a precomputed rollup series; no grouping over listings."""
+    series = rollup.series(scope, key, period_type)
+    # Price per sqft is stored in Lakhs; show it in rupees
+    y = series[metric] * (100000 if metric.endswith('per_SqFt') else 1)
+    label = TREND_METRICS[metric]
+    fig = px.line(
+        x=series['Period'],
+        y=y,
+        markers=True,
+        title=f"📈 {label} by {PERIOD_LABELS[period_type]} • {key if scope != 'All' else 'All Listings'}",
+        labels={'x': PERIOD_LABELS[period_type], 'y': label},
+        color_discrete_sequence=['#FF6600']
+    )
+    fig.update_traces(customdata=series['Count'], hovertemplate='%{x}: %{y:,.2f}<br>Listings: %{customdata:,}<extra></extra>')
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
@@ -0,0 +1,243 @@
+# Operational metrics for the AI-Based Real Estate Valuation System
+# A small thread-safe metrics registry (counters, gauges, histograms with labels)
+# rendered in the Prometheus text exposition format and served from a daemon
+# thread of the app process at http://127.0.0.1:9108/metrics. Set
+# VALUATION_METRICS_PORT to move it, or to 0 to turn the endpoint off.
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT_ENV = "VALUATION_METRICS_PORT"
+METRICS_ADDR_ENV = "VALUATION_METRICS_ADDR"
+DEFAULT_PORT = 9108
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SESSION_WINDOW_SECONDS = 300
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = []
+_server = None
+_server_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key, extra)} {float(value):.10g}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Gauge set explicitly, or computed at scrape time when ``callback`` is given."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.callback is None:
+            return super().samples()
+        # callback returns a value, or a {label-values tuple: value} dict for labelled gauges
+        value = self.callback()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        return [(self.name, key, (), v) for key, v in items if v is not None]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: {'counts': list(s['counts']), 'sum': s['sum'], 'count': s['count']}
+                        for key, s in self._values.items()}
+        samples = []
+        for key, state in snapshot.items():
+            for bound, count in zip(self.buckets, state['counts']):
+                samples.append((f"{self.name}_bucket", key, (('le', f"{bound:g}"),), count))
+            samples.append((f"{self.name}_bucket", key, (('le', '+Inf'),), state['count']))
+            samples.append((f"{self.name}_sum", key, (), state['sum']))
+            samples.append((f"{self.name}_count", key, (), state['count']))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+def render_metrics():
+    """All registered metrics in Prometheus text format."""
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- Process and session signals ----------
+def process_rss_bytes():
+    """Current resident set size; falls back to the peak on platforms without /proc."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return None
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def touch_session(session_id):
+    """Mark a session as active; sessions without a rerun for SESSION_WINDOW_SECONDS age out."""
+    with _sessions_lock:
+        _sessions[session_id] = time.monotonic()
+
+
+def active_sessions():
+    cutoff = time.monotonic() - SESSION_WINDOW_SECONDS
+    with _sessions_lock:
+        for session_id in [s for s, seen in _sessions.items() if seen < cutoff]:
+            del _sessions[session_id]
+        return len(_sessions)
+
+
+# ---------- Application metrics ----------
+PREDICTIONS = Counter("valuation_predictions_total", "Price estimates served", ("city", "model"))
+PREDICTION_SECONDS = Histogram("valuation_prediction_seconds", "Time to score one estimate", ("model",))
+RERUN_SECONDS = Histogram("valuation_rerun_seconds", "Wall time of one app rerun")
+LOAD_SECONDS = Gauge("valuation_load_seconds", "Duration of the last model/dataset load", ("artifact", "version"))
+CACHE_REQUESTS = Counter("valuation_cache_requests_total", "Lookups against an app cache", ("cache",))
+CACHE_MISSES = Counter("valuation_cache_misses_total", "Cache lookups that had to compute the value", ("cache",))
+
+
+def _cache_hit_ratios():
+    requests = dict((key, value) for _, key, _, value in CACHE_REQUESTS.samples())
+    misses = dict((key, value) for _, key, _, value in CACHE_MISSES.samples())
+    return {key: 1.0 - misses.get(key, 0.0) / total for key, total in requests.items() if total}
+
+
+CACHE_HIT_RATIO = Gauge("valuation_cache_hit_ratio", "Share of cache lookups served without recomputing",
+                        ("cache",), callback=_cache_hit_ratios)
+ACTIVE_SESSIONS = Gauge("valuation_active_sessions",
+                        f"Sessions with a rerun in the last {SESSION_WINDOW_SECONDS} seconds",
+                        callback=active_sessions)
+PROCESS_RSS = Gauge("valuation_process_resident_memory_bytes", "Resident memory of the app process",
+                    callback=process_rss_bytes)
+
+
+# ---------- HTTP endpoint ----------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=None, addr=None):
+    """Serve /metrics from a daemon thread once per process; returns the server or None."""
+    global _server
+    if port is None:
+        port = int(os.environ.get(METRICS_PORT_ENV, DEFAULT_PORT))
+    if not port:
+        return None
+    addr = addr or os.environ.get(METRICS_ADDR_ENV, "127.0.0.1")
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+            except OSError:
+                # Port taken (e.g. by another app process); metrics are still collected in-process
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,339 @@
+# Model compaction for the AI-Based Real Estate Valuation System
+# Export step that shrinks a trained tree ensemble before it is served:
+#   1. pack the trees into flat node arrays (forest_pack.PackedForest)
+#   2. merge identical trees and prune trees/boosting rounds within an accuracy tolerance
+#   3. downcast node arrays (float32 thresholds/values, int32 indices)
+#   4. benchmark joblib compression codecs for size vs load time
+# Pruning selects trees on one half of the validation rows; accuracy and the
+# per-row deviation from the original model are measured on the other half, and
+# the export is refused if any row moves by more than `max_change`. Those held-out
+# figures are recorded in the manifest entry as `source_parity`.
+
+import argparse
+import hashlib
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from forest_pack import ARRAY_NAMES, PackedForest, pack_model
+from model_registry import (REGISTRY_FILE, artifact_path, artifact_size, load_registered_model,
+                            register_model, resolve)
+
+DEFAULT_CODECS = [0, ('zlib', 3), ('gzip', 3), ('bz2', 3), ('lzma', 3), ('lz4', 3)]
+TRAINING_ONLY_ATTRS = ('oob_prediction_', 'oob_score_', 'oob_decision_function_', 'oob_improvement_',
+                       'oob_scores_', 'train_score_', 'estimators_samples_')
+TRAINING_ONLY_KEYS = ('X_train', 'y_train', 'X_test', 'y_test', 'training_data', 'cv_results')
+MAX_VALIDATION_ROWS = 20000
+SELECTION_SHARE = 0.5
+DEFAULT_MAX_CHANGE = 5.0
+PRUNE_ATTEMPTS = 8
+
+
+def rmse(y_true, y_pred):
+    return float(np.sqrt(np.mean((np.asarray(y_true, dtype=np.float64) - y_pred) ** 2)))
+
+
+# ---------- Tree selection ----------
+def _tree_bounds(packed):
+    starts = np.asarray(packed.roots, dtype=np.int64)
+    ends = np.append(starts[1:], packed.n_nodes)
+    return starts, ends
+
+
+def subset_trees(packed, tree_ids, weights):
+    """New PackedForest holding only ``tree_ids`` (re-indexed) with the given weights."""
+    starts, ends = _tree_bounds(packed)
+    tree_ids = np.asarray(tree_ids, dtype=np.int64)
+    sizes = ends[tree_ids] - starts[tree_ids]
+    new_starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    nodes = np.concatenate([np.arange(starts[t], ends[t]) for t in tree_ids])
+    shift = np.repeat(new_starts - starts[tree_ids], sizes)
+    arrays = {}
+    for name in ('children_left', 'children_right', 'missing'):
+        arrays[name] = (np.asarray(getattr(packed, name))[nodes] + shift).astype(np.int32)
+    for name in ('feature', 'threshold', 'value', 'cover'):
+        arrays[name] = np.asarray(getattr(packed, name))[nodes]
+    arrays['roots'] = new_starts.astype(np.int32)
+    arrays['tree_weights'] = np.asarray(weights, dtype=np.float64)
+    return PackedForest(arrays, packed.n_features, packed.max_depth, packed.base_score,
+                        packed.feature_names, packed.source_type)
+
+
+def is_averaging(packed):
+    """True for bagged ensembles (RandomForest/ExtraTrees): equal weights summing to one."""
+    weights = np.asarray(packed.tree_weights)
+    return (packed.base_score == 0.0 and np.allclose(weights, weights[0])
+            and np.isclose(weights.sum(), 1.0))
+
+
+def merge_identical_trees(packed):
+    """Collapse byte-identical trees into one tree carrying their summed weight."""
+    starts, ends = _tree_bounds(packed)
+    seen = {}
+    for t, (start, end) in enumerate(zip(starts, ends)):
+        digest = hashlib.sha1()
+        for name in ('children_left', 'children_right', 'missing'):
+            digest.update((np.asarray(getattr(packed, name)[start:end]) - start).tobytes())
+        for name in ('feature', 'threshold', 'value'):
+            digest.update(np.asarray(getattr(packed, name)[start:end]).tobytes())
+        seen.setdefault(digest.hexdigest(), []).append(t)
+    if len(seen) == packed.n_trees:
+        return packed
+    weights = np.asarray(packed.tree_weights)
+    groups = list(seen.values())
+    return subset_trees(packed, [g[0] for g in groups], [weights[g].sum() for g in groups])
+
+
+def prune_trees(packed, X_val, y_val, tolerance=0.01, max_change=None):
+    """Drop trees while validation RMSE stays within ``(1 + tolerance)`` of the full model.
+
+    With ``max_change`` no row's prediction may also move further than that from
+    the full model's. Bagged ensembles use greedy backward elimination (the
+    remaining trees are re-averaged); boosted ensembles can only lose trailing rounds.
+    """
+    y = np.asarray(y_val, dtype=np.float64)
+    tree_preds = packed.predict_trees(X_val)
+    weights = np.asarray(packed.tree_weights, dtype=np.float64)
+    full = tree_preds @ weights + packed.base_score
+    budget = rmse(y, full) * (1.0 + tolerance)
+    max_change = np.inf if max_change is None else max_change
+
+    if is_averaging(packed):
+        keep = np.ones(packed.n_trees, dtype=bool)
+        total = tree_preds.sum(axis=1)
+        while keep.sum() > 1:
+            candidates = np.flatnonzero(keep)
+            k = len(candidates)
+            without = (total[:, None] - tree_preds[:, candidates]) / (k - 1)
+            scores = np.sqrt(np.mean((without - y[:, None]) ** 2, axis=0))
+            scores[np.max(np.abs(without - full[:, None]), axis=0) > max_change] = np.inf
+            best = int(np.argmin(scores))
+            if scores[best] > budget:
+                break
+            keep[candidates[best]] = False
+            total = total - tree_preds[:, candidates[best]]
+        kept = np.flatnonzero(keep)
+        return subset_trees(packed, kept, np.full(len(kept), 1.0 / len(kept)))
+
+    staged = np.cumsum(tree_preds * weights, axis=1) + packed.base_score
+    stage_rmse = np.sqrt(np.mean((staged - y[:, None]) ** 2, axis=0))
+    stage_change = np.max(np.abs(staged - full[:, None]), axis=0)
+    n_rounds = int(np.flatnonzero((stage_rmse <= budget) & (stage_change <= max_change))[0]) + 1
+    if n_rounds == packed.n_trees:
+        return packed
+    return subset_trees(packed, np.arange(n_rounds), weights[:n_rounds])
+
+
+# ---------- Downcasting / stripping ----------
+def _floor_float32(values):
+    # Largest float32 <= value, so `x <= t32` matches `x <= t` for every float32 input
+    values = np.asarray(values, dtype=np.float64)
+    down = values.astype(np.float32)
+    too_high = down.astype(np.float64) > values
+    down[too_high] = np.nextafter(down[too_high], np.float32(-np.inf))
+    return down
+
+
+def downcast(packed):
+    arrays = {name: np.asarray(getattr(packed, name)) for name in ARRAY_NAMES}
+    for name in ('children_left', 'children_right', 'missing', 'roots'):
+        arrays[name] = arrays[name].astype(np.int32)
+    arrays['feature'] = arrays['feature'].astype(np.int16 if packed.n_features < 2**15 else np.int32)
+    arrays['threshold'] = _floor_float32(arrays['threshold'])
+    arrays['value'] = arrays['value'].astype(np.float32)
+    arrays['cover'] = arrays['cover'].astype(np.float32)
+    return PackedForest(arrays, packed.n_features, packed.max_depth, packed.base_score,
+                        packed.feature_names, packed.source_type)
+
+
+def strip_training_state(meta):
+    """Drop training-only metadata keys and fitted attributes that serving never reads."""
+    meta = {k: v for k, v in meta.items() if k not in TRAINING_ONLY_KEYS}
+    model = meta.get('model')
+    if model is not None and not isinstance(model, PackedForest):
+        for attr in TRAINING_ONLY_ATTRS:
+            if attr in getattr(model, '__dict__', {}):
+                delattr(model, attr)
+    return meta
+
+
+# ---------- Codec benchmark ----------
+def _codec_label(codec):
+    return 'none' if not codec else f"{codec[0]}-{codec[1]}"
+
+
+def compare_codecs(obj, codecs=DEFAULT_CODECS, repeats=3):
+    """Dump ``obj`` with each joblib codec; report size, dump time and best load time."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec in codecs:
+            path = Path(tmp) / f"artifact_{_codec_label(codec)}.pkl"
+            try:
+                start = time.perf_counter()
+                joblib.dump(obj, path, compress=codec)
+                dump_s = time.perf_counter() - start
+            except (ValueError, ImportError, RuntimeError) as e:
+                # e.g. lz4 not installed
+                rows.append({'codec': _codec_label(codec), 'error': str(e)})
+                continue
+            load_s = min(_timed(joblib.load, path) for _ in range(repeats))
+            rows.append({'codec': _codec_label(codec), 'size_mb': path.stat().st_size / 1024**2,
+                         'dump_s': dump_s, 'load_s': load_s})
+            path.unlink()
+        if isinstance(obj, dict) and isinstance(obj.get('model'), PackedForest):
+            pack_dir = obj['model'].save(Path(tmp) / "pack")
+            load_s = min(_timed(PackedForest.load, pack_dir) for _ in range(repeats))
+            rows.append({'codec': 'mmap', 'size_mb': artifact_size(pack_dir) / 1024**2,
+                         'dump_s': np.nan, 'load_s': load_s})
+    return pd.DataFrame(rows)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+# ---------- Compaction ----------
+def compact_model(meta, X_val, y_val, tolerance=0.01, prune=True, parity_atol=1e-3, max_change=DEFAULT_MAX_CHANGE):
+    """Return ``(compact_meta, report)`` for a metadata dict holding a tree ensemble.
+
+    Trees are selected on a random half of the validation rows; the report's
+    RMSE and ``max_abs_change`` come from the other half, and a ``max_abs_change``
+    above ``max_change`` (target units) raises ValueError.
+    """
+    model = meta['model']
+    y_val = np.asarray(y_val)
+    order = np.random.default_rng(0).permutation(len(X_val))[:MAX_VALIDATION_ROWS]
+    n_select = int(len(order) * SELECTION_SHARE) if prune else 0
+    select, hold = order[:n_select], order[n_select:]
+    X_select, y_select = X_val.iloc[select], y_val[select]
+    X_val, y_val = X_val.iloc[hold], y_val[hold]
+    original = np.asarray(model.predict(X_val), dtype=np.float64)
+    packed = pack_model(model, meta.get('feature_names'))
+    packed_bytes = packed.nbytes
+
+    exact = downcast(packed)
+    parity = float(np.max(np.abs(exact.predict(X_val) - original)))
+    if parity > parity_atol:
+        raise ValueError(f"Downcast model deviates by {parity:.3g} (> {parity_atol}); refusing to export")
+
+    merged = merge_identical_trees(packed)
+    # The bound holds on the selection rows by construction; if a held-out row still
+    # moves too far, prune again under a tighter bound (down to no pruning at all)
+    bound = max_change
+    for _ in range(PRUNE_ATTEMPTS if prune else 0):
+        compact = downcast(prune_trees(merged, X_select, y_select, tolerance, bound))
+        compact_pred = compact.predict(X_val)
+        max_abs_change = float(np.max(np.abs(compact_pred - original)))
+        if max_abs_change <= max_change:
+            break
+        bound /= 2
+    else:
+        compact = downcast(merged)
+        compact_pred = compact.predict(X_val)
+        max_abs_change = float(np.max(np.abs(compact_pred - original)))
+    if max_abs_change > max_change:
+        raise ValueError(f"Compacted model moves a held-out prediction by {max_abs_change:.3g} "
+                         f"(> {max_change}); refusing to export")
+
+    report = {
+        'model_type': type(model).__name__,
+        'trees_before': packed.n_trees,
+        'trees_after': compact.n_trees,
+        'nodes_before': packed.n_nodes,
+        'nodes_after': compact.n_nodes,
+        'array_mb_before': packed_bytes / 1024**2,
+        'array_mb_after': compact.nbytes / 1024**2,
+        'rmse_before': rmse(y_val, original),
+        'rmse_after': rmse(y_val, compact_pred),
+        'downcast_parity_max_abs_error': parity,
+        'max_abs_change': max_abs_change,
+        'selection_rows': int(len(select)),
+        'report_rows': int(len(hold)),
+    }
+    compact_meta = strip_training_state({**meta, 'model': compact})
+    compact_meta['compaction'] = report
+    return compact_meta, report
+
+
+def _print_report(report, codecs=None):
+    print("=" * 80)
+    print("MODEL COMPACTION REPORT")
+    print("=" * 80)
+    print(f"\nModel: {report['model_type']}")
+    print(f"   Trees: {report['trees_before']} → {report['trees_after']}")
+    print(f"   Nodes: {report['nodes_before']:,} → {report['nodes_after']:,}")
+    print(f"   Node arrays: {report['array_mb_before']:.2f} MB → {report['array_mb_after']:.2f} MB")
+    print(f"   Held-out RMSE ({report['report_rows']:,} rows; {report['selection_rows']:,} used for pruning): "
+          f"₹{report['rmse_before']:.4f} → ₹{report['rmse_after']:.4f} Lakhs")
+    print(f"   Downcast parity (max |Δ|): {report['downcast_parity_max_abs_error']:.3g}")
+    print(f"   Max |Δ prediction| after pruning: {report['max_abs_change']:.3g}")
+    if 'artifact_mb_before' in report:
+        print(f"\n💾 Artifact size: {report['artifact_mb_before']:.2f} MB → {report['artifact_mb_after']:.2f} MB "
+              f"({report['artifact_mb_before'] / max(report['artifact_mb_after'], 1e-9):.1f}× smaller)")
+        print(f"⏱️  Load time: {report['load_s_before'] * 1000:.1f} ms → {report['load_s_after'] * 1000:.1f} ms")
+    if codecs is not None:
+        print("\nCompression codecs:")
+        print(codecs.fillna("").to_string(index=False))
+    print("=" * 80)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact a registered tree model for serving")
+    parser.add_argument("source", help="Registered model name or alias")
+    parser.add_argument("name", help="Registry name for the compacted model")
+    parser.add_argument("--X", required=True, help="Validation feature CSV (e.g. X_test.csv)")
+    parser.add_argument("--y", required=True, help="Validation target CSV (e.g. y_test.csv)")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Allowed relative RMSE increase from pruning (default 0.01 = 1%%)")
+    parser.add_argument("--max-change", type=float, default=DEFAULT_MAX_CHANGE,
+                        help="Largest allowed per-row prediction change in Lakhs (default %(default)s)")
+    parser.add_argument("--no-prune", action="store_true", help="Only merge/downcast, keep every tree")
+    parser.add_argument("--codecs", action="store_true", help="Benchmark joblib compression codecs")
+    parser.add_argument("--alias", action="append", default=[])
+    parser.add_argument("--registry", default=str(REGISTRY_FILE))
+    args = parser.parse_args(argv)
+
+    registry_path = Path(args.registry)
+    source_name, source_entry = resolve(args.source, registry_path)
+    if source_entry is None:
+        parser.error(f"No model registered as '{args.source}'")
+    source_path = artifact_path(source_entry, registry_path)
+    load_before = _timed(load_registered_model, args.source, registry_path)
+    meta = load_registered_model(args.source, registry_path)
+
+    X_val = pd.read_csv(args.X)
+    if meta.get('feature_names'):
+        X_val = X_val.reindex(columns=meta['feature_names']).fillna(0)
+    y_val = pd.read_csv(args.y).iloc[:, 0].to_numpy()
+
+    compact_meta, report = compact_model(meta, X_val, y_val, args.tolerance, prune=not args.no_prune,
+                                         max_change=args.max_change)
+    codecs = compare_codecs(compact_meta) if args.codecs else None
+
+    # parity_max_abs_error only checks the saved artifact against the in-memory compact
+    # model; the deviation from the source model is what pruning actually costs
+    source_parity = {
+        'source': source_name,
+        'rows': report['report_rows'],
+        'max_abs_change': report['max_abs_change'],
+        'rmse_delta': report['rmse_after'] - report['rmse_before'],
+    }
+    entry = register_model(compact_meta, args.name, aliases=args.alias, registry_path=registry_path,
+                           layout="mmap", check_X=X_val, extra={'source_parity': source_parity})
+    report.update(
+        artifact_mb_before=artifact_size(source_path) / 1024**2,
+        artifact_mb_after=entry['size_bytes'] / 1024**2,
+        load_s_before=load_before,
+        load_s_after=_timed(load_registered_model, args.name, registry_path),
+    )
+    _print_report(report, codecs)
+
+
+if __name__ == "__main__":
+    main()
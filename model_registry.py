@@ -0,0 +1,322 @@
+# Model registry for the AI-Based Real Estate Valuation System
+# Keeps a small JSON manifest (models/registry.json) describing every saved model
+# artifact, so the app and tools can pick and load exactly one model by name or
+# alias instead of globbing *.pkl files and unpickling candidates until one fits.
+# Artifacts are stored either as one compressed joblib file ("joblib" layout) or
+# as an uncompressed directory that is opened with memory mapping ("mmap" layout),
+# so worker processes share the tree arrays through the OS page cache.
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from forest_pack import PackedForest, can_pack, pack_model, parity_error
+
+ROOT = Path(__file__).parent
+MODELS_DIR = ROOT / "models"
+REGISTRY_FILE = MODELS_DIR / "registry.json"
+LEGACY_MODEL_FILE = ROOT / "real_estate_model.pkl"
+DEFAULT_ALIAS = "production"
+LATEST_ALIAS = "latest"
+LAYOUTS = ("joblib", "mmap")
+
+
+# ---------- Manifest helpers ----------
+def feature_hash(feature_names):
+    """Short stable hash of the ordered feature list a model was trained on."""
+    if not feature_names:
+        return None
+    joined = "\n".join(str(f) for f in feature_names)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def load_registry(registry_path=REGISTRY_FILE):
+    registry_path = Path(registry_path)
+    if not registry_path.exists():
+        return {"models": {}, "aliases": {}}
+    with open(registry_path, encoding="utf-8") as f:
+        registry = json.load(f)
+    registry.setdefault("models", {})
+    registry.setdefault("aliases", {})
+    return registry
+
+
+def save_registry(registry, registry_path=REGISTRY_FILE):
+    # Write to a temp file and swap it in so readers never see a half-written manifest
+    registry_path = Path(registry_path)
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = registry_path.with_name(f"{registry_path.name}.tmp{os.getpid()}-{threading.get_ident()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, registry_path)
+
+
+def as_metadata(obj):
+    """Normalise a loaded artifact to the metadata dict the app expects."""
+    if isinstance(obj, dict) and 'model' in obj:
+        return obj
+    return {'model': obj, 'feature_names': None, 'target_name': None}
+
+
+def artifact_size(path):
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else None
+
+
+def describe_artifact(meta, artifact_path, registry_dir, metrics=None, layout="joblib"):
+    model = meta.get('model')
+    feature_names = meta.get('feature_names') or []
+    artifact_path = Path(artifact_path)
+    try:
+        rel_path = Path(os.path.relpath(artifact_path.resolve(), Path(registry_dir).resolve())).as_posix()
+    except ValueError:
+        # e.g. artifact on another drive on Windows
+        rel_path = str(artifact_path.resolve())
+    trained_at = meta.get('trained_at')
+    if trained_at is None and artifact_path.exists():
+        trained_at = datetime.fromtimestamp(artifact_path.stat().st_mtime).isoformat()
+    return {
+        'path': rel_path,
+        'layout': layout,
+        'model_type': meta.get('model_type') or type(model).__name__,
+        'model_name': meta.get('model_name') or type(model).__name__,
+        'target_name': meta.get('target_name'),
+        'n_features': len(feature_names),
+        'feature_hash': feature_hash(feature_names),
+        'metrics': {k: float(v) for k, v in (metrics or meta.get('metrics') or {}).items()},
+        'size_bytes': artifact_size(artifact_path),
+        'trained_at': str(trained_at) if trained_at is not None else None,
+        'registered_at': datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _record(registry_path, name, entry, aliases):
+    registry = load_registry(registry_path)
+    registry['models'][name] = entry
+    for alias in aliases:
+        registry['aliases'][alias] = name
+    registry['aliases'][LATEST_ALIAS] = name
+    registry['aliases'].setdefault(DEFAULT_ALIAS, name)
+    save_registry(registry, registry_path)
+    return entry
+
+
+def _save_mmap_artifact(meta, directory):
+    # Uncompressed layout: tree ensembles become a PackedForest of .npy arrays and
+    # everything else goes into an uncompressed joblib file (numpy arrays inside it
+    # are memory-mapped too when loaded with mmap_mode='r').
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+    rest = dict(meta)
+    model = meta.get('model')
+    if can_pack(model):
+        packed = pack_model(model, meta.get('feature_names'))
+        packed.save(directory / "forest")
+        rest.update(model=None, packed_model="forest", model_type=type(model).__name__)
+    joblib.dump(rest, directory / "meta.pkl", compress=0)
+    return directory
+
+
+def _load_artifact(path, layout):
+    if layout == "mmap":
+        meta = as_metadata(joblib.load(path / "meta.pkl", mmap_mode="r"))
+        if meta.get('packed_model'):
+            meta['model'] = PackedForest.load(path / meta['packed_model'], mmap_mode="r")
+        return meta
+    return as_metadata(joblib.load(path))
+
+
+# ---------- Public API ----------
+def register_model(meta, name, metrics=None, aliases=(), registry_path=REGISTRY_FILE, compress=3,
+                   layout="joblib", check_X=None, extra=None):
+    """Save a model (or metadata dict) under models/ and record it in the manifest.
+
+    ``layout="mmap"`` writes the uncompressed, memory-mappable layout. When
+    ``check_X`` is given the saved artifact is reloaded and its predictions are
+    compared against the in-memory model. ``extra`` fields (intervals, fences, ...)
+    go into the entry in the same manifest write that points the aliases at it.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}', expected one of {LAYOUTS}")
+    registry_path = Path(registry_path)
+    meta = {k: v for k, v in as_metadata(meta).items() if k not in ('registry_name', 'registry_entry')}
+    if metrics:
+        meta['metrics'] = dict(metrics)
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+    if layout == "mmap":
+        artifact_path = _save_mmap_artifact(meta, registry_path.parent / name)
+    else:
+        artifact_path = registry_path.parent / f"{name}.pkl"
+        joblib.dump(meta, artifact_path, compress=compress)
+    entry = describe_artifact(meta, artifact_path, registry_path.parent, metrics, layout)
+    if check_X is not None:
+        reloaded = _load_artifact(artifact_path, layout)
+        entry['parity_max_abs_error'] = parity_error(meta['model'], reloaded['model'], check_X)
+    entry.update(extra or {})
+    return _record(registry_path, name, entry, aliases)
+
+
+def register_existing(artifact_path, name, metrics=None, aliases=(), registry_path=REGISTRY_FILE):
+    """Record an artifact that is already on disk (loads it once to describe it)."""
+    meta = as_metadata(joblib.load(artifact_path))
+    entry = describe_artifact(meta, artifact_path, Path(registry_path).parent, metrics)
+    return _record(registry_path, name, entry, aliases)
+
+
+def resolve(name_or_alias=None, registry_path=REGISTRY_FILE):
+    """Return ``(name, entry)`` for a model name or alias, or ``(None, None)``."""
+    registry = load_registry(registry_path)
+    key = name_or_alias or DEFAULT_ALIAS
+    name = registry['aliases'].get(key, key)
+    entry = registry['models'].get(name)
+    if entry is None and name_or_alias is None and len(registry['models']) == 1:
+        name, entry = next(iter(registry['models'].items()))
+    return (name, entry) if entry is not None else (None, None)
+
+
+def artifact_path(entry, registry_path=REGISTRY_FILE):
+    path = Path(entry['path'])
+    return path if path.is_absolute() else Path(registry_path).parent / path
+
+
+def load_registered_model(name_or_alias=None, registry_path=REGISTRY_FILE):
+    """Load exactly one registered model; returns its metadata dict or None."""
+    name, entry = resolve(name_or_alias, registry_path)
+    if entry is None:
+        return None
+    meta = _load_artifact(artifact_path(entry, registry_path), entry.get('layout', "joblib"))
+    meta.setdefault('model_name', entry.get('model_name'))
+    if entry.get('intervals'):
+        # Calibrated after export (prediction_intervals.py); the manifest copy is newest
+        meta['intervals'] = entry['intervals']
+    for key in ('outlier_fences', 'drift_reference'):
+        # Same for the IQR fences (outliers.py) and reference histograms (drift.py)
+        if entry.get(key):
+            meta[key] = entry[key]
+    meta['registry_name'] = name
+    meta['registry_entry'] = entry
+    return meta
+
+
+def export_model(source, name, layout="mmap", aliases=(), registry_path=REGISTRY_FILE, check_X=None):
+    """Re-save a registered model under a new name, e.g. in the mmap layout."""
+    meta = load_registered_model(source, registry_path)
+    if meta is None:
+        raise KeyError(f"No model registered as '{source}'")
+    return register_model(meta, name, aliases=aliases, registry_path=registry_path,
+                          layout=layout, check_X=check_X)
+
+
+def set_alias(alias, name, registry_path=REGISTRY_FILE):
+    registry = load_registry(registry_path)
+    if name not in registry['models']:
+        raise KeyError(f"Unknown model '{name}'")
+    registry['aliases'][alias] = name
+    save_registry(registry, registry_path)
+
+
+def remove_model(name, registry_path=REGISTRY_FILE, delete_file=False):
+    registry = load_registry(registry_path)
+    entry = registry['models'].pop(name, None)
+    if entry is None:
+        raise KeyError(f"Unknown model '{name}'")
+    registry['aliases'] = {a: n for a, n in registry['aliases'].items() if n != name}
+    save_registry(registry, registry_path)
+    if delete_file:
+        path = artifact_path(entry, registry_path)
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink(missing_ok=True)
+
+
+# ---------- CLI ----------
+def _print_models(registry):
+    aliases_by_name = {}
+    for alias, name in registry['aliases'].items():
+        aliases_by_name.setdefault(name, []).append(alias)
+    if not registry['models']:
+        print("No models registered.")
+        return
+    for name, entry in sorted(registry['models'].items()):
+        aliases = ", ".join(sorted(aliases_by_name.get(name, [])))
+        size_mb = (entry.get('size_bytes') or 0) / 1024**2
+        metrics = " ".join(f"{k}={v:.4f}" for k, v in entry.get('metrics', {}).items())
+        print(f"{name:<28} {entry['model_type']:<26} {entry.get('layout', 'joblib'):<6} {size_mb:8.2f} MB  "
+              f"features={entry['n_features']} [{entry['feature_hash']}]  {metrics}"
+              + (f"  aliases: {aliases}" if aliases else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the real estate model registry")
+    parser.add_argument("--registry", default=str(REGISTRY_FILE), help="Path to registry.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="List registered models")
+
+    p_show = sub.add_parser("show", help="Show one manifest entry")
+    p_show.add_argument("name", nargs="?", default=None)
+
+    p_reg = sub.add_parser("register", help="Register an existing artifact (default: real_estate_model.pkl)")
+    p_reg.add_argument("name")
+    p_reg.add_argument("--path", default=str(LEGACY_MODEL_FILE))
+    p_reg.add_argument("--alias", action="append", default=[])
+    p_reg.add_argument("--metric", action="append", default=[], metavar="KEY=VALUE")
+
+    p_export = sub.add_parser("export", help="Re-save a registered model in another layout")
+    p_export.add_argument("source", help="Registered name or alias to export")
+    p_export.add_argument("name", help="Name for the exported artifact")
+    p_export.add_argument("--layout", choices=LAYOUTS, default="mmap")
+    p_export.add_argument("--alias", action="append", default=[])
+    p_export.add_argument("--check", metavar="CSV", help="Feature CSV used to verify prediction parity")
+
+    p_alias = sub.add_parser("alias", help="Point an alias at a registered model")
+    p_alias.add_argument("alias")
+    p_alias.add_argument("name")
+
+    p_rm = sub.add_parser("remove", help="Remove a model from the registry")
+    p_rm.add_argument("name")
+    p_rm.add_argument("--delete-file", action="store_true")
+
+    args = parser.parse_args(argv)
+    registry_path = Path(args.registry)
+
+    if args.command == "list":
+        _print_models(load_registry(registry_path))
+    elif args.command == "show":
+        name, entry = resolve(args.name, registry_path)
+        if entry is None:
+            parser.error(f"No model registered as '{args.name or DEFAULT_ALIAS}'")
+        print(json.dumps({name: entry}, indent=2))
+    elif args.command == "register":
+        metrics = {}
+        for item in args.metric:
+            key, _, value = item.partition("=")
+            metrics[key] = float(value)
+        entry = register_existing(args.path, args.name, metrics=metrics, aliases=args.alias,
+                                  registry_path=registry_path)
+        print(json.dumps({args.name: entry}, indent=2))
+    elif args.command == "export":
+        check_X = pd.read_csv(args.check) if args.check else None
+        entry = export_model(args.source, args.name, layout=args.layout, aliases=args.alias,
+                             registry_path=registry_path, check_X=check_X)
+        print(json.dumps({args.name: entry}, indent=2))
+    elif args.command == "alias":
+        set_alias(args.alias, args.name, registry_path)
+    elif args.command == "remove":
+        remove_model(args.name, registry_path, delete_file=args.delete_file)
+
+
+if __name__ == "__main__":
+    main()
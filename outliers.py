@@ -0,0 +1,126 @@
+# Outlier fences for the AI-Based Real Estate Valuation System
+# Tukey IQR fences (Q1 - k·IQR, Q3 + k·IQR) for every column at once: one
+# vectorized quantile pass over the column matrix instead of a quantile call and a
+# filtered DataFrame copy per column. Fences computed on the training features are
+# stored with the model, next to its prediction intervals, so inference only
+# compares each row against two arrays (O(features) per row) to flag valuations
+# requested far outside what the model has seen.
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from model_registry import REGISTRY_FILE, load_registered_model, load_registry, resolve, save_registry
+
+DEFAULT_K = 1.5
+
+
+def _matrix(X, columns):
+    return np.column_stack([pd.to_numeric(X[c], errors='coerce').to_numpy(dtype=np.float64) for c in columns])
+
+
+def compute_fences(X, columns=None, k=DEFAULT_K):
+    """IQR fences for ``columns`` of ``X`` (default: all numeric columns) in one quantile pass."""
+    if columns is None:
+        columns = [c for c in X.columns if pd.api.types.is_numeric_dtype(X[c])]
+    columns = [str(c) for c in columns]
+    if not len(X) or not columns:
+        raise ValueError("Need at least one row and one numeric column to compute fences")
+    q1, q3 = np.nanquantile(_matrix(X, columns), [0.25, 0.75], axis=0)
+    iqr = q3 - q1
+    return {
+        'method': 'iqr',
+        'k': float(k),
+        'n_reference': int(len(X)),
+        'columns': columns,
+        'q1': q1.tolist(),
+        'q3': q3.tolist(),
+        'lower': (q1 - k * iqr).tolist(),
+        'upper': (q3 + k * iqr).tolist(),
+    }
+
+
+def flag_outliers(X, fences):
+    """Per-row anomaly flags against stored ``fences``.
+
+    Returns a DataFrame aligned with ``X`` holding ``Anomaly`` (any fenced column
+    outside its range), ``Anomaly_Score`` (largest distance past a fence, in IQRs)
+    and ``Anomaly_Columns``. Fenced columns missing from ``X`` are not checked.
+    """
+    columns = [c for c in fences['columns'] if c in X.columns]
+    idx = [fences['columns'].index(c) for c in columns]
+    result = pd.DataFrame({'Anomaly': False, 'Anomaly_Score': 0.0, 'Anomaly_Columns': ''}, index=X.index)
+    if not columns or not len(X):
+        return result
+
+    values = _matrix(X, columns)
+    lower = np.asarray(fences['lower'], dtype=np.float64)[idx]
+    upper = np.asarray(fences['upper'], dtype=np.float64)[idx]
+    iqr = np.asarray(fences['q3'], dtype=np.float64)[idx] - np.asarray(fences['q1'], dtype=np.float64)[idx]
+    # Distance past the nearer fence in IQR units; constant columns (IQR 0) score any deviation as 1
+    beyond = np.maximum(lower - values, values - upper)
+    outside = beyond > 0
+    score = np.divide(beyond, iqr, out=outside.astype(np.float64), where=outside & (iqr > 0))
+
+    flagged = outside.any(axis=1)
+    result['Anomaly'] = flagged
+    result['Anomaly_Score'] = score.max(axis=1)
+    if flagged.any():
+        names = np.array(columns, dtype=object)
+        result.loc[flagged, 'Anomaly_Columns'] = [', '.join(names[row]) for row in outside[flagged]]
+    return result
+
+
+def outlier_summary(df, columns, k=DEFAULT_K):
+    """Per-column outlier counts and bounds, like the notebook's IQR table, from a single pass."""
+    fences = compute_fences(df, columns, k)
+    values = _matrix(df, fences['columns'])
+    counts = ((values < np.array(fences['lower'])) | (values > np.array(fences['upper']))).sum(axis=0)
+    return pd.DataFrame({
+        'Column': fences['columns'],
+        'Outliers_Count': counts,
+        'Outliers_Percentage': [f"{c / len(df) * 100:.2f}%" for c in counts],
+        'Lower_Bound': fences['lower'],
+        'Upper_Bound': fences['upper'],
+    })
+
+
+def fit_registered(name_or_alias, X_ref, k=DEFAULT_K, registry_path=REGISTRY_FILE):
+    """Compute fences on a model's reference (training) features and record them in its manifest entry."""
+    meta = load_registered_model(name_or_alias, registry_path)
+    if meta is None:
+        raise KeyError(f"No model registered as '{name_or_alias}'")
+    fences = compute_fences(X_ref, meta.get('feature_names') or None, k)
+    name, _ = resolve(name_or_alias, registry_path)
+    registry = load_registry(registry_path)
+    registry['models'][name]['outlier_fences'] = fences
+    save_registry(registry, registry_path)
+    return fences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute IQR outlier fences and store them with a registered model")
+    parser.add_argument("name", nargs="?", default=None, help="Registered model name or alias")
+    parser.add_argument("--X", required=True, help="Reference feature CSV (normally the training features)")
+    parser.add_argument("--k", type=float, default=DEFAULT_K, help="Fence multiplier (1.5 = Tukey's inner fence)")
+    parser.add_argument("--registry", default=str(REGISTRY_FILE))
+    parser.add_argument("--summary", action="store_true", help="Only print per-column outlier counts for --X")
+    args = parser.parse_args(argv)
+
+    X_ref = pd.read_csv(args.X)
+    if args.summary:
+        columns = [c for c in X_ref.columns if pd.api.types.is_numeric_dtype(X_ref[c])]
+        print("=" * 80)
+        print("OUTLIER DETECTION - IQR METHOD")
+        print("=" * 80)
+        print("\n", outlier_summary(X_ref, columns, args.k).to_string(index=False))
+        return
+    fences = fit_registered(args.name, X_ref, args.k, Path(args.registry))
+    print(json.dumps(fences, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+# Retraining pipeline for the AI-Based Real Estate Valuation System
+# The notebook's steps (load, clean, engineer features, encode, split, train,
+# evaluate) as a small DAG of stages. Each stage's output is pickled under
+# cache/pipeline/<stage>/<key>.pkl, where the key hashes the keys of the stages
+# it depends on, its own config section, its source code (plus declared helpers)
+# and the content of any input files. A rerun therefore recomputes only the
+# stages whose inputs, config or code changed: a new hyperparameter changes the
+# train key alone, so loading, cleaning, encoding and splitting are skipped.
+# `--register NAME` records the trained model with its metrics, conformal
+# intervals, outlier fences and drift reference.
+
+import argparse
+import copy
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from housing_data import CACHE_DIR, DATA_FILE, SCHEMA, _convert, apply_schema, column_violations, load_dataset
+
+PIPELINE_DIR = CACHE_DIR / "pipeline"
+TARGET = 'Price_in_Lakhs'
+# The features the deployed model is trained on; encoded columns can be added via split.features
+MODEL_FEATURES = ['Size_in_SqFt', 'BHK', 'Year_Built', 'Floor_No', 'Total_Floors',
+                  'Age_of_Property', 'Nearby_Schools', 'Nearby_Hospitals']
+
+DEFAULT_CONFIG = {
+    'load': {'path': str(DATA_FILE)},
+    'clean': {'drop_duplicates': True, 'price_iqr_k': 3.0, 'drop_inconsistent_floors': True,
+              'current_year': 2025},
+    'features': {},
+    'encode': {'label_columns': ['Furnished_Status', 'Public_Transport_Accessibility', 'Parking_Space',
+                                 'Security', 'Facing', 'Owner_Type', 'Availability_Status',
+                                 'Floor_Position', 'Age_Category'],
+               'frequency_columns': ['State', 'City'],
+               'one_hot_columns': {'Property_Type': 'PropType'}},
+    'split': {'features': MODEL_FEATURES, 'test_size': 0.2, 'random_state': 42},
+    'train': {'model': 'random_forest', 'scale': False, 'params': {}},
+    'evaluate': {},
+}
+
+
+# ---------- Stage registry ----------
+STAGES = {}
+
+
+def stage(name, deps=(), files=(), helpers=(), fingerprint=()):
+    """Register a stage function ``fn(config, *dep_outputs)``.
+
+    ``files`` names config keys holding input paths whose content is hashed into
+    the key; ``helpers`` are functions whose source counts as part of the stage and
+    ``fingerprint`` module-level values (e.g. SCHEMA) it depends on.
+    """
+    def register(fn):
+        STAGES[name] = {'fn': fn, 'deps': tuple(deps), 'files': tuple(files), 'helpers': tuple(helpers),
+                        'fingerprint': tuple(fingerprint)}
+        return fn
+    return register
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_keys(config):
+    """Cache key of every stage for ``config``, in dependency order (no data is read)."""
+    keys = {}
+    for name, spec in STAGES.items():
+        section = config.get(name, {})
+        payload = {
+            'stage': name,
+            'config': section,
+            'deps': [keys[dep] for dep in spec['deps']],
+            'code': [inspect.getsource(fn) for fn in (spec['fn'], *spec['helpers'])],
+            'files': {key: file_digest(section[key]) for key in spec['files']},
+            'fingerprint': list(spec['fingerprint']),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        keys[name] = hashlib.sha1(encoded).hexdigest()[:16]
+    return keys
+
+
+def output_path(name, key):
+    return PIPELINE_DIR / name / f"{key}.pkl"
+
+
+def _save_output(path, output):
+    # Write then rename, so an interrupted run never leaves a truncated cache entry
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}-{threading.get_ident()}")
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _load_output(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def run_pipeline(config=None, until=None, force=(), log=print):
+    """Bring every stage up to ``until`` (default: all) up to date.
+
+    Cached outputs are only read when a stage that depends on them has to be
+    recomputed. Returns ``(keys, statuses, get)`` where ``get(name)`` loads or
+    returns a stage output.
+    """
+    config = config or DEFAULT_CONFIG
+    keys = stage_keys(config)
+    names = list(STAGES)
+    if until is not None:
+        names = names[:names.index(until) + 1]
+    outputs, statuses = {}, {}
+
+    def get(name):
+        if name not in outputs:
+            path = output_path(name, keys[name])
+            if path.exists() and name not in force:
+                outputs[name] = _load_output(path)
+            else:
+                spec = STAGES[name]
+                inputs = [get(dep) for dep in spec['deps']]
+                start = time.perf_counter()
+                outputs[name] = spec['fn'](config.get(name, {}), *inputs)
+                _save_output(path, outputs[name])
+                statuses[name] = f"recomputed in {time.perf_counter() - start:.2f}s"
+                log(f"  ⚙️ {name:<9} {keys[name]}  {statuses[name]}")
+        return outputs[name]
+
+    for name in names:
+        if output_path(name, keys[name]).exists() and name not in force:
+            statuses.setdefault(name, 'cached')
+            log(f"  ✓ {name:<9} {keys[name]}  cached")
+        else:
+            get(name)
+    return keys, statuses, get
+
+
+# ---------- Stages ----------
+@stage('load', files=('path',), helpers=(load_dataset, apply_schema, column_violations, _convert), fingerprint=(SCHEMA,))
+def load_stage(cfg):
+    df, _ = load_dataset(cfg['path'])
+    return df
+
+
+@stage('clean', deps=('load',))
+def clean_stage(cfg, df):
+    if cfg.get('drop_duplicates', True):
+        df = df.drop_duplicates()
+    k = cfg.get('price_iqr_k')
+    if k is not None:
+        # Extreme price outliers only (3×IQR by default), as in the notebook
+        q1, q3 = df[TARGET].quantile([0.25, 0.75])
+        iqr = q3 - q1
+        df = df[df[TARGET].between(q1 - k * iqr, q3 + k * iqr)]
+    if cfg.get('drop_inconsistent_floors', True):
+        df = df[df['Floor_No'] <= df['Total_Floors']]
+    df = df.copy()
+    # Derived columns are recomputed from their sources rather than trusted. Price_per_SqFt
+    # keeps the dataset's unit (Lakhs per sqft) that rollups and charts read
+    df['Price_per_SqFt'] = (df[TARGET] / df['Size_in_SqFt']).astype('float32')
+    df['Age_of_Property'] = (cfg.get('current_year', 2025) - df['Year_Built']).astype(df['Year_Built'].dtype)
+    return df.reset_index(drop=True)
+
+
+@stage('features', deps=('clean',))
+def features_stage(cfg, df):
+    df = df.copy()
+    df['Price_per_BHK'] = df[TARGET] / df['BHK']
+    df['Area_per_BHK'] = df['Size_in_SqFt'] / df['BHK']
+    floor, total = df['Floor_No'], df['Total_Floors']
+    df['Floor_Position'] = np.select(
+        [floor == 1, floor == total, floor <= total // 3, floor <= 2 * total // 3],
+        ['Ground', 'Top', 'Lower', 'Middle'], default='Upper')
+    df['Age_Category'] = pd.cut(df['Age_of_Property'], [-np.inf, 5, 10, 20, np.inf],
+                                labels=['New', 'Recent', 'Moderate', 'Old']).astype(str)
+    df['Amenity_Count'] = df['Amenities'].astype(str).str.count(',') + 1
+    df['Total_Nearby_Facilities'] = df['Nearby_Schools'].astype(int) + df['Nearby_Hospitals'].astype(int)
+    df['Has_Premium_Features'] = (df['Security'] & df['Parking_Space']).astype(int)
+    return df
+
+
+@stage('encode', deps=('features',))
+def encode_stage(cfg, df):
+    df = df.copy()
+    for col in cfg.get('label_columns', []):
+        # Sorted categories give the same codes as sklearn's LabelEncoder
+        df[f'{col}_Encoded'] = pd.Categorical(df[col].astype(str)).codes.astype('int16')
+    for col in cfg.get('frequency_columns', []):
+        df[f'{col}_Frequency'] = df[col].map(df[col].value_counts()).astype(int)
+    one_hot = cfg.get('one_hot_columns', {})
+    if one_hot:
+        df = pd.get_dummies(df, columns=list(one_hot), prefix=list(one_hot.values()), dtype=int)
+    return df
+
+
+@stage('split', deps=('encode',))
+def split_stage(cfg, df):
+    from sklearn.model_selection import train_test_split
+
+    missing = [c for c in cfg['features'] if c not in df.columns]
+    if missing:
+        raise KeyError(f"Unknown feature columns: {missing}")
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[cfg['features']], df[TARGET], test_size=cfg.get('test_size', 0.2),
+        random_state=cfg.get('random_state', 42))
+    return {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test}
+
+
+def _estimator(kind, params):
+    # Notebook settings per model kind; config params override them
+    if kind == 'linear':
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression(**params)
+    if kind == 'decision_tree':
+        from sklearn.tree import DecisionTreeRegressor
+        return DecisionTreeRegressor(**{'max_depth': 10, 'random_state': 42, **params})
+    if kind == 'random_forest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(**{'n_estimators': 100, 'max_depth': 15, 'min_samples_split': 5,
+                                        'random_state': 42, 'n_jobs': -1, **params})
+    if kind == 'gradient_boosting':
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(**{'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 5,
+                                            'random_state': 42, **params})
+    if kind == 'xgboost':
+        import xgboost as xgb
+        return xgb.XGBRegressor(**{'n_estimators': 200, 'learning_rate': 0.1, 'random_state': 42,
+                                   'verbosity': 0, **params})
+    raise ValueError(f"Unknown model kind '{kind}'")
+
+
+@stage('train', deps=('split',), helpers=(_estimator,))
+def train_stage(cfg, split):
+    model = _estimator(cfg['model'], cfg.get('params', {}))
+    if cfg.get('scale'):
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        model = make_pipeline(StandardScaler(), model)
+    start = time.perf_counter()
+    model.fit(split['X_train'], split['y_train'])
+    return {
+        'model': model,
+        'feature_names': list(split['X_train'].columns),
+        'target_name': TARGET,
+        'model_name': cfg['model'],
+        'training_seconds': time.perf_counter() - start,
+        'trained_at': datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+@stage('evaluate', deps=('split', 'train'))
+def evaluate_stage(cfg, split, meta):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    metrics = {}
+    for part in ('train', 'test'):
+        y, pred = split[f'y_{part}'], meta['model'].predict(split[f'X_{part}'])
+        metrics[f'{part}_rmse'] = float(np.sqrt(mean_squared_error(y, pred)))
+        metrics[f'{part}_mae'] = float(mean_absolute_error(y, pred))
+        metrics[f'{part}_r2'] = float(r2_score(y, pred))
+    metrics['training_seconds'] = float(meta['training_seconds'])
+    return metrics
+
+
+# ---------- Registration ----------
+def register_run(name, keys, get, aliases=(), layout="joblib"):
+    """Register the trained model with metrics, intervals, fences and drift reference.
+
+    Skipped when ``name`` is already registered from the same train key.
+    """
+    from drift import reference_histograms
+    from model_registry import load_registry, register_model
+    from outliers import compute_fences
+    from prediction_intervals import conformal_quantiles
+
+    registry = load_registry()
+    existing = registry['models'].get(name, {})
+    if existing.get('pipeline', {}).get('train') == keys['train']:
+        return False
+    meta, split, metrics = get('train'), get('split'), get('evaluate')
+    # Computed from the in-memory model rather than reloading the artifact once per
+    # statistic: the held-out split calibrates the intervals, the training features
+    # are the fence and drift reference. All of it lands in the same manifest write
+    # that points the aliases at the new entry.
+    features = meta['feature_names']
+    extra = {
+        'intervals': conformal_quantiles(split['y_test'], meta['model'].predict(split['X_test'])),
+        'outlier_fences': compute_fences(split['X_train'], features),
+        'drift_reference': reference_histograms(split['X_train'], features),
+        'pipeline': dict(keys),
+    }
+    register_model(meta, name, metrics=metrics, aliases=aliases, layout=layout,
+                   check_X=split['X_test'].head(1000), extra=extra)
+    return True
+
+
+# ---------- CLI ----------
+def _set(config, assignment):
+    # "train.params.n_estimators=200" -> config['train']['params']['n_estimators'] = 200
+    path, _, raw = assignment.partition("=")
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = raw
+    *parents, leaf = path.split(".")
+    if not parents or parents[0] not in STAGES:
+        raise KeyError(f"'{path}' does not start with a stage name ({', '.join(STAGES)})")
+    section = config
+    for part in parents:
+        section = section.setdefault(part, {})
+    section[leaf] = value
+
+
+def build_config(config_file=None, assignments=()):
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if config_file:
+        with open(config_file, encoding='utf-8') as f:
+            for name, section in json.load(f).items():
+                config.setdefault(name, {}).update(section)
+    for assignment in assignments:
+        _set(config, assignment)
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the cached retraining pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("run", "Recompute out-of-date stages"), ("status", "Show which stages are cached")):
+        p = sub.add_parser(command, help=help_text)
+        p.add_argument("--config", help="JSON file with per-stage config overrides")
+        p.add_argument("--set", action="append", default=[], metavar="STAGE.KEY=VALUE",
+                       help="Override one setting, e.g. train.params.n_estimators=200")
+        if command == "run":
+            p.add_argument("--until", choices=list(STAGES), help="Stop after this stage")
+            p.add_argument("--force", action="append", default=[], choices=list(STAGES),
+                           help="Recompute this stage even if cached")
+            p.add_argument("--register", metavar="NAME", help="Register the trained model under this name")
+            p.add_argument("--alias", action="append", default=[], help="Alias(es) to point at the registered model")
+            p.add_argument("--layout", default="joblib", choices=("joblib", "mmap"))
+    args = parser.parse_args(argv)
+    config = build_config(args.config, args.set)
+
+    print("=" * 80)
+    print("RETRAINING PIPELINE")
+    print("=" * 80)
+    if args.command == "status":
+        for name, key in stage_keys(config).items():
+            cached = output_path(name, key).exists()
+            print(f"  {'✓' if cached else '✗'} {name:<9} {key}  {'cached' if cached else 'out of date'}")
+        return
+
+    start = time.perf_counter()
+    keys, statuses, get = run_pipeline(config, args.until, set(args.force))
+    recomputed = [name for name, status in statuses.items() if status != 'cached']
+    print(f"\n⏱️ {len(recomputed)} of {len(statuses)} stages recomputed in {time.perf_counter() - start:.2f}s")
+    if 'evaluate' in statuses:
+        metrics = get('evaluate')
+        print(f"\n📊 {config['train']['model']} — test RMSE ₹{metrics['test_rmse']:.2f} Lakhs, "
+              f"MAE ₹{metrics['test_mae']:.2f} Lakhs, R² {metrics['test_r2']:.4f}")
+    if args.register:
+        if 'evaluate' not in statuses:
+            parser.error("--register needs the pipeline to run through 'evaluate'")
+        if register_run(args.register, keys, get, args.alias, args.layout):
+            print(f"\n📦 Registered as '{args.register}'")
+        else:
+            print(f"\n📦 '{args.register}' is already registered from this train key")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# On-demand rerun profiling for the AI-Based Real Estate Valuation System
+# Wraps one Streamlit rerun in cProfile when asked to, either with the ?profile=1
+# query parameter for a single browser session or with VALUATION_PROFILE=1 for
+# every session. Each profile is saved as a .prof file (open it with snakeviz or
+# `python -m pstats`), and the hottest functions are returned for display.
+# When profiling is off, the context manager only yields None, so there is no
+# per-call overhead.
+
+import cProfile
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).parent
+PROFILE_DIR = Path(os.environ.get("VALUATION_PROFILE_DIR", ROOT / "profiles"))
+PROFILE_ENV = "VALUATION_PROFILE"
+PROFILE_PARAM = "profile"
+DEFAULT_TOP_N = 25
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def profiling_enabled(query_params=None):
+    """True when the environment variable or the ``profile`` query parameter asks for it."""
+    if os.environ.get(PROFILE_ENV, '').lower() in TRUE_VALUES:
+        return True
+    value = (query_params or {}).get(PROFILE_PARAM)
+    if isinstance(value, list):
+        value = value[-1] if value else None
+    return str(value).lower() in TRUE_VALUES
+
+
+class RerunProfile:
+    """Result of one profiled rerun: saved path, wall time and the stats object."""
+
+    def __init__(self):
+        self.path = None
+        self.elapsed_ms = None
+        self.stats = None
+
+    def top_functions(self, n=DEFAULT_TOP_N, sort='cumulative'):
+        """The ``n`` most expensive functions as a DataFrame."""
+        if self.stats is None:
+            return pd.DataFrame()
+        rows = []
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in self.stats.stats.items():
+            rows.append({
+                'Function': func,
+                'Location': f"{Path(filename).name}:{line}",
+                'Calls': calls,
+                'Own_ms': tottime * 1000,
+                'Cumulative_ms': cumtime * 1000,
+            })
+        column = 'Cumulative_ms' if sort == 'cumulative' else 'Own_ms'
+        return pd.DataFrame(rows).sort_values(column, ascending=False).head(n).reset_index(drop=True)
+
+
+@contextmanager
+def profile_rerun(enabled, directory=PROFILE_DIR, label="rerun"):
+    """Profile the enclosed block when ``enabled``; yields a RerunProfile or None."""
+    if not enabled:
+        yield None
+        return
+    result = RerunProfile()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this process (Python 3.12+ allows only one)
+        yield None
+        return
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        result.path = directory / f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(result):x}.prof"
+        profiler.dump_stats(result.path)
+        result.stats = pstats.Stats(profiler)
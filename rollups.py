@@ -0,0 +1,242 @@
+# Time-trend rollups for the AI-Based Real Estate Valuation System
+# Keeps mergeable aggregates (count, price sums and fixed log-spaced histograms)
+# per scope (all listings, each State, each City) and period. Periods are
+# Year_Built cohorts, plus calendar years and months when the data carries a
+# listing date. Aggregates only ever add up, so rows appended to the CSV are
+# folded in by reading just the new bytes, and trend charts read small series
+# instead of grouping or date-parsing the full frame.
+# Medians come from the histograms and are accurate to about one bin (2.3%).
+
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from housing_data import CACHE_DIR, DATA_FILE
+
+ROLLUP_FILE = CACHE_DIR / "rollups" / "trends.npz"
+ROLLUP_FORMAT_VERSION = 1
+DATE_COLUMNS = ('Listing_Date', 'Sale_Date', 'Date')
+SCOPES = (('All', None), ('State', 'State'), ('City', 'City'))
+PRICE_EDGES = np.geomspace(0.1, 1e5, 601)       # Lakhs
+PPSF_EDGES = np.geomspace(1e-4, 100, 601)       # Lakhs per sqft
+READ_BLOCK_BYTES = 32 * 1024 * 1024
+TAIL_CHECK_BYTES = 4096
+ALL_KEY = 'All'
+
+
+def _hist_bins(values, edges):
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+
+def _hist_median(hist, edges):
+    counts = hist.sum(axis=1)
+    cumulative = hist.cumsum(axis=1)
+    idx = (cumulative < (counts / 2)[:, None]).sum(axis=1)
+    idx = np.minimum(idx, hist.shape[1] - 1)
+    medians = np.sqrt(edges[idx] * edges[idx + 1])
+    return np.where(counts > 0, medians, np.nan)
+
+
+class TrendRollup:
+    """Mergeable count/sum/histogram cells keyed by (scope, key, period type, period)."""
+
+    def __init__(self, cells=None, count=None, price_sum=None, ppsf_sum=None,
+                 price_hist=None, ppsf_hist=None, source=None):
+        self.cells = list(cells or [])
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        n, bins = len(self.cells), len(PRICE_EDGES) - 1
+        self.count = count if count is not None else np.zeros(n, dtype=np.int64)
+        self.price_sum = price_sum if price_sum is not None else np.zeros(n)
+        self.ppsf_sum = ppsf_sum if ppsf_sum is not None else np.zeros(n)
+        self.price_hist = price_hist if price_hist is not None else np.zeros((n, bins), dtype=np.int32)
+        self.ppsf_hist = ppsf_hist if ppsf_hist is not None else np.zeros((n, bins), dtype=np.int32)
+        self.source = source or {}
+
+    def _cell_rows(self, cells):
+        new = [c for c in cells if c not in self.index]
+        if new:
+            for cell in new:
+                self.index[cell] = len(self.cells)
+                self.cells.append(cell)
+            grow = len(new)
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+            self.price_sum = np.concatenate([self.price_sum, np.zeros(grow)])
+            self.ppsf_sum = np.concatenate([self.ppsf_sum, np.zeros(grow)])
+            self.price_hist = np.vstack([self.price_hist, np.zeros((grow, self.price_hist.shape[1]), dtype=np.int32)])
+            self.ppsf_hist = np.vstack([self.ppsf_hist, np.zeros((grow, self.ppsf_hist.shape[1]), dtype=np.int32)])
+        return np.array([self.index[c] for c in cells], dtype=np.int64)
+
+    def add(self, df):
+        """Fold a batch of listings into the rollup (vectorized per scope and period type)."""
+        price = pd.to_numeric(df['Price_in_Lakhs'], errors='coerce').to_numpy(dtype=np.float64)
+        if 'Price_per_SqFt' in df.columns:
+            ppsf = pd.to_numeric(df['Price_per_SqFt'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            ppsf = price / pd.to_numeric(df['Size_in_SqFt'], errors='coerce').to_numpy(dtype=np.float64)
+        periods = {}
+        if 'Year_Built' in df.columns:
+            periods['year_built'] = pd.to_numeric(df['Year_Built'], errors='coerce')
+        date_col = next((c for c in DATE_COLUMNS if c in df.columns), None)
+        if date_col is not None:
+            # Only this batch is parsed, once; later reruns read the stored series
+            dates = pd.to_datetime(df[date_col], errors='coerce')
+            periods['year'] = dates.dt.year
+            periods['month'] = dates.dt.strftime('%Y-%m')
+
+        valid = np.isfinite(price) & np.isfinite(ppsf)
+        price_bins = _hist_bins(price, PRICE_EDGES)
+        ppsf_bins = _hist_bins(ppsf, PPSF_EDGES)
+        n_bins = len(PRICE_EDGES) - 1
+        for period_type, period in periods.items():
+            period_ok = valid & period.notna().to_numpy()
+            period_values = period.to_numpy()[period_ok]
+            if period_type != 'month':
+                period_values = period_values.astype(np.int64)
+            for scope, column in SCOPES:
+                keys = (np.full(period_ok.sum(), ALL_KEY, dtype=object) if column is None
+                        else df[column].astype(str).to_numpy()[period_ok])
+                codes, uniques = pd.MultiIndex.from_arrays([keys, period_values]).factorize()
+                if not len(uniques):
+                    continue
+                rows = self._cell_rows([(scope, key, period_type, p) for key, p in uniques])
+                k = len(uniques)
+                self.count[rows] += np.bincount(codes, minlength=k)
+                self.price_sum[rows] += np.bincount(codes, weights=price[period_ok], minlength=k)
+                self.ppsf_sum[rows] += np.bincount(codes, weights=ppsf[period_ok], minlength=k)
+                self.price_hist[rows] += np.bincount(codes * n_bins + price_bins[period_ok],
+                                                     minlength=k * n_bins).reshape(k, n_bins).astype(np.int32)
+                self.ppsf_hist[rows] += np.bincount(codes * n_bins + ppsf_bins[period_ok],
+                                                    minlength=k * n_bins).reshape(k, n_bins).astype(np.int32)
+        return self
+
+    # ---------- Queries ----------
+    def period_types(self):
+        return sorted({cell[2] for cell in self.cells})
+
+    def keys(self, scope):
+        return sorted({cell[1] for cell in self.cells if cell[0] == scope})
+
+    def series(self, scope='All', key=ALL_KEY, period_type='year_built'):
+        """Per-period count, mean/median price and mean/median price per sqft."""
+        rows = [i for i, cell in enumerate(self.cells)
+                if cell[0] == scope and cell[1] == key and cell[2] == period_type]
+        if not rows:
+            return pd.DataFrame(columns=['Period', 'Count', 'Mean_Price_Lakhs', 'Median_Price_Lakhs',
+                                         'Mean_Price_per_SqFt', 'Median_Price_per_SqFt'])
+        rows = np.array(rows)
+        count = self.count[rows]
+        table = pd.DataFrame({
+            'Period': [self.cells[i][3] for i in rows],
+            'Count': count,
+            'Mean_Price_Lakhs': self.price_sum[rows] / count,
+            'Median_Price_Lakhs': _hist_median(self.price_hist[rows], PRICE_EDGES),
+            'Mean_Price_per_SqFt': self.ppsf_sum[rows] / count,
+            'Median_Price_per_SqFt': _hist_median(self.ppsf_hist[rows], PPSF_EDGES),
+        })
+        return table.sort_values('Period').reset_index(drop=True)
+
+    # ---------- Persistence ----------
+    def save(self, path=ROLLUP_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {'format_version': ROLLUP_FORMAT_VERSION, 'cells': self.cells, 'source': self.source}
+        # App reruns and the refresh_rollups job save from threads of one process
+        tmp_path = path.with_name(f"{path.stem}.tmp{os.getpid()}-{threading.get_ident()}.npz")
+        np.savez(tmp_path, meta=np.array(json.dumps(meta, default=int)), count=self.count,
+                 price_sum=self.price_sum, ppsf_sum=self.ppsf_sum,
+                 price_hist=self.price_hist, ppsf_hist=self.ppsf_hist)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=ROLLUP_FILE):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format_version') != ROLLUP_FORMAT_VERSION:
+                raise ValueError("Stale rollup format")
+            cells = [tuple(c) for c in meta['cells']]
+            return cls(cells, data['count'], data['price_sum'], data['ppsf_sum'],
+                       data['price_hist'], data['ppsf_hist'], meta['source'])
+
+
+# ---------- Incremental refresh from the CSV ----------
+def _tail_hash(path, offset):
+    with open(path, 'rb') as f:
+        f.seek(max(0, offset - TAIL_CHECK_BYTES))
+        return hashlib.sha1(f.read(offset - max(0, offset - TAIL_CHECK_BYTES))).hexdigest()
+
+
+def _complete_size(path):
+    """File size up to and including the last newline, so a half-written row is left for later."""
+    size = Path(path).stat().st_size
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+    return size - (len(tail) - tail.rfind(b'\n') - 1) if b'\n' in tail else 0
+
+
+def refresh_rollups(path=DATA_FILE, rollup_path=ROLLUP_FILE, block_bytes=READ_BLOCK_BYTES):
+    """Bring the rollup up to date with ``path``, reading only bytes appended since last time.
+
+    Falls back to a full rebuild when the file was rewritten rather than appended to.
+    Returns ``(rollup, rows_added)``.
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+    header = header_line.decode('utf-8').strip().split(',')
+    end = _complete_size(path)
+
+    rollup = None
+    if Path(rollup_path).exists():
+        try:
+            rollup = TrendRollup.load(rollup_path)
+        except (ValueError, OSError, KeyError):
+            rollup = None
+    source = rollup.source if rollup is not None else {}
+    appended = (rollup is not None and source.get('path') == str(path.resolve())
+                and source.get('header') == header and source.get('offset', 0) <= end
+                and source.get('tail_sha1') == _tail_hash(path, source['offset']))
+    if not appended:
+        rollup = TrendRollup()
+        start, rows_before = len(header_line), 0
+    else:
+        start, rows_before = source['offset'], source['rows']
+    if start >= end and appended:
+        return rollup, 0
+
+    usecols = [c for c in header if c in ('State', 'City', 'Year_Built', 'Price_in_Lakhs',
+                                          'Price_per_SqFt', 'Size_in_SqFt') + DATE_COLUMNS]
+    rows_added = 0
+    reader = _read_range(path, header, usecols, start, end, block_bytes)
+    for chunk in reader:
+        rollup.add(chunk)
+        rows_added += len(chunk)
+
+    rollup.source = {'path': str(path.resolve()), 'header': header, 'offset': end,
+                     'rows': rows_before + rows_added, 'tail_sha1': _tail_hash(path, end)}
+    rollup.save(rollup_path)
+    return rollup, rows_added
+
+
+def _read_range(path, header, usecols, start, end, block_bytes):
+    # Stream [start, end) in blocks cut at line boundaries; end always falls after a newline
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position, carry = start, b''
+        while position < end:
+            block = f.read(min(block_bytes, end - position))
+            if not block:
+                break
+            position += len(block)
+            block = carry + block
+            cut = block.rfind(b'\n') + 1
+            block, carry = block[:cut], block[cut:]
+            if block:
+                yield pd.read_csv(io.BytesIO(block), names=header, header=None, usecols=usecols)
@@ -0,0 +1,69 @@
+# What-if scenario engine for the AI-Based Real Estate Valuation System
+# Expands the current form input and a sweep specification (numeric ranges,
+# amenity toggles, alternative cities, ...) into one scenario grid, then scores
+# the whole grid with a single batched model call instead of one rerun and one
+# predict() per scenario.
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_ALIASES, PROPERTY_TYPE_PREFIX, to_feature_frame
+from prediction_intervals import predict_with_interval
+
+MAX_SCENARIOS = 5000
+
+
+def affects_model(column, feature_names):
+    """Whether input ``column`` reaches the model (directly, via an alias, or one-hot encoded)."""
+    if not feature_names:
+        return True
+    if column in feature_names or FEATURE_ALIASES.get(column) in feature_names:
+        return True
+    return column == 'Property_Type' and any(f.startswith(PROPERTY_TYPE_PREFIX) for f in feature_names)
+
+
+def build_scenario_grid(base_input, sweep):
+    """Cartesian product of ``sweep`` (column -> values) over the fixed ``base_input``.
+
+    Columns not in ``sweep`` keep their base value. The grid is materialized with
+    index arithmetic rather than a Python loop over combinations.
+    """
+    sweep = {k: list(v) for k, v in sweep.items() if len(v)}
+    sizes = [len(v) for v in sweep.values()]
+    n_rows = int(np.prod(sizes)) if sizes else 1
+    if n_rows > MAX_SCENARIOS:
+        raise ValueError(f"{n_rows:,} scenarios requested; the limit is {MAX_SCENARIOS:,}")
+    grid = pd.DataFrame(index=pd.RangeIndex(n_rows))
+    for col, value in base_input.items():
+        if col not in sweep:
+            grid[col] = value
+    if sweep:
+        positions = np.unravel_index(np.arange(n_rows), sizes)
+        for (col, values), pos in zip(sweep.items(), positions):
+            grid[col] = np.asarray(values, dtype=object if isinstance(values[0], str) else None)[pos]
+    return grid
+
+
+def score_scenarios(model, grid, feature_names, intervals=None, base_prediction=None):
+    """Score every scenario in one model call; adds price, range and delta columns."""
+    X = to_feature_frame(grid, feature_names)
+    point, lower, upper, _ = predict_with_interval(model, X, intervals)
+    scored = grid.copy()
+    scored['Predicted_Price_Lakhs'] = point
+    if lower is not None:
+        scored['Lower_Lakhs'] = lower
+        scored['Upper_Lakhs'] = upper
+    if base_prediction is not None:
+        scored['Change_vs_Current_Lakhs'] = point - base_prediction
+    return scored
+
+
+def scenario_labels(grid, sweep_columns, exclude=()):
+    """Readable label per row from the swept columns (except ``exclude``), for chart legends."""
+    labels = None
+    for col in sweep_columns:
+        if col in exclude:
+            continue
+        part = f"{col}=" + grid[col].astype(str)
+        labels = part if labels is None else labels + " • " + part
+    return labels if labels is not None else pd.Series("Current", index=grid.index)
@@ -0,0 +1,231 @@
+# Shadow evaluation for the AI-Based Real Estate Valuation System
+# A candidate model (the registry alias "shadow", or VALUATION_SHADOW) sees a copy
+# of every live valuation input. The copy is handed to a bounded queue and scored
+# by a daemon worker thread, which also loads the candidate artifact, so the
+# user-facing request never waits on the candidate; when the queue is full the
+# copy is dropped and counted instead.
+# Each comparison (inputs, both estimates, both latencies) is appended to
+# cache/shadow/<primary>__<candidate>.jsonl, and shadow_report() summarises
+# disagreement and the latency delta before the candidate is promoted.
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import to_feature_frame
+from housing_data import CACHE_DIR
+from metrics import Counter
+from model_registry import load_registered_model, resolve
+from prediction_intervals import predict_with_interval
+
+SHADOW_ALIAS = "shadow"
+SHADOW_ENV = "VALUATION_SHADOW"
+SHADOW_DIR = CACHE_DIR / "shadow"
+QUEUE_SIZE = 1000
+AGREEMENT_PCT = 5.0
+
+SHADOW_PREDICTIONS = Counter("valuation_shadow_predictions_total", "Inputs scored by the shadow model",
+                             ("primary", "candidate"))
+SHADOW_DROPPED = Counter("valuation_shadow_dropped_total", "Inputs not shadowed because the queue was full",
+                         ("primary", "candidate"))
+
+
+def shadow_log_path(primary, candidate):
+    return SHADOW_DIR / f"{primary}__{candidate}.jsonl"
+
+
+class ShadowEvaluator:
+    """Scores copies of live inputs with a candidate model on a background thread."""
+
+    def __init__(self, primary, candidate, load_candidate, log_path=None, queue_size=QUEUE_SIZE):
+        # load_candidate() returns the candidate's metadata; it runs on the worker thread
+        self.primary = primary
+        self.candidate = candidate
+        self.meta = None
+        self._load_candidate = load_candidate
+        self.log_path = log_path or shadow_log_path(primary, candidate)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._worker = threading.Thread(target=self._run, name=f"shadow-{candidate}", daemon=True)
+        self._worker.start()
+
+    def submit(self, rows, primary_pred, primary_ms):
+        """Queue a copy of ``rows`` (raw inputs) with the primary's estimates; never blocks.
+
+        ``primary_ms`` must time ``predict_with_interval`` on the feature frame, which
+        is what the candidate is timed on.
+        """
+        item = (time.time(), rows.copy(), np.asarray(primary_pred, dtype=np.float64).copy(), float(primary_ms))
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            SHADOW_DROPPED.inc(primary=self.primary, candidate=self.candidate)
+            return False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._evaluate(*item)
+            except Exception as e:
+                # A failing candidate must not take the worker down; record the error instead
+                self._write([{'ts': item[0], 'primary': self.primary, 'candidate': self.candidate,
+                              'error': f"{type(e).__name__}: {e}"}])
+            finally:
+                self._queue.task_done()
+
+    def _evaluate(self, ts, rows, primary_pred, primary_ms):
+        if self.meta is None:
+            meta = self._load_candidate()
+            if meta is None:
+                raise KeyError(f"Candidate '{self.candidate}' is not registered")
+            self.meta = meta
+        X = to_feature_frame(rows, self.meta.get('feature_names') or list(rows.columns))
+        # Timed exactly like the primary: the point-and-range call the app makes, on a ready frame
+        start = time.perf_counter()
+        shadow_pred, _, _, _ = predict_with_interval(self.meta['model'], X, self.meta.get('intervals'))
+        shadow_ms = (time.perf_counter() - start) * 1000
+        inputs = rows.to_dict(orient='records')
+        self._write([{
+            'ts': ts,
+            'primary': self.primary,
+            'candidate': self.candidate,
+            'primary_pred': float(p),
+            'shadow_pred': float(s),
+            'primary_ms': primary_ms,
+            'shadow_ms': shadow_ms,
+            'inputs': record,
+        } for p, s, record in zip(primary_pred, shadow_pred, inputs)])
+        SHADOW_PREDICTIONS.inc(len(inputs), primary=self.primary, candidate=self.candidate)
+
+    def _write(self, records):
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def flush(self, timeout=None):
+        """Wait until every queued input has been scored (used by tests and the CLI)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        self._queue.put(None)
+
+
+_evaluators = {}
+_evaluators_lock = threading.Lock()
+
+
+def get_shadow(primary, candidate=None):
+    """The process-wide evaluator for ``primary``; None when no distinct candidate is configured.
+
+    The candidate is ``candidate``, else VALUATION_SHADOW, else the "shadow" alias.
+    Only the manifest is read here; the artifact is loaded by the worker thread.
+    """
+    candidate_name, entry = resolve(candidate or os.environ.get(SHADOW_ENV) or SHADOW_ALIAS)
+    if entry is None or candidate_name == primary:
+        return None
+    key = (primary, candidate_name, entry.get('registered_at'))
+    with _evaluators_lock:
+        evaluator = _evaluators.get(key)
+        if evaluator is None:
+            evaluator = _evaluators[key] = ShadowEvaluator(primary, candidate_name,
+                                                           lambda: load_registered_model(candidate_name))
+        return evaluator
+
+
+# ---------- Reports ----------
+def read_shadow_log(path):
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_json(path, lines=True)
+
+
+def shadow_report(log, agreement_pct=AGREEMENT_PCT):
+    """Disagreement and latency summary of a shadow log DataFrame; None when it is empty."""
+    if log.empty or 'shadow_pred' not in log.columns:
+        return None
+    errors = int(log['error'].notna().sum()) if 'error' in log.columns else 0
+    scored = log.dropna(subset=['shadow_pred', 'primary_pred'])
+    if scored.empty:
+        return None
+    diff = scored['shadow_pred'] - scored['primary_pred']
+    pct = (diff / scored['primary_pred'].where(scored['primary_pred'] != 0)).abs() * 100
+    return {
+        'comparisons': int(len(scored)),
+        'errors': errors,
+        'mean_diff_lakhs': float(diff.mean()),
+        'mean_abs_diff_lakhs': float(diff.abs().mean()),
+        'median_abs_pct_diff': float(pct.median()),
+        'p95_abs_pct_diff': float(pct.quantile(0.95)),
+        'agreement_share': float((pct <= agreement_pct).mean()),
+        'agreement_pct': agreement_pct,
+        'primary_p50_ms': float(scored['primary_ms'].median()),
+        'shadow_p50_ms': float(scored['shadow_ms'].median()),
+        'primary_p95_ms': float(scored['primary_ms'].quantile(0.95)),
+        'shadow_p95_ms': float(scored['shadow_ms'].quantile(0.95)),
+        'latency_delta_p50_ms': float(scored['shadow_ms'].median() - scored['primary_ms'].median()),
+    }
+
+
+_reports = {}
+_reports_lock = threading.Lock()
+
+
+def cached_shadow_report(path, agreement_pct=AGREEMENT_PCT):
+    """shadow_report() of the log at ``path``, re-aggregated only when the file changes."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size, agreement_pct)
+    with _reports_lock:
+        cached = _reports.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    report = shadow_report(read_shadow_log(path), agreement_pct)
+    with _reports_lock:
+        _reports[path] = (key, report)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report how a shadow model compares with the primary")
+    parser.add_argument("primary", help="Primary model name (as in the log file name)")
+    parser.add_argument("candidate", nargs="?", default=None, help="Candidate model (default: $VALUATION_SHADOW, else the 'shadow' alias)")
+    parser.add_argument("--agreement", type=float, default=AGREEMENT_PCT, help="Within this %% counts as agreement")
+    args = parser.parse_args(argv)
+
+    candidate = resolve(args.candidate or os.environ.get(SHADOW_ENV) or SHADOW_ALIAS)[0] or args.candidate
+    path = shadow_log_path(args.primary, candidate)
+    report = shadow_report(read_shadow_log(path), args.agreement)
+    print("=" * 80)
+    print(f"SHADOW EVALUATION - {candidate} vs. {args.primary}")
+    print("=" * 80)
+    if report is None:
+        print(f"\nNo comparisons logged in {path}")
+        return
+    print(f"\n📊 Comparisons: {report['comparisons']:,} (errors: {report['errors']})")
+    print(f"  • Mean difference: {report['mean_diff_lakhs']:+.2f} Lakhs (mean |diff| {report['mean_abs_diff_lakhs']:.2f})")
+    print(f"  • Median |diff|: {report['median_abs_pct_diff']:.2f}% • p95: {report['p95_abs_pct_diff']:.2f}%")
+    print(f"  • Within {report['agreement_pct']:g}%: {report['agreement_share'] * 100:.1f}% of inputs")
+    print(f"\n⏱️ Latency p50: primary {report['primary_p50_ms']:.2f} ms, shadow {report['shadow_p50_ms']:.2f} ms "
+          f"({report['latency_delta_p50_ms']:+.2f} ms)")
+    print(f"   Latency p95: primary {report['primary_p95_ms']:.2f} ms, shadow {report['shadow_p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1301,8 +1301,35 @@ import numpy as np
 import plotly.express as px #sos
 import plotly.graph_objects as go
 from datetime import datetime
+import hashlib
 import io
+import json
+import os
 import time
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from comparables import load_or_build_index, timed_query
+from drift import get_monitor
+from ensemble import ENSEMBLE_ENV, ensemble_spec, load_ensemble
+from explanations import TreeExplainer, can_explain, explain_prediction
+from exports import available_formats, export_file_name, export_mime, lazy_export
+from features import AMENITY_COLUMNS, PROPERTY_TYPE_PREFIX, canonical_columns, to_feature_frame
+from housing_data import dataset_version, load_dataset
+from jobs import (ACTIVE_STATUSES, JOBS_DIR, get_job, get_queue, job_result, list_jobs, share_model,
+                  value_batch)
+from locations import load_or_build_locations
+from market_charts import (PERIOD_LABELS, TREND_METRICS, cached_figure, city_price_figure, density_figure,
+                           price_distribution_figure, trend_figure)
+from metrics import (CACHE_MISSES, CACHE_REQUESTS, LOAD_SECONDS, PREDICTION_SECONDS, PREDICTIONS,
+                     RERUN_SECONDS, start_metrics_server, touch_session)
+from model_registry import load_registered_model, resolve
+from outliers import flag_outliers
+from prediction_intervals import interval_label, predict_with_interval
+from profiling import profile_rerun, profiling_enabled
+from rollups import refresh_rollups
+from scenarios import affects_model, build_scenario_grid, scenario_labels, score_scenarios
+from shadow import cached_shadow_report, get_shadow
+from validation import REASON_COLUMN, validate_batch
 
 st.set_page_config(layout="wide", page_title="AI Real Estate Valuation", page_icon="🏠")
 
@@ -1753,17 +1780,119 @@ MODEL_FILE = ROOT / "real_estate_model.pkl"
 DATA_FILE = ROOT / "india_housing_prices.csv"
 
 # ---------- Utilities ----------
-def load_model_metadata(path=MODEL_FILE):
+def load_model_metadata(path=MODEL_FILE, name=None):
+    # Prefer the model registry (models/registry.json): the name/alias is resolved on
+    # every rerun, so re-pointing an alias or re-registering a name is picked up at once;
+    # only the artifact load is cached, per registered version. Falls back to the
+    # legacy single-file model.
+    try:
+        resolved, entry = resolve(name)
+        if entry is not None:
+            return load_registered_version(resolved, json.dumps(entry, sort_keys=True))
+    except Exception as e:
+        st.warning(f"Failed to load registered model: {e}")
     if path.exists():
         try:
-            meta = joblib.load(path)
-            if isinstance(meta, dict) and 'model' in meta:
-                return meta
-            else:
-                return {'model': meta, 'feature_names': None, 'target_name': None}
+            return load_legacy_model(path, path.stat().st_mtime_ns)
         except Exception as e:
             st.warning(f"Failed to load model metadata: {e}")
-            return None
+    return None
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_registered_version(name, entry_json):
+    # Keyed on the whole manifest entry (registered_at, feature_hash, intervals, ...).
+    # Failures raise, and Streamlit does not cache exceptions.
+    # Runs only on a cache miss, so the recorded duration is the real load cost
+    CACHE_MISSES.inc(cache='model')
+    start = time.perf_counter()
+    meta = load_registered_model(name)
+    if meta is None:
+        raise KeyError(f"No model registered as '{name}'")
+    LOAD_SECONDS.set(time.perf_counter() - start, artifact='model', version=name)
+    return meta
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_legacy_model(path, mtime_ns):
+    CACHE_MISSES.inc(cache='model')
+    start = time.perf_counter()
+    meta = joblib.load(path)
+    if not (isinstance(meta, dict) and 'model' in meta):
+        meta = {'model': meta, 'feature_names': None, 'target_name': None}
+    LOAD_SECONDS.set(time.perf_counter() - start, artifact='model', version=path.name)
+    return meta
+
+def model_cache_key(meta):
+    # Identifies one registered model version for caches built on top of the model
+    entry = meta.get('registry_entry') or {}
+    if meta.get('registry_name'):
+        return (meta['registry_name'], entry.get('registered_at'), entry.get('feature_hash'))
+    return id(meta.get('model'))
+
+@st.cache_resource(show_spinner=False)
+def load_housing_data(version):
+    # Typed, validated dataset shared across sessions; reloaded when the file changes
+    CACHE_MISSES.inc(cache='dataset')
+    start = time.perf_counter()
+    result = load_dataset(DATA_FILE)
+    LOAD_SECONDS.set(time.perf_counter() - start, artifact='dataset', version=version)
+    return result
+
+@st.cache_resource(show_spinner=False)
+def load_comparables_index(version, _df):
+    # Built once per dataset version and persisted as memory-mapped arrays under cache/
+    return load_or_build_index(_df, version)
+
+@st.cache_resource(show_spinner=False)
+def load_location_index(version, _df):
+    # State -> City -> Locality options and benchmarks, persisted per dataset version
+    return load_or_build_locations(_df, version)
+
+@st.cache_resource(show_spinner=False)
+def load_trend_rollup(version):
+    # Folds in only rows appended since the last refresh; the full frame is never date-parsed
+    return refresh_rollups(DATA_FILE)[0]
+
+@st.cache_resource(show_spinner=False)
+def load_model_ensemble(spec_json, primary_key, _primary):
+    # Reloaded when the ensemble definition or the served model version changes; the
+    # served model is reused, not loaded twice
+    CACHE_MISSES.inc(cache='ensemble')
+    loaded = {_primary['registry_name']: _primary} if _primary.get('registry_name') else {}
+    return load_ensemble(json.loads(spec_json), loaded=loaded)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_explainer(model_key, _model, feature_names):
+    # Path tables are extracted once per model version (model_cache_key); the explainer
+    # then caches by feature vector
+    return TreeExplainer(_model, list(feature_names) if feature_names else None)
+
+def batch_job_status(job_id):
+    # Shows progress while the job runs (polling in a fragment, not the whole page) and
+    # returns the combined result once it is done; results are loaded once per session
+    cached = st.session_state.get('batch_job_result')
+    if cached and cached['job_id'] == job_id:
+        return cached['batch']
+    job = get_job(job_id)
+    if job is None:
+        st.error("❌ Batch job not found.")
+        return None
+    if job['status'] == 'done':
+        batch = job_result(job_id)
+        st.session_state['batch_job_result'] = {'job_id': job_id, 'batch': batch}
+        return batch
+    if job['status'] in ('failed', 'cancelled'):
+        st.error(f"❌ Batch valuation {job['status']}: {job['error'] or 'cancelled by a user'}")
+        return None
+    
+    @st.fragment(run_every=1.0)
+    def poll():
+        current = get_job(job_id)
+        if current['status'] not in ACTIVE_STATUSES:
+            st.rerun()
+        chunks = f"{current['done']}/{current['total']} chunks" if current['total'] else "preparing"
+        st.progress(current['progress'], text=f"⏳ {current['label']} • {current['status']} • {chunks}")
+        st.caption("Runs in the background: you can switch tabs or come back later.")
+    poll()
     return None
 
 def fmt_currency(x):
@@ -1791,9 +1920,10 @@ def main():
     """, unsafe_allow_html=True)
     
     # Load model
-    meta = load_model_metadata()
+    CACHE_REQUESTS.inc(cache='model')
+    meta = load_model_metadata(name=os.environ.get("VALUATION_MODEL"))
     if not meta:
-        st.error("❌ Model not found. Please ensure 'real_estate_model.pkl' exists.")
+        st.error("❌ Model not found. Register one in 'models/registry.json' or ensure 'real_estate_model.pkl' exists.")
         return
     
     model = meta.get('model')
@@ -1803,13 +1933,39 @@ def main():
         st.error("❌ Invalid model metadata")
         return
     
+    # Optional multi-model ensemble (models/registry.json "ensembles"; VALUATION_ENSEMBLE picks one)
+    ensemble = None
+    try:
+        spec = ensemble_spec(os.environ.get(ENSEMBLE_ENV))
+        if spec and len(spec['members']) > 1:
+            CACHE_REQUESTS.inc(cache='ensemble')
+            ensemble = load_model_ensemble(json.dumps(spec, sort_keys=True), model_cache_key(meta), meta)
+    except Exception as e:
+        st.warning(f"Model ensemble unavailable: {e}")
+    
     # Load dataset for defaults
     df = None
+    data_report = None
     if DATA_FILE.exists():
         try:
-            df = pd.read_csv(DATA_FILE)
-        except Exception:
-            pass
+            CACHE_REQUESTS.inc(cache='dataset')
+            df, data_report = load_housing_data(dataset_version(DATA_FILE))
+        except Exception as e:
+            st.warning(f"Failed to load dataset: {e}")
+    
+    comparables_index = None
+    if df is not None:
+        try:
+            comparables_index = load_comparables_index(dataset_version(DATA_FILE), df)
+        except Exception as e:
+            st.warning(f"Comparable properties unavailable: {e}")
+    
+    location_index = None
+    if df is not None:
+        try:
+            location_index = load_location_index(dataset_version(DATA_FILE), df)
+        except Exception as e:
+            st.warning(f"Location index unavailable: {e}")
     
     # Session state
     if 'prediction_history' not in st.session_state:
@@ -1818,7 +1974,7 @@ def main():
         st.session_state.preset = None
     
     # Tabs
-    tab1, tab2, tab3 = st.tabs(["🔮 Predict", "📊 History", "📈 Market Insights"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🔮 Predict", "📊 History", "📈 Market Insights", "📦 Batch Valuation"])
     
     with tab1:
         st.markdown("""
@@ -1854,6 +2010,28 @@ def main():
         
         st.markdown("<hr>", unsafe_allow_html=True)
         
+        # Location selectors live outside the form so each choice narrows the next one immediately
+        st.markdown("<h3 style='color: #003366; margin-bottom: 25px;'>📍 Location</h3>", unsafe_allow_html=True)
+        locality = None
+        locality_benchmark = None
+        if location_index is not None:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                state = st.selectbox("🗺️ State", options=location_index.states(), key="state_input")
+            with col2:
+                city = st.selectbox("🏙️ City", options=location_index.cities(state), key="city_input")
+            with col3:
+                locality = st.selectbox("📌 Locality", options=location_index.localities(state, city), key="locality_input")
+            city_options = location_index.all_cities()
+            locality_benchmark = location_index.benchmark(state, city, locality)
+            if locality_benchmark:
+                per_sqft = locality_benchmark.get('median_price_per_sqft')
+                per_sqft_text = f" • ₹{per_sqft * 100000:,.0f}/sqft" if per_sqft is not None else ""
+                st.caption(f"📊 Locality benchmark: {locality_benchmark['count']:,} listings • median {fmt_currency(locality_benchmark['median_price_lakhs'])} Lakhs{per_sqft_text}")
+        else:
+            city_options = df['City'].unique().tolist() if df is not None and 'City' in df.columns else ['Mumbai', 'Delhi', 'Bangalore']
+            city = st.selectbox("🏙️ City", options=city_options, key="city_input")
+        
         # Form
         with st.form("prediction_form"):
             st.markdown("<h3 style='color: #003366; margin-bottom: 25px;'>📝 Property Details</h3>", unsafe_allow_html=True)
@@ -1865,8 +2043,8 @@ def main():
             col1, col2 = st.columns(2)
             
             with col1:
-                city_options = df['City'].unique().tolist() if df is not None and 'City' in df.columns else ['Mumbai', 'Delhi', 'Bangalore']
-                city = st.selectbox("🏙️ City", options=city_options, key="city_input")
+                property_type_options = df['Property_Type'].unique().tolist() if df is not None and 'Property_Type' in df.columns else ['Apartment', 'Independent House', 'Villa']
+                property_type = st.selectbox("🏢 Property Type", options=property_type_options, key="property_type_input")
                 
                 area = st.number_input(
                     "📐 Area (sqft)", 
@@ -1908,6 +2086,22 @@ def main():
                     value=int(df_median_or_default(df, 'Balcony', 1)),
                     step=1
                 )
+                
+                age = st.number_input(
+                    "🕰️ Age of Property (years)", 
+                    min_value=0, 
+                    max_value=100, 
+                    value=int(df_median_or_default(df, 'Age_of_Property', 10)),
+                    step=1
+                )
+                
+                floor_no = st.number_input(
+                    "🏬 Floor No", 
+                    min_value=0, 
+                    max_value=100, 
+                    value=int(df_median_or_default(df, 'Floor_No', 1)),
+                    step=1
+                )
             
             # Amenities
             st.markdown("<h4 style='color: #003366; margin: 30px 0 15px 0;'>✨ Amenities</h4>", unsafe_allow_html=True)
@@ -1918,32 +2112,58 @@ def main():
             prediction_button = st.form_submit_button("🔍 Get Price Estimate", width='stretch')
             
             if prediction_button:
+                # Prepare input
+                input_data = {
+                    'City': city,
+                    'Area': area,
+                    'BHK': bhk,
+                    'Bedroom': bedrooms,
+                    'Bathroom': bathrooms,
+                    'Balcony': balconies,
+                    'Age_of_Property': age,
+                    'Floor_No': floor_no,
+                    'Property_Type': property_type,
+                    'Parking': 1 if 'Parking' in selected_amenities else 0,
+                    'Gym': 1 if 'Gym' in selected_amenities else 0,
+                    'SwimmingPool': 1 if 'Swimming Pool' in selected_amenities else 0,
+                    'Garden': 1 if 'Garden' in selected_amenities else 0,
+                    'Security': 1 if 'Security' in selected_amenities else 0,
+                    'PowerBackup': 1 if 'Power Backup' in selected_amenities else 0
+                }
+                # Same rules as batch uploads; amenity flags here are 0/1, not the dataset's Yes/No columns
+                _, rejected, _ = validate_batch(pd.DataFrame([input_data]).drop(columns=list(AMENITY_COLUMNS.values())))
+                if len(rejected):
+                    st.error(f"❌ Please check the property details: {rejected[REASON_COLUMN].iloc[0]}")
+            
+            if prediction_button and rejected.empty:
                 with st.spinner("🔄 Analyzing property data with AI..."):
                     time.sleep(0.8)
                     
-                    # Prepare input
-                    input_data = {
-                        'City': city,
-                        'Area': area,
-                        'BHK': bhk,
-                        'Bedroom': bedrooms,
-                        'Bathroom': bathrooms,
-                        'Balcony': balconies,
-                        'Parking': 1 if 'Parking' in selected_amenities else 0,
-                        'Gym': 1 if 'Gym' in selected_amenities else 0,
-                        'SwimmingPool': 1 if 'Swimming Pool' in selected_amenities else 0,
-                        'Garden': 1 if 'Garden' in selected_amenities else 0,
-                        'Security': 1 if 'Security' in selected_amenities else 0,
-                        'PowerBackup': 1 if 'Power Backup' in selected_amenities else 0
-                    }
-                    
                     # Add missing features with defaults
-                    for feat in feature_names:
-                        if feat not in input_data:
-                            input_data[feat] = 0
-                    
-                    X_input = pd.DataFrame([input_data])[feature_names]
-                    pred = model.predict(X_input)[0]
+                    X_input = to_feature_frame(pd.DataFrame([input_data]), feature_names)
+                    # Point estimate and range come out of the same pass over the model
+                    model_version = meta.get('registry_name') or 'legacy'
+                    with PREDICTION_SECONDS.time(model=model_version) as timer:
+                        point, lower, upper, interval_method = predict_with_interval(model, X_input, meta.get('intervals'))
+                    PREDICTIONS.inc(city=city, model=model_version)
+                    # The candidate gets a copy on its own thread; this rerun does not wait for it
+                    try:
+                        shadow = get_shadow(meta['registry_name']) if meta.get('registry_name') else None
+                        if shadow is not None:
+                            shadow.submit(pd.DataFrame([input_data]), point, timer.elapsed * 1000)
+                    except Exception as e:
+                        st.warning(f"Shadow model unavailable: {e}")
+                    if meta.get('drift_reference'):
+                        # Only the fields the form collects; zero-filled features would read as permanent drift
+                        get_monitor(model_version, meta['drift_reference']).observe(canonical_columns(pd.DataFrame([input_data])))
+                    pred = point[0]
+                    price_range = f"{fmt_currency(lower[0])} – {fmt_currency(upper[0])} Lakhs" if lower is not None else None
+                    # Uncalibrated forests only have the spread of their trees, which is narrower
+                    # than a prediction interval, so it is not labelled as one
+                    range_html = f"""
+                                <div style='color: #003366; font-size: 1.3em; font-weight: 600; margin-top: 5px;'>
+                                    📏 {interval_label(interval_method)}: {price_range}
+                                </div>""" if price_range else ""
                     
                     # Display result
                     st.markdown(f"""
@@ -1957,25 +2177,190 @@ def main():
                                 </div>
                                 <div style='font-size: 4em; color: #003366; font-weight: 800; margin: 20px 0; text-shadow: 2px 2px 4px rgba(0,0,0,0.1);'>
                                     {fmt_currency(pred)} <span style='font-size: 0.6em;'>Lakhs</span>
-                                </div>
+                                </div>{range_html}
                                 <div style='color: #666; font-size: 1.1em; margin-top: 15px; font-weight: 500;'>
                                     🤖 AI-Powered Prediction • ⚡ Instant Results • 📊 Data-Driven
                                 </div>
                             </div>
                         </div>
                     """, unsafe_allow_html=True)
+                    # Entered values outside the training data's IQR fences make the estimate an extrapolation
+                    fences = meta.get('outlier_fences')
+                    anomaly = flag_outliers(canonical_columns(pd.DataFrame([input_data])), fences).iloc[0] if fences else None
+                    if anomaly is not None and anomaly['Anomaly']:
+                        st.warning(f"⚠️ Unusual property: {anomaly['Anomaly_Columns']} outside the range the model was trained on. Treat this estimate with caution.")
+                    if locality_benchmark:
+                        locality_median = locality_benchmark['median_price_lakhs']
+                        st.caption(f"📊 {(pred / locality_median - 1) * 100:+.0f}% vs. the {locality} median of {fmt_currency(locality_median)} Lakhs")
+                    
+                    # Every ensemble member scores the same input concurrently
+                    ensemble_pred = None
+                    if ensemble is not None:
+                        blend, estimates, member_ms, wall_ms = ensemble.predict(pd.DataFrame([input_data]))
+                        ensemble_pred = float(blend[0])
+                        for name, ms in member_ms.items():
+                            PREDICTION_SECONDS.observe(ms / 1000, model=name)
+                        st.markdown("<h4 style='color: #003366; margin: 30px 0 15px 0;'>🤝 Model Ensemble</h4>", unsafe_allow_html=True)
+                        col1, col2 = st.columns([1, 2])
+                        with col1:
+                            st.metric("Blended Estimate", f"{fmt_currency(ensemble_pred)} Lakhs",
+                                      delta=f"{(ensemble_pred / pred - 1) * 100:+.1f}% vs. main model", delta_color="off")
+                        with col2:
+                            st.dataframe(pd.DataFrame({
+                                'Model': ensemble.names,
+                                'Weight': [ensemble.weights[name] for name in ensemble.names],
+                                'Estimate_Lakhs': [float(estimates[name][0]) for name in ensemble.names],
+                                'Time_ms': [member_ms[name] for name in ensemble.names]
+                            }), width='stretch', hide_index=True,
+                                column_config={'Weight': st.column_config.NumberColumn(format="%.2f"),
+                                               'Estimate_Lakhs': st.column_config.NumberColumn(format="₹%.2f"),
+                                               'Time_ms': st.column_config.NumberColumn(format="%.1f")})
+                        st.caption(f"{len(ensemble.members)} models scored {'concurrently' if ensemble.concurrent else 'in sequence (single CPU)'} in {wall_ms:.1f} ms "
+                                   f"(slowest {max(member_ms.values()):.1f} ms, sum {sum(member_ms.values()):.1f} ms)")
+                    
+                    # Comparable properties from the nearest-neighbour index
+                    if comparables_index is not None:
+                        comps, query_ms = timed_query(comparables_index, city, property_type, {
+                            'Size_in_SqFt': area,
+                            'BHK': bhk,
+                            'Age_of_Property': age,
+                            'Floor_No': floor_no
+                        }, k=5)
+                        st.markdown("<h4 style='color: #003366; margin: 30px 0 15px 0;'>🏘️ Comparable Properties</h4>", unsafe_allow_html=True)
+                        if comps.empty:
+                            st.info(f"No listings found for {property_type} in {city}.")
+                        else:
+                            st.dataframe(comps.drop(columns=['Similarity_Distance']), width='stretch', hide_index=True)
+                            st.caption(f"Closest {len(comps)} listings in {city} ({property_type}) • found in {query_ms:.1f} ms")
+                    
+                    # Per-prediction TreeSHAP attribution
+                    if can_explain(model):
+                        try:
+                            explainer = load_explainer(model_cache_key(meta), model, tuple(feature_names or ()))
+                            misses_before = explainer.misses
+                            contributions, explain_ms = explain_prediction(explainer, X_input)
+                            CACHE_REQUESTS.inc(cache='explanations')
+                            CACHE_MISSES.inc(explainer.misses - misses_before, cache='explanations')
+                        except Exception as e:
+                            contributions = None
+                            st.warning(f"Explanation unavailable: {e}")
+                        if contributions is not None:
+                            st.markdown("<h4 style='color: #003366; margin: 30px 0 15px 0;'>🧠 Why This Price?</h4>", unsafe_allow_html=True)
+                            contributions['Direction'] = np.where(contributions['Contribution_Lakhs'] >= 0, 'Raises price', 'Lowers price')
+                            fig = px.bar(
+                                contributions.iloc[::-1],
+                                x='Contribution_Lakhs',
+                                y='Feature',
+                                orientation='h',
+                                color='Direction',
+                                color_discrete_map={'Raises price': '#00CC66', 'Lowers price': '#FF4B4B'},
+                                hover_data={'Value': True},
+                                labels={'Contribution_Lakhs': 'Contribution (Lakhs)', 'Feature': ''}
+                            )
+                            fig.update_layout(
+                                plot_bgcolor='white',
+                                paper_bgcolor='white',
+                                font=dict(family='Inter, sans-serif', size=14),
+                                showlegend=False,
+                                height=max(300, 40 * len(contributions))
+                            )
+                            st.plotly_chart(fig, config={}, width='stretch')
+                            st.caption(f"Starts from the average prediction of {fmt_currency(explainer.expected_value)} Lakhs • TreeSHAP computed in {explain_ms:.1f} ms")
                     
                     # Store history
                     history_entry = {
                         'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                         'City': city,
+                        'Locality': locality or '—',
                         'Area_sqft': area,
                         'BHK': bhk,
                         'Bedrooms': bedrooms,
                         'Bathrooms': bathrooms,
-                        'Predicted_Price_Lakhs': f"{fmt_currency(pred)} Lakhs"
+                        'Predicted_Price_Lakhs': f"{fmt_currency(pred)} Lakhs",
+                        'Price_Range_Lakhs': price_range or '—',
+                        'Ensemble_Lakhs': f"{fmt_currency(ensemble_pred)} Lakhs" if ensemble_pred is not None else '—',
+                        'Unusual_Input': anomaly['Anomaly_Columns'] or 'No' if anomaly is not None else '—'
                     }
                     st.session_state.prediction_history.append(history_entry)
+                    st.session_state['last_input'] = input_data
+                    st.session_state['last_prediction'] = float(pred)
+        
+        # What-if scenarios: sweep the last valuation's inputs and score the grid in one batch
+        if st.session_state.get('last_input'):
+            base_input = st.session_state['last_input']
+            st.markdown("<hr>", unsafe_allow_html=True)
+            st.markdown("<h3 style='color: #003366; margin-bottom: 10px;'>🔬 What-if Scenarios</h3>", unsafe_allow_html=True)
+            st.markdown(f"<p style='color: #666; margin-bottom: 25px;'>Explore variations of your last valuation ({base_input['City']}, {base_input['Area']:,} sqft, {base_input['BHK']} BHK)</p>", unsafe_allow_html=True)
+            
+            with st.form("scenario_form"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    base_area = int(base_input['Area'])
+                    area_range = st.slider(
+                        "📐 Area range (sqft)",
+                        min_value=100,
+                        max_value=50000,
+                        value=(max(100, base_area - 500), min(50000, base_area + 500)),
+                        step=100
+                    )
+                    area_steps = st.number_input("Area steps", min_value=1, max_value=50, value=11, step=1)
+                    bhk_values = st.multiselect("🏘️ BHK", options=list(range(1, 11)), default=[int(base_input['BHK'])])
+                    floor_values = st.multiselect("🏬 Floor No", options=list(range(0, 101)), default=[int(base_input['Floor_No'])])
+                with col2:
+                    # Only inputs the served model actually uses can change its estimate
+                    scenario_cities = [base_input['City']]
+                    if affects_model('City', feature_names):
+                        scenario_cities = st.multiselect("🏙️ Cities", options=city_options, default=[base_input['City']])
+                    amenity_options = [a for a, col in AMENITY_COLUMNS.items() if affects_model(col, feature_names)]
+                    toggled_amenities = []
+                    if amenity_options:
+                        toggled_amenities = st.multiselect("✨ Compare with / without amenities", options=amenity_options)
+                    unused = [label for label, col in [('City', 'City'), *AMENITY_COLUMNS.items()]
+                              if not affects_model(col, feature_names)]
+                    if unused:
+                        st.caption(f"ℹ️ The current model does not use {', '.join(unused)}, so they are not offered as sweeps.")
+                scenario_button = st.form_submit_button("🔬 Run Scenarios", width='stretch')
+            
+            if scenario_button:
+                sweep = {
+                    'Area': np.unique(np.linspace(area_range[0], area_range[1], int(area_steps)).round().astype(int)),
+                    'BHK': bhk_values,
+                    'Floor_No': floor_values,
+                    'City': scenario_cities
+                }
+                for amenity in toggled_amenities:
+                    sweep[AMENITY_COLUMNS[amenity]] = [0, 1]
+                try:
+                    grid = build_scenario_grid(base_input, sweep)
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}. Narrow the sweep and try again.")
+                    grid = None
+                if grid is not None:
+                    start = time.perf_counter()
+                    scored = score_scenarios(model, grid, feature_names, meta.get('intervals'),
+                                             base_prediction=st.session_state.get('last_prediction'))
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    swept = [c for c, v in sweep.items() if len(v) > 1]
+                    scored['Scenario'] = scenario_labels(scored, swept, exclude=('Area',))
+                    
+                    fig = px.line(
+                        scored,
+                        x='Area',
+                        y='Predicted_Price_Lakhs',
+                        color='Scenario',
+                        markers=True,
+                        title='🔬 Estimated Price by Area',
+                        labels={'Area': 'Area (sqft)', 'Predicted_Price_Lakhs': 'Estimated Price (Lakhs)'}
+                    )
+                    fig.update_layout(
+                        plot_bgcolor='white',
+                        paper_bgcolor='white',
+                        font=dict(family='Inter, sans-serif', size=14),
+                        title_font=dict(size=20, color='#003366', family='Inter, sans-serif', weight='bold')
+                    )
+                    st.plotly_chart(fig, config={}, width='stretch')
+                    st.dataframe(scored.drop(columns=['Scenario']), width='stretch', hide_index=True)
+                    st.caption(f"{len(scored):,} scenarios scored in one batch • {elapsed_ms:.1f} ms")
     
     with tab2:
         st.markdown("""
@@ -1989,22 +2374,43 @@ def main():
             df_history = pd.DataFrame(st.session_state.prediction_history)
             st.dataframe(df_history, width='stretch')
             
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns(3)
             with col1:
-                csv = df_history.to_csv(index=False).encode('utf-8')
+                export_format = st.selectbox("Export format", options=available_formats(), key="history_export_format",
+                                             label_visibility="collapsed")
+            with col2:
+                # The file is only written (in chunks, to a spooled temp file) when the button is clicked
                 st.download_button(
-                    label="📥 Download History (CSV)",
-                    data=csv,
-                    file_name=f"prediction_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    label=f"📥 Download History ({export_format})",
+                    data=lazy_export(lambda: df_history, export_format),
+                    file_name=export_file_name("prediction_history", export_format),
+                    mime=export_mime(export_format),
                     width='stretch'
                 )
-            with col2:
+            with col3:
                 if st.button("🗑️ Clear History", width='stretch'):
                     st.session_state.prediction_history = []
                     st.rerun()
         else:
             st.info("📝 No predictions yet. Start by making a prediction in the Predict tab!")
+        
+        # Candidate model running in shadow mode (registry alias "shadow"), compared across all sessions
+        shadow = get_shadow(meta['registry_name']) if meta.get('registry_name') else None
+        if shadow is not None:
+            report = cached_shadow_report(shadow.log_path)
+            with st.expander(f"🕶️ Shadow Model: {shadow.candidate} vs. {shadow.primary}"):
+                if report is None:
+                    st.info("No shadow comparisons logged yet.")
+                else:
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Comparisons", f"{report['comparisons']:,}")
+                    col2.metric(f"Within {report['agreement_pct']:g}%", f"{report['agreement_share'] * 100:.1f}%")
+                    col3.metric("Median |Difference|", f"{report['median_abs_pct_diff']:.1f}%",
+                                delta=f"{report['mean_diff_lakhs']:+.2f} Lakhs mean", delta_color="off")
+                    col4.metric("Shadow Latency (p50)", f"{report['shadow_p50_ms']:.1f} ms",
+                                delta=f"{report['latency_delta_p50_ms']:+.1f} ms vs. primary", delta_color="inverse")
+                    st.caption(f"p95 |difference| {report['p95_abs_pct_diff']:.1f}% • p95 latency {report['shadow_p95_ms']:.1f} ms "
+                               f"vs. {report['primary_p95_ms']:.1f} ms • {report['errors']} shadow errors")
     
     with tab3:
         st.markdown("""
@@ -2025,48 +2431,198 @@ def main():
             with col3:
                 cities = df['City'].nunique() if 'City' in df.columns else 0
                 st.metric("🏙️ Cities Covered", f"{cities}", delta="Growing")
+            if data_report:
+                rejected = f" • {data_report['invalid_rows']:,} rows rejected by schema validation" if data_report['invalid_rows'] else ""
+                st.caption(f"💾 Dataset held in {data_report['memory_bytes'] / 1e6:.1f} MB using the typed schema{rejected}")
             
             st.markdown("<hr>", unsafe_allow_html=True)
             
-            # Charts
+            # Charts: aggregated server-side and cached per dataset version
+            version = dataset_version(DATA_FILE)
             if 'Price_in_Lakhs' in df.columns:
-                fig = px.histogram(
-                    df, 
-                    x='Price_in_Lakhs', 
-                    nbins=50,
-                    title='📊 Price Distribution',
-                    color_discrete_sequence=['#FF6600']
-                )
-                fig.update_layout(
-                    plot_bgcolor='white',
-                    paper_bgcolor='white',
-                    font=dict(family='Inter, sans-serif', size=14),
-                    title_font=dict(size=20, color='#003366', family='Inter, sans-serif', weight='bold')
-                )
-                st.plotly_chart(fig, config={} ,width='stretch')
+                fig = cached_figure('price_distribution', version, lambda: price_distribution_figure(df, nbins=50), nbins=50)
+                st.plotly_chart(fig, config={}, width='stretch')
             
             if 'City' in df.columns and 'Price_in_Lakhs' in df.columns:
-                city_avg = df.groupby('City')['Price_in_Lakhs'].mean().sort_values(ascending=False).head(10)
-                fig = px.bar(
-                    x=city_avg.index,
-                    y=city_avg.values,
-                    title='🏙️ Average Price by Top 10 Cities',
-                    labels={'x': 'City', 'y': 'Average Price (Lakhs)'},
-                    color=city_avg.values,
-                    color_continuous_scale=[[0, '#003366'], [1, '#FF6600']]
-                )
-                fig.update_layout(
-                    plot_bgcolor='white',
-                    paper_bgcolor='white',
-                    font=dict(family='Inter, sans-serif', size=14),
-                    title_font=dict(size=20, color='#003366', family='Inter, sans-serif', weight='bold'),
-                    showlegend=False
+                fig = cached_figure('city_price', version, lambda: city_price_figure(df, top=10), top=10)
+                st.plotly_chart(fig, config={}, width='stretch')
+            
+            # Density heatmaps: every listing is binned server-side, only the grid is sent
+            density_charts = [
+                ('Size_in_SqFt', 'Price_in_Lakhs', '🔥 Price vs Size Density', 'Size (sqft)', 'Price (Lakhs)', 1.0),
+                ('Age_of_Property', 'Price_per_SqFt', '🔥 Price per SqFt vs Age Density', 'Age (years)', 'Price per SqFt (₹)', 100000.0)
+            ]
+            density_charts = [c for c in density_charts if c[0] in df.columns and c[1] in df.columns]
+            for col, (x, y, title, x_label, y_label, y_scale) in zip(st.columns(2), density_charts):
+                with col:
+                    fig = cached_figure(
+                        'density', version,
+                        lambda: density_figure(df, x, y, title, x_label, y_label, y_scale=y_scale),
+                        x=x, y=y, y_scale=y_scale
+                    )
+                    st.plotly_chart(fig, config={}, width='stretch')
+            
+            # Trends from precomputed rollups
+            try:
+                rollup = load_trend_rollup(version)
+            except Exception as e:
+                rollup = None
+                st.warning(f"Market trends unavailable: {e}")
+            if rollup is not None and rollup.cells:
+                scopes = [('All', 'All')] + [('State', s) for s in rollup.keys('State')] + [('City', c) for c in rollup.keys('City')]
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    scope, scope_key = st.selectbox(
+                        "Trend for",
+                        options=scopes,
+                        format_func=lambda s: "All Listings" if s[0] == 'All' else f"{s[0]}: {s[1]}",
+                        key="trend_scope"
+                    )
+                with col2:
+                    period_type = st.selectbox("Period", options=rollup.period_types(), format_func=PERIOD_LABELS.get, key="trend_period")
+                with col3:
+                    metric = st.selectbox("Metric", options=list(TREND_METRICS), format_func=TREND_METRICS.get, key="trend_metric")
+                fig = cached_figure(
+                    'trend', version,
+                    lambda: trend_figure(rollup, scope, scope_key, period_type, metric),
+                    scope=scope, key=scope_key, period_type=period_type, metric=metric
                 )
                 st.plotly_chart(fig, config={}, width='stretch')
         else:
             st.info("📊 No market data available. Load 'india_housing_prices.csv' for insights.")
+        
+        # Live valuation inputs vs. the model's training data, across all sessions of this server
+        if meta.get('drift_reference'):
+            monitor = get_monitor(meta.get('registry_name') or 'legacy', meta['drift_reference'])
+            st.markdown("<h3 style='color: #003366; margin: 40px 0 10px 0;'>🩺 Input Drift</h3>", unsafe_allow_html=True)
+            st.markdown(f"<p style='color: #666; margin-bottom: 25px;'>Population Stability Index of the last {monitor.samples:,} valuation inputs against the training data</p>", unsafe_allow_html=True)
+            st.dataframe(
+                monitor.scores(),
+                width='stretch',
+                hide_index=True,
+                column_config={'PSI': st.column_config.NumberColumn(format="%.3f")}
+            )
+            st.caption(f"PSI below 0.1 is stable, 0.1–0.25 a moderate shift, above 0.25 significant • refreshed every {monitor.refresh_seconds} s")
+    
+    with tab4:
+        st.markdown("""
+            <div class='section-header'>
+                <h2 class='section-title'>📦 Batch Valuation</h2>
+                <p class='section-subtitle'>Validate and value a whole file of listings in one pass</p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        required = [f for f in feature_names if not f.startswith(PROPERTY_TYPE_PREFIX)]
+        uploaded = st.file_uploader("Upload listings (CSV)", type=['csv'], key="batch_upload")
+        st.caption(f"Required columns: {', '.join(required)} ('Area' is accepted for Size_in_SqFt). "
+                   "Rows that fail validation are quarantined with the reasons instead of being scored.")
+        if uploaded is not None:
+            upload = st.session_state.get('batch_upload_job')
+            # Each distinct file is queued once; reruns, other tabs and reconnects just poll the job
+            if upload is None or upload['file_id'] != uploaded.file_id:
+                data = uploaded.getvalue()
+                upload_path = JOBS_DIR / "uploads" / f"{hashlib.sha1(data).hexdigest()}.csv"
+                if not upload_path.exists():
+                    upload_path.parent.mkdir(parents=True, exist_ok=True)
+                    upload_path.write_bytes(data)
+                job_id = None
+                if meta.get('registry_name'):
+                    share_model(meta)
+                    job_id = get_queue().submit(
+                        'batch_valuation',
+                        {'path': str(upload_path), 'model': meta['registry_name']},
+                        label=f"Batch valuation: {uploaded.name}"
+                    )
+                upload = {'file_id': uploaded.file_id, 'name': uploaded.name, 'path': str(upload_path), 'job_id': job_id}
+                st.session_state['batch_upload_job'] = upload
+            
+            batch = None
+            if upload['job_id'] is None:
+                # Unregistered (legacy) model: jobs cannot load it by name, so value in the rerun
+                try:
+                    results, quarantined, report = value_batch(meta, pd.read_csv(upload['path']))
+                    batch = {'results': results, 'quarantined': quarantined, 'report': report}
+                except ValueError as e:
+                    st.error(f"❌ Could not process '{upload['name']}': {e}")
+            else:
+                batch = batch_job_status(upload['job_id'])
+            
+            if batch is not None:
+                results, quarantined, report = batch['results'], batch['quarantined'], batch['report']
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Rows", f"{len(results) + len(quarantined):,}")
+                col2.metric("Valued", f"{len(results):,}")
+                col3.metric("Quarantined", f"{len(quarantined):,}")
+                if 'Anomaly' in results.columns and results['Anomaly'].any():
+                    st.warning(f"⚠️ {int(results['Anomaly'].sum()):,} valued rows lie outside the training data's range (see the Anomaly columns).")
+                
+                failed = report[report['Violations'] > 0]
+                if failed.empty:
+                    st.success("✅ Every row passed validation.")
+                else:
+                    st.markdown("<h4 style='color: #003366; margin: 30px 0 15px 0;'>🚧 Validation Report</h4>", unsafe_allow_html=True)
+                    st.dataframe(failed.sort_values('Violations', ascending=False), width='stretch', hide_index=True)
+                
+                export_format = st.selectbox("Export format", options=available_formats(), key="batch_export_format")
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown("<h4 style='color: #003366; margin: 30px 0 15px 0;'>💰 Valued Listings</h4>", unsafe_allow_html=True)
+                    st.dataframe(results.head(1000), width='stretch', hide_index=True)
+                    st.download_button(
+                        label=f"📥 Download Valuations ({export_format})",
+                        data=lazy_export(lambda: results, export_format),
+                        file_name=export_file_name("batch_valuations", export_format),
+                        mime=export_mime(export_format),
+                        width='stretch',
+                        disabled=results.empty
+                    )
+                with col2:
+                    st.markdown("<h4 style='color: #003366; margin: 30px 0 15px 0;'>🚫 Quarantined Rows</h4>", unsafe_allow_html=True)
+                    st.dataframe(quarantined.head(1000), width='stretch', hide_index=True)
+                    st.download_button(
+                        label=f"📥 Download Quarantine ({export_format})",
+                        data=lazy_export(lambda: quarantined, export_format),
+                        file_name=export_file_name("batch_quarantine", export_format),
+                        mime=export_mime(export_format),
+                        width='stretch',
+                        disabled=quarantined.empty
+                    )
+                if max(len(results), len(quarantined)) > 1000:
+                    st.caption("Previews show the first 1,000 rows; downloads contain everything.")
+        
+        # Jobs are shared by every session, so this also shows work started elsewhere
+        with st.expander("🧵 Background Jobs"):
+            if st.button("🔄 Refresh Trend Statistics", key="refresh_rollups_job"):
+                get_queue().submit('refresh_rollups', {'path': str(DATA_FILE), 'requested': datetime.now().isoformat()},
+                                   label="Refresh trend statistics")
+            jobs = list_jobs(limit=20)
+            if jobs:
+                st.dataframe(pd.DataFrame([{
+                    'Job': job['label'],
+                    'Status': job['status'],
+                    'Progress': job['progress'],
+                    'Chunks': f"{job['done']}/{job['total'] or '?'}",
+                    'Started': datetime.fromtimestamp(job['created']).strftime("%Y-%m-%d %H:%M:%S"),
+                    'Error': job['error'] or ''
+                } for job in jobs]), width='stretch', hide_index=True,
+                    column_config={'Progress': st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)})
+            else:
+                st.info("No background jobs yet.")
+
+def run_app():
+    start_metrics_server()
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        touch_session(ctx.session_id)
+    # ?profile=1 or VALUATION_PROFILE=1 wraps this rerun in cProfile; otherwise main() runs as-is
+    with RERUN_SECONDS.time(), profile_rerun(profiling_enabled(st.query_params)) as profile:
+        main()
+    if profile is not None:
+        with st.expander(f"⏱️ Rerun profile • {profile.elapsed_ms:.0f} ms"):
+            st.dataframe(profile.top_functions(), width='stretch', hide_index=True)
+            st.caption(f"Saved to {profile.path}")
 
 if __name__ == "__main__":
-    main()
+    run_app()
 
 
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from drift import DriftMonitor
+
+REFERENCE = {'columns': ['a', 'b'], 'edges': [[1.0, 2.0], [10.0]], 'proportions': [[0.3, 0.3, 0.4], [0.5, 0.5]]}
+
+
+def _rows(values_a, values_b=None):
+    values_a = np.asarray(values_a, dtype=np.float64)
+    values_b = np.zeros(len(values_a)) if values_b is None else np.asarray(values_b, dtype=np.float64)
+    return pd.DataFrame({'a': values_a, 'b': values_b})
+
+
+def _expected_counts(monitor, frames):
+    # Brute force: bin the newest `window` rows from scratch
+    tail = pd.concat(frames, ignore_index=True).tail(monitor.window)
+    bins = monitor._bin_rows(tail)
+    counts = np.zeros_like(monitor._counts)
+    for j in range(bins.shape[1]):
+        present = bins[:, j] >= 0
+        counts[j] = np.bincount(bins[present, j], minlength=counts.shape[1])
+    return counts
+
+
+def test_batch_crossing_fill_point_evicts_only_occupied_slots():
+    monitor = DriftMonitor(REFERENCE, window=10)
+    frames = [_rows(np.full(5, 5.0)), _rows(np.full(10, 0.0))]
+    for frame in frames:
+        monitor.observe(frame)
+    assert monitor._counts.min() >= 0
+    np.testing.assert_array_equal(monitor._counts, _expected_counts(monitor, frames))
+
+
+def test_batches_larger_than_window_and_wraparound():
+    rng = np.random.default_rng(0)
+    monitor = DriftMonitor(REFERENCE, window=10)
+    frames = []
+    for n in (3, 25, 4, 9, 1, 10, 17):
+        frame = _rows(rng.uniform(0, 3, n), rng.uniform(0, 20, n))
+        frames.append(frame)
+        monitor.observe(frame)
+        assert monitor._counts.min() >= 0
+        np.testing.assert_array_equal(monitor._counts, _expected_counts(monitor, frames))
+    assert monitor.samples == 10
+
+
+def test_missing_values_are_not_counted():
+    monitor = DriftMonitor(REFERENCE, window=200)
+    monitor.observe(pd.DataFrame({'a': np.full(150, 1.5)}))
+    scores = monitor.scores(force=True).set_index('Feature')
+    assert monitor._counts[1].sum() == 0
+    assert scores.loc['b', 'Status'] == 'Collecting'
+    assert scores.loc['a', 'Status'] != 'Collecting'
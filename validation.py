@@ -0,0 +1,100 @@
+# Batch input validation for the AI-Based Real Estate Valuation System
+# Every rule is a vectorized check that returns a boolean "violates" mask for a
+# whole batch, so a million-row upload is screened in one pass. Rows that break
+# any rule are quarantined with the names of the rules they broke; the rest are
+# safe to hand to model.predict. Column ranges and allowed categories come from
+# housing_data.SCHEMA; cross-field consistency rules are declared in RULES.
+
+import numpy as np
+import pandas as pd
+
+from features import PROPERTY_TYPE_PREFIX, canonical_columns
+from housing_data import SCHEMA, column_violations
+
+REASON_COLUMN = 'Rejection_Reasons'
+MIN_SQFT_PER_BHK = 120
+PRICE_PER_SQFT_TOLERANCE = 0.01   # Lakhs per sqft; the dataset rounds to 2 decimals
+
+
+def _numeric(df, col):
+    return pd.to_numeric(df[col], errors='coerce')
+
+
+# name -> description, required columns and a check returning True where a row violates it
+RULES = {
+    'floor_above_total_floors': {
+        'description': "Floor_No is higher than Total_Floors",
+        'columns': ('Floor_No', 'Total_Floors'),
+        'check': lambda df: (_numeric(df, 'Floor_No') > _numeric(df, 'Total_Floors')).to_numpy(),
+    },
+    'price_per_sqft_mismatch': {
+        'description': "Price_per_SqFt disagrees with Price_in_Lakhs / Size_in_SqFt",
+        'columns': ('Price_per_SqFt', 'Price_in_Lakhs', 'Size_in_SqFt'),
+        'check': lambda df: (
+            (_numeric(df, 'Price_in_Lakhs') / _numeric(df, 'Size_in_SqFt') - _numeric(df, 'Price_per_SqFt')).abs()
+            > PRICE_PER_SQFT_TOLERANCE + 1e-9).to_numpy(),
+    },
+    'size_too_small_for_bhk': {
+        'description': f"Less than {MIN_SQFT_PER_BHK} sqft per BHK",
+        'columns': ('Size_in_SqFt', 'BHK'),
+        'check': lambda df: (_numeric(df, 'Size_in_SqFt') < _numeric(df, 'BHK') * MIN_SQFT_PER_BHK).to_numpy(),
+    },
+}
+
+
+def _schema_rules(df, schema):
+    rules = {}
+    for col, spec in schema.items():
+        if col in df.columns:
+            _, rule = column_violations(df[col].iloc[:0], spec)
+            rules[f"invalid_{col}"] = {
+                'description': f"{col} must be {rule}",
+                'columns': (col,),
+                'check': lambda frame, col=col, spec=spec: column_violations(frame[col], spec)[0],
+            }
+    return rules
+
+
+def _required_rules(df, feature_names):
+    rules = {}
+    for col in feature_names or ():
+        if col in df.columns:
+            rules[f"missing_{col}"] = {
+                'description': f"{col} is empty or not a number",
+                'columns': (col,),
+                'check': lambda frame, col=col: _numeric(frame, col).isna().to_numpy(),
+            }
+    return rules
+
+
+def validate_batch(df, feature_names=None, rules=None, schema=SCHEMA):
+    """Split ``df`` into ``(accepted, quarantined, report)``.
+
+    ``feature_names`` are the model inputs that must be present and numeric. Rules
+    whose columns are absent from the batch are skipped. ``quarantined`` keeps
+    the original columns plus ``Rejection_Reasons``; ``report`` counts the
+    violations of each rule that was applied.
+    """
+    df = canonical_columns(df)
+    missing = [c for c in feature_names or () if c not in df.columns and not c.startswith(PROPERTY_TYPE_PREFIX)]
+    if missing:
+        raise ValueError(f"Batch is missing model input columns: {missing}")
+
+    all_rules = {**_required_rules(df, feature_names), **_schema_rules(df, schema), **(rules or RULES)}
+    reasons = np.full(len(df), '', dtype=object)
+    invalid = np.zeros(len(df), dtype=bool)
+    report = []
+    for name, rule in all_rules.items():
+        if not all(c in df.columns for c in rule['columns']):
+            continue
+        violates = np.asarray(rule['check'](df), dtype=bool)
+        count = int(violates.sum())
+        report.append({'Rule': name, 'Description': rule['description'], 'Violations': count})
+        if count:
+            invalid |= violates
+            reasons[violates] = reasons[violates] + name + '; '
+
+    accepted = df.loc[~invalid].reset_index(drop=True)
+    quarantined = df.loc[invalid].copy()
+    quarantined[REASON_COLUMN] = pd.Series(reasons[invalid], index=quarantined.index).str.rstrip('; ')
+    return accepted, quarantined.reset_index(drop=True), pd.DataFrame(report, columns=['Rule', 'Description', 'Violations'])